@@ -0,0 +1,297 @@
+import asyncio
+import hmac
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+
+from fastapi import Depends, FastAPI, File, Header, HTTPException, Query, Request, UploadFile
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+import inmeet_service as service
+import opwarmen
+import tenants
+from offerte_archief import get_offerte_archief
+from deal_index import deal_index_voor
+from product_catalogus import catalogus_voor
+import webhooks
+
+# ======================================================
+# 🌐 INMEET API — STATELESS HTTP SERVICE
+# Start: uvicorn api:app --host 0.0.0.0 --port 8000
+# Alle gedeelde state (tokens, tax rate, offerte-state, parse-cache)
+# staat in de state store, dus meerdere replica's kunnen naast elkaar draaien.
+# Tenant per request via de header X-Tenant of ?tenant= (Teamleader-webhooks
+# kunnen geen headers meegeven); zonder: de standaard-tenant.
+# Routes die offertes versturen, deals tonen, de reviewlijst wijzigen of
+# het archief tonen vereisen "Authorization: Bearer <API_TOKEN>" (standaard ADMIN_TOKEN);
+# zonder ingesteld token staan ze uit.
+# ======================================================
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 2)))
+
+# meldingen van opwarmen, webhooks en achtergrond-syncs (uvicorn logt alleen zijn eigen loggers)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def _warm_parse_pool(pool):
+    """Eén mini-werkboek per worker: start de processen en laadt openpyxl daar."""
+    for future in [pool.submit(opwarmen.warm_excel) for _ in range(PARSE_WORKERS)]:
+        future.result()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # uitlezen van Excel is CPU-werk → eigen processen, niet de event loop
+    app.state.parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    app.state.webhooks = webhooks.WebhookVerwerker()
+    # product_ids voor de offerteregels en de open deals (zoeken vanuit app.py),
+    # per tenant in de achtergrond bijgehouden
+    for naam in tenants.tenant_namen():
+        catalogus_voor(naam).start_achtergrond_sync()
+        deal_index_voor(naam).start_achtergrond_sync()
+    # prijstabellen, token, tax rate en verbindingen klaarzetten; /ready wacht hierop
+    opwarmen.opwarmer.start({"parse_pool": lambda: _warm_parse_pool(app.state.parse_pool)})
+    yield
+    app.state.webhooks.sluit()
+    app.state.parse_pool.shutdown(cancel_futures=True)
+
+
+app = FastAPI(title="Inmeet API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def kies_tenant(request: Request, call_next):
+    try:
+        tenant = tenants.get_tenant(
+            request.headers.get("X-Tenant") or request.query_params.get("tenant") or tenants.STANDAARD_TENANT
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"detail": str(e)})
+    with tenants.gebruik_tenant(tenant.naam):
+        return await call_next(request)
+
+
+def vereis_token(authorization: str = Header("")):
+    if not service.API_TOKEN:
+        raise HTTPException(status_code=503, detail="API_TOKEN/ADMIN_TOKEN is niet ingesteld; deze route staat uit.")
+    schema, _, token = authorization.partition(" ")
+    if schema.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), service.API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Ongeldig of ontbrekend API-token.",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+beveiligd = [Depends(vereis_token)]
+
+
+class PrijsVerzoek(BaseModel):
+    parse: dict
+    model: Optional[str] = None
+    deal_id: Optional[str] = None
+    vergelijk: bool = False
+    uitleg: bool = False
+
+
+class OfferteVerzoek(BaseModel):
+    # geen bedragen van de client: de offerte wordt uit parse opnieuw geprijsd
+    deal_id: str
+    mode: Literal["P", "D"]
+    parse: dict
+    model: Optional[str] = None
+    dry_run: bool = False
+    forceer: bool = False   # ook zonder wijzigingen opnieuw versturen
+
+
+class ReviewGoedkeuring(BaseModel):
+    mode: Optional[Literal["P", "D"]] = None
+
+
+class KeukensPrijsVerzoek(BaseModel):
+    keukens: list[dict]
+    model: Optional[str] = None
+
+
+class KeukensOfferteVerzoek(BaseModel):
+    eenheden: list[dict]   # [{"keuken", "parse", "model"}]; meegestuurde "data" wordt herrekend
+    mode: Literal["P", "D"]
+    deal_id: Optional[str] = None
+    deals: Optional[dict[str, str]] = None
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: pas 200 als het opwarmen klaar is (liveness blijft /health)."""
+    status = opwarmen.opwarmer.status()
+    return JSONResponse(status_code=200 if status["klaar"] else 503, content=status)
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "teamleader": {naam: t.scheduler.metrics() for naam, t in tenants.TENANTS.items()},
+        "webhooks": dict(app.state.webhooks.tellers),
+    }
+
+
+@app.post("/parse")
+async def parse(bestand: UploadFile = File(...)):
+    inhoud = await bestand.read()
+    naam = bestand.filename or "werkboek.xlsx"
+
+    resultaat = service.uit_parse_cache(inhoud, naam)
+    if resultaat is None:
+        loop = asyncio.get_running_loop()
+        resultaat = await loop.run_in_executor(
+            app.state.parse_pool, service.lees_werkboek_zonder_cache, inhoud, naam
+        )
+        service.naar_parse_cache(inhoud, naam, resultaat)
+    return resultaat
+
+
+@app.post("/price")
+def price(verzoek: PrijsVerzoek):
+    try:
+        return service.prijs(verzoek.parse, verzoek.model, verzoek.deal_id, verzoek.vergelijk, verzoek.uitleg)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _herprijs(parse_state, model, deal_id=None):
+    try:
+        return service.prijs(parse_state, model, deal_id)["data"]
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post("/quotations", dependencies=beveiligd)
+def quotations(verzoek: OfferteVerzoek):
+    data = _herprijs(verzoek.parse, verzoek.model, verzoek.deal_id)
+    try:
+        if verzoek.dry_run:
+            # exact de body die naar Teamleader zou gaan; 204 als er niets te versturen is
+            payload = service.verstuur(
+                verzoek.deal_id, data, verzoek.mode, verzoek.parse, dry_run=True, forceer=verzoek.forceer,
+            )["payload"]
+            if payload is None:
+                return Response(status_code=204)
+            return Response(content=payload, media_type="application/json")
+        return service.verstuur(verzoek.deal_id, data, verzoek.mode, verzoek.parse, forceer=verzoek.forceer)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@app.post("/price/units")
+def price_units(verzoek: KeukensPrijsVerzoek):
+    try:
+        return service.prijs_keukens(verzoek.keukens, verzoek.model)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post("/quotations/units", dependencies=beveiligd)
+def quotations_units(verzoek: KeukensOfferteVerzoek):
+    eenheden = []
+    for e in verzoek.eenheden:
+        if "keuken" not in e or "parse" not in e:
+            raise HTTPException(status_code=422, detail="Elke eenheid heeft 'keuken' en 'parse' nodig.")
+        model = e.get("model") or (e.get("data") or {}).get("model")
+        eenheden.append({"keuken": e["keuken"], "parse": e["parse"], "data": _herprijs(e["parse"], model)})
+    try:
+        return service.verstuur_keukens(eenheden, verzoek.mode, verzoek.deal_id, verzoek.deals)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@app.get("/deals", dependencies=beveiligd)
+def deals_zoeken(q: str, limiet: int = 10):
+    return service.zoek_deals(q, limiet)
+
+
+@app.get("/deals/{deal_id}", dependencies=beveiligd)
+def deal_info(deal_id: str):
+    try:
+        return service.deal(deal_id)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@app.post("/webhooks/teamleader", status_code=202)
+async def webhook_teamleader(request: Request, geheim: str = "", x_webhook_geheim: str = Header("")):
+    # zonder geheim zou iedereen offertes kunnen laten maken: net als vereis_token uit
+    if not webhooks.WEBHOOK_GEHEIM:
+        raise HTTPException(status_code=503, detail="WEBHOOK_GEHEIM is niet ingesteld; webhooks staan uit.")
+    # bij voorkeur als header: een query string komt in access logs terecht
+    if not hmac.compare_digest((x_webhook_geheim or geheim).encode(), webhooks.WEBHOOK_GEHEIM.encode()):
+        raise HTTPException(status_code=401, detail="Ongeldig webhook-geheim.")
+    ruw = await request.body()
+    try:
+        event = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is geen JSON.")
+
+    status = app.state.webhooks.ontvang(event, ruw)
+    if status == "vol":
+        # Teamleader probeert het later opnieuw
+        raise HTTPException(status_code=503, detail="Webhook-wachtrij is vol.")
+    if status == "dubbel":
+        return JSONResponse(status_code=200, content={"status": status})
+    return {"status": status}
+
+
+@app.get("/webhooks/review", dependencies=beveiligd)
+def webhook_review():
+    return {"review": webhooks.review_lijst()}
+
+
+@app.post("/webhooks/review/{deal_id}", dependencies=beveiligd)
+def webhook_review_goedkeuren(deal_id: str, verzoek: ReviewGoedkeuring):
+    try:
+        return webhooks.keur_goed(deal_id, verzoek.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@app.delete("/webhooks/review/{deal_id}", dependencies=beveiligd)
+def webhook_review_afwijzen(deal_id: str):
+    webhooks.haal_van_review(deal_id)
+    return {"status": "verwijderd"}
+
+
+def _archief():
+    archief = get_offerte_archief()
+    if archief is None:
+        raise HTTPException(status_code=404, detail="Offerte-archief staat uit (OFFERTE_ARCHIEF).")
+    return archief
+
+
+@app.get("/archief/aggregaat", dependencies=beveiligd)
+def archief_aggregaat(groep: list[str] = Query(["model"]), van: Optional[str] = None, tot: Optional[str] = None,
+                      mode: Optional[str] = None, model: Optional[str] = None):
+    try:
+        return {"rijen": _archief().aggregeer(tenants.huidige_tenant().naam, groep, van, tot, mode, model)}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/archief/offertes", dependencies=beveiligd)
+def archief_offertes(deal_id: Optional[str] = None, van: Optional[str] = None, tot: Optional[str] = None,
+                     limiet: int = 100):
+    return {"offertes": _archief().offertes(tenants.huidige_tenant().naam, deal_id, van, tot, limiet)}
+
+
+@app.get("/archief/offertes/{offerte_id}/kasten", dependencies=beveiligd)
+def archief_kasten(offerte_id: int):
+    return {"kasten": _archief().kasten(tenants.huidige_tenant().naam, offerte_id)}
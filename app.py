@@ -1,24 +1,32 @@
 import streamlit as st
 import os
-import tempfile
+import hashlib
+import uuid
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 from urllib.parse import urlencode
 import inmeetverwerker_hellofront as hf  # zorg dat je file zo heet: inmeetverwerker.py
+from deal_index import deal_index_voor
+from product_catalogus import catalogus_voor
+from inmeet_service import LokaleService, kies_service
+import opwarmen
+import profilering
+import tenants
+from sessie_geheugen import get_sessie_geheugen
 
 # ======================================================
 # 1. BASISCONFIG
 # ======================================================
 
-CLIENT_ID = os.environ.get("CLIENT_ID", "")
-CLIENT_SECRET = os.environ.get("CLIENT_SECRET", "")
-REFRESH_TOKEN = os.environ.get("REFRESH_TOKEN", "")
-
 # Zet dit ook in Railway Variables (aanrader)
 REDIRECT_URI = os.environ.get(
     "REDIRECT_URI",
     "https://hokenstudio-inmeettool-production.up.railway.app/"
 )
 
+# Beheer (profielen e.d.) alleen via ?admin=<ADMIN_TOKEN>
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
 AUTH_BASE = "https://app.teamleader.eu/oauth2/authorize"
 TOKEN_URL = "https://focus.teamleader.eu/oauth2/access_token"
 
@@ -36,11 +44,18 @@ if auth_code:
     st.subheader("Teamleader koppeling")
     st.info("Authorisatiecode ontvangen, tokens worden opgehaald…")
 
+    # state = tenant waarvoor de login-knop gebruikt is
+    try:
+        oauth_tenant = tenants.get_tenant(params.get("state") or tenants.STANDAARD_TENANT)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
     data = {
         "grant_type": "authorization_code",
         "code": auth_code,
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
+        "client_id": oauth_tenant.client_id,
+        "client_secret": oauth_tenant.client_secret,
         "redirect_uri": REDIRECT_URI,
     }
 
@@ -61,7 +76,7 @@ if auth_code:
     st.success("✅ Nieuwe refresh token ontvangen!")
     st.code(new_refresh)
 
-    st.info("➡ Zet deze refresh token in Railway → Variables → REFRESH_TOKEN en restart/redeploy daarna.")
+    st.info(f"➡ Zet deze refresh token in Railway → Variables → {oauth_tenant.env_prefix}REFRESH_TOKEN en restart/redeploy daarna.")
     st.stop()
 
 # ======================================================
@@ -69,9 +84,10 @@ if auth_code:
 # ======================================================
 def render_hidden_login_button():
     params_login = {
-        "client_id": CLIENT_ID,
+        "client_id": tenants.huidige_tenant().client_id,
         "redirect_uri": REDIRECT_URI,
         "response_type": "code",
+        "state": tenants.huidige_tenant().naam,
         "scope": "companies contacts deals products quotations projects invoices",
     }
     login_url = f"{AUTH_BASE}?{urlencode(params_login)}"
@@ -88,47 +104,301 @@ def render_hidden_login_button():
     )
 
 # ======================================================
-# 4. NORMAL APP FLOW
+# 3b. BEHEER (SIDEBAR)
+# ======================================================
+is_admin = bool(ADMIN_TOKEN) and params.get("admin") == ADMIN_TOKEN
+if is_admin:
+    # pagina's (pages/) krijgen de query parameters niet mee
+    st.session_state["is_admin"] = True
+profileer_upload = False
+
+# zware data per sessie staat in het gedeelde geheugenbudget (zie sessie_geheugen.py)
+geheugen = get_sessie_geheugen()
+sessie = st.session_state.setdefault("sessie_id", uuid.uuid4().hex)
+geheugen.raak_aan(sessie)
+
+# parse/prijs/verstuur/deals: via de Inmeet API (INMEET_API_URL) of lokaal.
+# Met de API is de app een dunne client: OAuth, syncs en opwarmen doet de API.
+service = kies_service()
+lokaal = isinstance(service, LokaleService)
+
+# één keer per proces: prijstabellen, token, tax rate en verbindingen klaarzetten
+if lokaal:
+    opwarmen.opwarmer.start()
+
+if is_admin:
+    with st.sidebar:
+        st.header("Beheer")
+        profileer_upload = st.toggle("Profileer uploads", help="cProfile + flame graph per upload, opgeslagen per bestands-hash.")
+
+        with st.expander("Geheugen"):
+            gebruik = geheugen.overzicht()
+
+            def mb(b):
+                return f"{b / 1024 / 1024:.1f} MB"
+
+            st.write(f"**Sessies:** {mb(gebruik['totaal_bytes'])} van {mb(gebruik['max_bytes'])}")
+            if gebruik["rss_bytes"]:
+                st.write(f"**Proces (RSS):** {mb(gebruik['rss_bytes'])}")
+            st.write(f"**Opgeruimd:** {gebruik['verwijderd']} items")
+            st.dataframe(
+                [
+                    {
+                        "Sessie": s["sessie"][:8] + (" (deze)" if s["sessie"] == sessie else ""),
+                        "Items": s["items"],
+                        "Totaal": mb(s["bytes"]),
+                        "Upload": mb(s["vast_bytes"]),
+                        "Idle (s)": s["idle_sec"],
+                    }
+                    for s in gebruik["sessies"]
+                ],
+                hide_index=True,
+            )
+
+        if lokaal:
+            with st.expander("Opwarmen"):
+                warm = opwarmen.opwarmer.status()
+                st.write("**Klaar**" + (f" in {warm['duur_sec']} s" if warm["duur_sec"] is not None else "")
+                         if warm["klaar"] else "**Bezig…**")
+                st.dataframe(
+                    [{"Stap": naam, **stap} for naam, stap in warm["stappen"].items()],
+                    hide_index=True,
+                )
+
+        with st.expander("Recente profielen"):
+            for meta in profilering.recente_profielen():
+                st.markdown(f"**{meta['naam']}** — {meta['duur_sec'] * 1000:.0f} ms · {meta['tijdstip']}")
+                st.caption(" · ".join(f"{k}: {v * 1000:.1f} ms" for k, v in meta["stappen_sec"].items()))
+                with open(os.path.join(meta["map"], "profiel.prof"), "rb") as f:
+                    st.download_button("profiel.prof", f.read(), file_name=f"{meta['hash'][:10]}.prof", key=meta["map"])
+
+# ======================================================
+# 4. ACHTERGROND-PREFETCH
+# Zodra er een bestand is: token, tax rate en uitlezen starten.
+# Zodra er een deal-ID is: deal controleren.
+# Bij de knop is dan alleen quotations.create nog nodig.
 # ======================================================
+@st.cache_resource
+def prefetch_pool():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+
+def start_prefetch(tenant_naam, sleutel, fn, *args):
+    """
+    Start fn(*args) één keer per sleutel en tenant (per sessie) in de achtergrond,
+    voor tenant_naam (niet de tenant van de thread die hem later uitleest).
+    De future staat in het geheugenbudget; is hij opgeruimd, dan start hij opnieuw.
+    """
+    def taak():
+        with tenants.gebruik_tenant(tenant_naam):
+            return fn(*args)
+
+    return geheugen.prefetch(sessie, (tenant_naam, sleutel), prefetch_pool(), tenants.in_context(taak))
+
+
+# ======================================================
+# 5. NORMAL APP FLOW
+# ======================================================
+# meerdere Teamleader-accounts (TENANTS): kies per sessie het account
+tenant = tenants.STANDAARD_TENANT
+if len(tenants.tenant_namen()) > 1:
+    tenant = st.selectbox("Teamleader-account", tenants.tenant_namen())
+tenants.zet_tenant(tenant)
+
 uploaded_file = st.file_uploader("Kies een Excel-bestand (.xlsx)", type=["xlsx"])
 
+if uploaded_file:
+    # hash één keer per upload, niet bij elke rerun opnieuw over alle bytes
+    if st.session_state.get("upload_id") != uploaded_file.file_id:
+        # vorige upload: zijn uitgelezen data mag weg (deal-lookups blijven)
+        geheugen.vergeet(sessie, houd=lambda k: isinstance(k, tuple) and k[1][0] == "deal")
+        geheugen.zet(sessie, "upload", None, grootte=uploaded_file.size, vast=True)
+        st.session_state["upload_id"] = uploaded_file.file_id
+        st.session_state["upload_hash"] = hashlib.sha1(uploaded_file.getbuffer()).hexdigest()
+    inhoud = uploaded_file.getvalue()
+    upload_hash = st.session_state["upload_hash"]
+    # bij de API-service doet die zelf token + tax rate
+    warm_futures = [
+        start_prefetch(tenant, ("token", upload_hash), hf.get_access_token),
+        start_prefetch(tenant, ("tax", upload_hash), hf.get_tax_rate_21_id),
+    ] if lokaal else []
+    parse_future = start_prefetch(tenant, ("parse", upload_hash), service.lees_werkboek, inhoud, uploaded_file.name)
+
+    if profileer_upload:
+        # in de prefetch-pool, naast het uitlezen; de rerun wacht er niet op
+        profiel_future = start_prefetch(
+            tenant, ("profiel", upload_hash), profilering.profileer_pipeline, inhoud, uploaded_file.name,
+        )
+        if not profiel_future.done():
+            st.caption("🔥 Profiel wordt gemaakt… (verschijnt bij de volgende actie)")
+        elif profiel_future.exception():
+            st.warning(f"⚠️ Profileren mislukt: {profiel_future.exception()}")
+        else:
+            meta = profiel_future.result()[0]
+            with st.expander(f"🔥 Profiel: {meta['duur_sec'] * 1000:.0f} ms", expanded=True):
+                st.dataframe(
+                    [{"Stap": k, "ms": round(v * 1000, 1)} for k, v in meta["stappen_sec"].items()],
+                    hide_index=True,
+                )
+                with open(os.path.join(meta["map"], "flamegraph.svg"), "r") as f:
+                    st.image(f.read(), use_container_width=True)
+                st.caption(f"Opgeslagen in {meta['map']}")
+
 offerte_type = st.radio("Soort offerte", ["Particulier", "Dealer"])
 mode = "P" if offerte_type == "Particulier" else "D"
 
-deal_id = st.text_input("Teamleader deal-ID")
+@st.cache_resource
+def gestarte_deal_index(tenant):
+    index = deal_index_voor(tenant)
+    index.start_achtergrond_sync()
+    return index
+
+
+@st.cache_resource
+def gestarte_catalogus(tenant):
+    catalogus = catalogus_voor(tenant)
+    catalogus.start_achtergrond_sync()
+    return catalogus
+
+
+# met de API houdt die de deal-index en de catalogus bij
+if lokaal:
+    gestarte_deal_index(tenant)
+    gestarte_catalogus(tenant)
+
+
+def deal_gegevens(deal_id):
+    return service.deal(deal_id)["deal"]
+
+
+zoekterm = st.text_input("Teamleader deal (zoek op titel, klant of deal-ID)").strip()
+deal_id = ""
+gevonden = {}
+if zoekterm:
+    try:
+        gevonden = {d["id"]: d for d in service.zoek_deals(zoekterm)["deals"]}
+    except Exception as e:
+        st.warning(f"⚠️ Deals zoeken mislukt: {e}")
+    if zoekterm in gevonden or not gevonden:
+        # (nog) niet in de index: behandel als vrij deal-ID
+        deal_id = zoekterm
+    else:
+        deal_id = st.selectbox(
+            "Gevonden deals",
+            list(gevonden),
+            format_func=lambda i: f"{gevonden[i]['titel']} — {gevonden[i]['klant'] or 'onbekende klant'}",
+        )
+
+deal_future = None
+if deal_id:
+    if deal_id in gevonden:
+        deal_future = Future()
+        deal_future.set_result(gevonden[deal_id])
+    else:
+        deal_future = start_prefetch(tenant, ("deal", deal_id), deal_gegevens, deal_id)
+        if deal_future.done() and not deal_future.exception() and deal_future.result() is None:
+            st.warning(f"⚠️ Deal '{deal_id}' niet gevonden in Teamleader.")
 
 st.markdown("---")
 
 if uploaded_file:
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-    temp_file.write(uploaded_file.read())
-    temp_file.close()
-
     try:
-        onderdelen, g2, h2, kleur, klantregels, scharnieren, lades, project = hf.lees_excel(temp_file.name)
+        uitgelezen = parse_future.result()
     except Exception as e:
         st.error(f"❌ Fout bij uitlezen van Excel: {e}")
         st.stop()
 
-    model = hf.bepaal_model(g2, h2)
-    if not model:
-        st.error(f"❌ Onbekend model (G2='{g2}', H2='{h2}').")
+    problemen = uitgelezen["problemen"]
+    fouten = [p for p in problemen if p["ernst"] == "fout"]
+    if problemen:
+        (st.error if fouten else st.warning)(
+            "❌ Het Excel-bestand klopt niet:" if fouten else "⚠️ Controleer het Excel-bestand:"
+        )
+        st.dataframe(problemen, hide_index=True, use_container_width=True)
+    if fouten:
         st.stop()
 
-    try:
-        data = hf.bereken_offerte(
-            onderdelen,
-            model,
-            project,
-            kleur,
-            klantregels,
-            scharnieren,
-            lades
+    # MEERDERE KEUKENS: per keuken prijzen, één of meerdere offertes
+    if uitgelezen.get("keukens"):
+        try:
+            eenheden = service.prijs_keukens(uitgelezen["keukens"])["keukens"]
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            st.stop()
+        except Exception as e:
+            st.error(f"❌ Fout tijdens berekening van de offertes: {e}")
+            st.stop()
+
+        parse_per_keuken = {k["keuken"]: k["parse"] for k in uitgelezen["keukens"]}
+        for e in eenheden:
+            e["parse"] = parse_per_keuken[e["keuken"]]
+
+        st.subheader(f"{len(eenheden)} keukens in dit werkboek")
+        st.dataframe(
+            [
+                {
+                    "Keuken": e["keuken"],
+                    "Model": e["model"],
+                    "Fronten": e["data"]["fronts"],
+                    "Maatwerk kasten (excl.)": f"€ {e['data']['maatwerk_totaal_verkoop']:.2f}",
+                    "Totaal excl. btw": f"€ {e['data']['totaal_excl']:.2f}",
+                }
+                for e in eenheden
+            ],
+            hide_index=True,
+            use_container_width=True,
         )
+        st.write(f"**Totaal excl. btw (alle keukens):** € {sum(e['data']['totaal_excl'] for e in eenheden):.2f}")
+
+        st.markdown("---")
+        st.subheader("Offerte(s) aanmaken in Teamleader")
+        per_deal = st.radio("Offertes", ["Eén offerte (sectie per keuken)", "Aparte offerte per deal"]) != "Eén offerte (sectie per keuken)"
+
+        deals_per_keuken = {}
+        if per_deal:
+            for e in eenheden:
+                deals_per_keuken[e["keuken"]] = st.text_input(f"Deal-ID voor {e['keuken']}", key=f"deal_{e['keuken']}").strip()
+
+        if not (any(deals_per_keuken.values()) if per_deal else deal_id):
+            st.info("Vul een deal-ID in om te verzenden naar Teamleader.")
+        elif st.button("Maak offerte(s) in Teamleader"):
+            try:
+                for future in warm_futures:
+                    future.result()
+                if per_deal:
+                    statussen = service.verstuur_keukens(eenheden, mode, deals=deals_per_keuken)["status"]
+                    st.success("✅ " + "; ".join(f"{k}: {s}" for k, s in statussen.items()))
+                else:
+                    if deal_future.result() is None:
+                        raise Exception(f"Deal '{deal_id}' bestaat niet in Teamleader.")
+                    status = service.verstuur_keukens(eenheden, mode, deal_id=deal_id)["status"]
+                    if status == "bijgewerkt":
+                        st.success("✅ Bestaande offerte met alle keukens bijgewerkt in Teamleader!")
+                    elif status == "ongewijzigd":
+                        st.success("✅ Offerte in Teamleader is al up-to-date.")
+                    else:
+                        st.success("✅ Offerte met alle keukens aangemaakt in Teamleader!")
+            except Exception as e:
+                st.error(f"❌ Fout bij aanmaken van de offerte(s):\n\n{e}")
+
+        render_hidden_login_button()
+        st.stop()
+
+    parse_state = uitgelezen["parse"]
+
+    try:
+        prijzen = service.prijs(parse_state, deal_id=deal_id or None, vergelijk=True)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
     except Exception as e:
         st.error(f"❌ Fout tijdens berekening van de offerte: {e}")
         st.stop()
 
+    model = prijzen["model"]
+    data = prijzen["data"]
+    verschil = prijzen["verschil"]
+
     # SAMENVATTING
     st.subheader("Samenvatting")
     st.write(f"**Project:** {data['project']}")
@@ -141,15 +411,100 @@ if uploaded_file:
     st.write(f"**Totaal excl. btw:** € {data['totaal_excl']:.2f}")
     st.write(f"**Totaal incl. btw:** € {data['totaal_incl']:.2f}")
 
+    if data.get("onderdelen_per_type"):
+        with st.expander("Onderdelen per type"):
+            st.dataframe(
+                [
+                    {
+                        "Categorie": r["categorie"],
+                        "Type": r["type"],
+                        "Regels": r["regels"],
+                        "Aantal": r["aantal"],
+                        "m²": round(r["m2"], 2),
+                    }
+                    for r in data["onderdelen_per_type"]
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+    # VERGELIJKING ANDERE MODELLEN
+    with st.expander("Vergelijk met alle modellen"):
+        vergelijking = prijzen["vergelijking"]
+        st.dataframe(
+            [
+                {
+                    "Model": r["model"] + (" (huidig)" if r["model"] == model else ""),
+                    "Materiaal": r["materiaal"],
+                    "Fronten (excl.)": f"€ {r['totaal_excl_frontdeel']:.2f}",
+                    "Maatwerk kasten (excl.)": f"€ {r['maatwerk_totaal_verkoop']:.2f}",
+                    "Totaal excl. btw": f"€ {r['totaal_excl']:.2f}",
+                    "Totaal incl. btw": f"€ {r['totaal_incl']:.2f}",
+                }
+                for r in vergelijking
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.caption("Maatwerk kasten met een frontmodel worden in de vergelijking in het gekozen model geprijsd.")
+
+    # VOORBEELD OFFERTEREGELS (particulier en dealer uit dezelfde berekening)
+    with st.expander("Voorbeeld offerteregels"):
+        varianten = hf.bouw_grouped_lines_p_en_d(data)
+        for kolom, (label, variant) in zip(st.columns(2), [("Particulier", "P"), ("Dealer", "D")]):
+            kolom.markdown(f"**{label}**")
+            kolom.dataframe(
+                [
+                    {
+                        "Sectie": groep["section"]["title"],
+                        "Omschrijving": regel["description"],
+                        "Aantal": regel["quantity"],
+                        "Stukprijs": f"€ {regel['unit_price']['amount']:.2f}",
+                    }
+                    for groep in varianten[variant]
+                    for regel in groep["line_items"]
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+
     st.markdown("---")
     st.subheader("Offerte aanmaken in Teamleader")
 
+    if prijzen["bestaande_offerte"]:
+        if verschil["gewijzigd"]:
+            wijzigingen = []
+            if verschil["onderdelen"]:
+                wijzigingen.append("onderdelen")
+            if verschil["kop"]:
+                wijzigingen.append("kopgegevens (" + ", ".join(verschil["kop"]) + ")")
+            for sleutel, label in [("kasten_gewijzigd", "gewijzigd"), ("kasten_nieuw", "nieuw"), ("kasten_verwijderd", "verwijderd")]:
+                if verschil[sleutel]:
+                    wijzigingen.append(f"{len(verschil[sleutel])} kast(en) {label}")
+            st.info("Deze deal heeft al een offerte; die wordt bijgewerkt. Gewijzigd: " + "; ".join(wijzigingen))
+        else:
+            st.info("Deze deal heeft al een offerte met dezelfde gegevens.")
+    forceer = prijzen["bestaande_offerte"] and st.checkbox(
+        "Offerte opnieuw versturen, ook als er niets gewijzigd is", value=False
+    )
+
     if not deal_id:
         st.info("Vul een deal-ID in om te verzenden naar Teamleader.")
     elif st.button("Maak offerte in Teamleader"):
         try:
-            hf.maak_teamleader_offerte(deal_id, data, mode)
-            st.success("✅ Offerte succesvol aangemaakt in Teamleader!")
+            # wacht op de prefetch; fouten daarvan komen hier naar boven
+            for future in warm_futures:
+                future.result()
+            if deal_future.result() is None:
+                raise Exception(f"Deal '{deal_id}' bestaat niet in Teamleader.")
+
+            status = service.verstuur(deal_id, data, mode, parse_state, forceer=forceer)["status"]
+            if status == "bijgewerkt":
+                st.success("✅ Bestaande offerte bijgewerkt in Teamleader!")
+            elif status == "ongewijzigd":
+                st.success("✅ Offerte in Teamleader is al up-to-date.")
+            else:
+                st.success("✅ Offerte succesvol aangemaakt in Teamleader!")
         except Exception as e:
             st.error(f"❌ Fout bij aanmaken van de offerte:\n\n{e}")
 
@@ -157,6 +512,6 @@ else:
     st.info("Upload een Excel-bestand om te beginnen.")
 
 # ======================================================
-# 5. VERBORGEN LOGIN-KNOP (ONDER)
+# 6. VERBORGEN LOGIN-KNOP (ONDER)
 # ======================================================
 render_hidden_login_button()
@@ -0,0 +1,95 @@
+import random
+import time
+
+import inmeetverwerker_hellofront as hf
+from prijsregels import plan_voor
+
+# ======================================================
+# ⏱️ BENCHMARK PRIJSREGELS
+# python cli.py bench-prijsregels [--kasten 20000] [--seed 1]
+# Willekeurige kasten (ook randgevallen: banden, staffelgrenzen, lege
+# maten, onbekende types en frontmodellen) door _bereken_maatwerk_kast
+# (referentie) en door het gecompileerde plan, per kast en in één batch.
+# Elke afwijking in totaal_inkoop of verkoop_excl wordt gemeld.
+# ======================================================
+
+HOOGTES = [None, 0, 350, 390, 390.5, 391, 450, 520, 521, 700, 780, 781, 900, 1000, 1001, 1500,
+           2079, 2079.5, 2080, 2400, 2770, 2771, 3000]
+BREEDTES = [None, 0, 150, 300, 300.5, 400, 450, 500, 600, 601, 800, 900, 1000, 1200, 1201, 2000]
+DIEPTES = [None, 0, 300, 350, 560, 600]
+INRICHTINGEN = ["", "2x plank", "1x lade", "3 lades, 2 planken", "plank, push lade", "bestek, spoel",
+                "apotheker", "carrousel, 2x plank", "klep", "ovenkast"]
+ZIJDEN = ["", "links", "rechts", "links en rechts", "ja", "nee", "Ja, links"]
+
+
+def willekeurige_kast(rnd, modellen, kolom_index=0):
+    tekst = rnd.choice(INRICHTINGEN)
+    return {
+        "kolom_index": kolom_index,
+        "type": rnd.choice(["A", "A", "B", "C", "C", "", "D", "a"]),
+        "hoogte": rnd.choice(HOOGTES + [rnd.uniform(200, 2900)]),
+        "breedte": rnd.choice(BREEDTES + [rnd.uniform(200, 1300)]),
+        "diepte": rnd.choice(DIEPTES),
+        "poothoogte": None,
+        "kleur_corpus": "",
+        "zichtbare_zijde": rnd.choice(ZIJDEN),
+        "inrichting_raw": tekst,
+        "inrichting": hf._parse_inrichting(tekst),
+        "scharnieren": rnd.choice([0, 0, 1, 2, 4, -1]),
+        "frontmodel": rnd.choice(modellen + ["", "ONBEKEND", "noah"]),
+        "aantal_fronten": rnd.choice([0, 1, 2]),
+        "dubbelzijdig": "",
+        "handgreep": "",
+        "afwerking": "",
+    }
+
+
+def _meet(fn, herhaal=3):
+    beste = None
+    for _ in range(herhaal):
+        start = time.perf_counter()
+        uitkomst = fn()
+        duur = time.perf_counter() - start
+        beste = duur if beste is None else min(beste, duur)
+    return uitkomst, beste
+
+
+def vergelijk_en_meet(aantal=20000, seed=1, prijstabel=None):
+    """
+    Geeft {"kasten", "afwijkingen" (max. 10 voorbeelden), "aantal_afwijkingen",
+    "ms": {variant: totaal}, "us_per_kast": {variant: per kast}} terug.
+    """
+    pt = prijstabel or hf.huidige_prijstabel()
+    plan = plan_voor(pt)
+    rnd = random.Random(seed)
+    kasten = [willekeurige_kast(rnd, list(pt["MODEL_INFO"]), i) for i in range(aantal)]
+
+    referentie, t_ref = _meet(lambda: [hf._bereken_maatwerk_kast(k, pt) for k in kasten])
+    per_kast, t_kast = _meet(lambda: [plan.kast(k) for k in kasten])
+    batch, t_batch = _meet(lambda: plan.kasten(kasten))
+    _, t_regels = _meet(lambda: [hf._maatwerk_kast_regel(k, *plan.kast(k)) for k in kasten])
+    _, t_uitleg = _meet(lambda: [plan.verklaar_kast(k) for k in kasten[:1000]], herhaal=1)
+
+    afwijkingen = []
+    for i, (ref, enkel, totaal, verkoop) in enumerate(zip(referentie, per_kast, *batch)):
+        verwacht = (ref["totaal_inkoop"], ref["verkoop_excl"])
+        if enkel != verwacht or (totaal, verkoop) != verwacht:
+            afwijkingen.append({"kast": kasten[i], "referentie": verwacht, "kast()": enkel,
+                                "kasten()": (totaal, verkoop)})
+
+    ms = {
+        "referentie": t_ref * 1000,
+        "plan.kast": t_kast * 1000,
+        "plan.kasten": t_batch * 1000,
+        "plan.kast + regel": t_regels * 1000,
+    }
+    return {
+        "kasten": aantal,
+        "aantal_afwijkingen": len(afwijkingen),
+        "afwijkingen": afwijkingen[:10],
+        "ms": {k: round(v, 1) for k, v in ms.items()},
+        "us_per_kast": {
+            **{k: round(v * 1000 / aantal, 2) for k, v in ms.items()},
+            "verklaar_kast": round(t_uitleg * 1_000_000 / min(aantal, 1000), 2),
+        },
+    }
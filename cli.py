@@ -0,0 +1,237 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+import inmeetverwerker_hellofront as hf
+import tenants
+
+# ======================================================
+# 🖥️ COMMANDLINE
+# python cli.py [--tenant naam] offerte <bestand.xlsx> [--mode P|D] [--profiel] [--payload deal_id] [--uitleg]
+# python cli.py prijstabel > prijzen.json
+# python cli.py herprijs <archiefmap> --kandidaat prijzen.json [--uit map] [--workers n]
+# python cli.py export <bestanden/mappen...> --uit map [--formaat csv|jsonl] [--maand JJJJ-MM]
+# python cli.py producten [--sync]
+# python cli.py sjablonen [bestanden...]
+# python cli.py bench-prijsregels [--kasten n] [--seed n]
+# python cli.py webhook-replay <events.jsonl> --url http://localhost:8000/webhooks/teamleader?geheim=...
+# ======================================================
+
+
+def cmd_offerte(args):
+    if args.profiel:
+        import profilering
+
+        with open(args.bestand, "rb") as f:
+            meta, data = profilering.profileer_pipeline(f.read(), os.path.basename(args.bestand), args.mode)
+        print(f"Profiel opgeslagen in {meta['map']} ({meta['duur_sec'] * 1000:.0f} ms)", file=sys.stderr)
+        for stap, sec in sorted(meta["stappen_sec"].items(), key=lambda x: -x[1]):
+            print(f"  {stap:<24} {sec * 1000:8.1f} ms", file=sys.stderr)
+        if data is None:
+            print("Werkboek bevat fouten; zie valideer_werkboek.", file=sys.stderr)
+            return 1
+    else:
+        problemen = hf.valideer_werkboek(args.bestand)
+        if any(p["ernst"] == "fout" for p in problemen):
+            print(json.dumps(problemen, indent=2, ensure_ascii=False))
+            return 1
+        onderdelen, g2, h2, kleur, klantregels, scharnieren, lades, project = hf.lees_excel(args.bestand)
+        model = hf.bepaal_model(g2, h2)
+        data = hf.bereken_offerte(onderdelen, model, project, kleur, klantregels, scharnieren, lades)
+
+    if args.payload:
+        # exact de body voor quotations.create, zonder te versturen
+        sys.stdout.buffer.write(hf.maak_teamleader_offerte(args.payload, data, args.mode, dry_run=True) + b"\n")
+        return 0
+
+    if args.uitleg:
+        onderdelen, _, _, _, _, scharnieren, lades, project = hf.lees_excel(args.bestand)
+        data = {**data, "uitleg": hf.verklaar_offerte(onderdelen, data["model"], project, scharnieren, lades)}
+
+    print(json.dumps(hf.json_waarde(data), indent=2, ensure_ascii=False))
+    return 0
+
+
+def cmd_prijstabel(args):
+    print(json.dumps(hf.huidige_prijstabel(), indent=2, ensure_ascii=False))
+    return 0
+
+
+def cmd_herprijs(args):
+    import herprijs_archief
+
+    with open(args.kandidaat, "r") as f:
+        kandidaat = json.load(f)
+
+    def voortgang(i, totaal):
+        if i % 100 == 0 or i == totaal:
+            print(f"\r{i}/{totaal} bestanden", end="", file=sys.stderr, flush=True)
+
+    try:
+        samenvatting = herprijs_archief.herprijs_archief(
+            args.archief, kandidaat, args.uit, args.workers, voortgang
+        )
+    except ValueError as e:
+        print(f"\n{e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+
+    t = samenvatting["totaal"]
+    print(
+        f"{t['projecten']} projecten in {samenvatting['duur_sec']} s, {t['gewijzigd']} gewijzigd; "
+        f"totaal excl {t['totaal_excl_oud']:.2f} → {t['totaal_excl_nieuw']:.2f} "
+        f"({t['verschil_excl']:+.2f}, {t['verschil_pct'] or 0:+.2f}%)",
+        file=sys.stderr,
+    )
+    for model, m in samenvatting["per_model"].items():
+        print(f"  {model:<8} {m['projecten']:>6} proj  {m['verschil_excl']:+12.2f}  ({m['verschil_pct'] or 0:+.2f}%)",
+              file=sys.stderr)
+    if samenvatting["overgeslagen"]:
+        print(f"{len(samenvatting['overgeslagen'])} bestanden overgeslagen (zie diff_per_project.csv)", file=sys.stderr)
+    print(samenvatting["uitvoer"])
+    return 0
+
+
+def cmd_export(args):
+    import productie_export
+
+    tellers = productie_export.exporteer(args.paden, args.uit, args.formaat, args.maand)
+    print(
+        f"{tellers['projecten']} projecten: {tellers['panelen']} zaaglijstregels, "
+        f"{tellers['beslag']} beslagregels → {args.uit}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def cmd_producten(args):
+    """Koppeling artikel → Teamleader-product (na een sync met --sync)."""
+    from product_catalogus import catalogus_voor
+
+    catalogus = catalogus_voor(args.tenant)
+    if args.sync:
+        catalogus.sync(forceer=True)
+    overzicht = catalogus.koppeling_overzicht()
+    print(json.dumps(overzicht, indent=2, ensure_ascii=False))
+    ontbrekend = [r["sleutel"] for r in overzicht if not r["product_id"]]
+    print(f"{len(catalogus)} producten; {len(overzicht) - len(ontbrekend)}/{len(overzicht)} artikelen gekoppeld",
+          file=sys.stderr)
+    if ontbrekend:
+        print("Niet gekoppeld: " + ", ".join(ontbrekend), file=sys.stderr)
+    return 0
+
+
+def cmd_webhook_replay(args):
+    """Stuurt opgenomen Teamleader-events (één JSON per regel) naar de webhook."""
+    import time
+
+    import requests
+
+    headers = {"Content-Type": "application/json"}
+    if args.tenant != tenants.STANDAARD_TENANT:
+        headers["X-Tenant"] = args.tenant
+
+    with open(args.events, "r") as f:
+        regels = [r for r in (regel.strip() for regel in f) if r]
+    for i, regel in enumerate(regels, 1):
+        # exact de opgenomen bytes, zodat de dedup op body-hash hetzelfde werkt
+        resp = requests.post(args.url, data=regel.encode("utf-8"), headers=headers, timeout=30)
+        print(f"{i}/{len(regels)} {resp.status_code} {resp.text}", file=sys.stderr)
+        if args.pauze:
+            time.sleep(args.pauze)
+    return 0
+
+
+def cmd_sjablonen(args):
+    """Toont de geladen werkboek-sjablonen, of welk sjabloon elk opgegeven werkboek gebruikt."""
+    from werkboek_sjablonen import get_sjablonen
+
+    if not args.bestanden:
+        for plan in get_sjablonen().alle:
+            herkenning = f"{plan.herkenning_cel} begint met '{plan.herkenning[1]}'" if plan.herkenning else "standaard"
+            print(f"{plan.naam:<20} v{plan.versie:<3} {herkenning:<40} {plan.bron}")
+        return 0
+
+    for bestand in args.bestanden:
+        for keuken, uitkomst in hf.lees_excel_keukens(bestand):
+            print(f"{bestand}\t{keuken}\t{uitkomst[7]['sjabloon']}")
+    return 0
+
+
+def cmd_bench_prijsregels(args):
+    """Gecompileerde prijsregels tegen _bereken_maatwerk_kast: gelijke bedragen en snelheid."""
+    import benchmark_prijsregels
+
+    uitkomst = benchmark_prijsregels.vergelijk_en_meet(args.kasten, args.seed)
+    for variant, ms in uitkomst["ms"].items():
+        print(f"{variant:<20} {ms:10.1f} ms  {uitkomst['us_per_kast'][variant]:8.2f} µs/kast")
+    print(f"{'verklaar_kast':<20} {'':>13}  {uitkomst['us_per_kast']['verklaar_kast']:8.2f} µs/kast")
+    if uitkomst["aantal_afwijkingen"]:
+        print(f"{uitkomst['aantal_afwijkingen']} van {uitkomst['kasten']} kasten wijken af, bv.:", file=sys.stderr)
+        print(json.dumps(uitkomst["afwijkingen"][:3], indent=2, ensure_ascii=False), file=sys.stderr)
+        return 1
+    print(f"{uitkomst['kasten']} kasten, geen afwijkingen")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Inmeet tool vanaf de commandline.")
+    parser.add_argument("--tenant", default=tenants.STANDAARD_TENANT, choices=tenants.tenant_namen(),
+                        help="Teamleader-account (prijstabel, tokens).")
+    sub = parser.add_subparsers(dest="commando", required=True)
+
+    p = sub.add_parser("offerte", help="Lees een inmeet-Excel en bereken de offerte (zonder Teamleader).")
+    p.add_argument("bestand")
+    p.add_argument("--mode", choices=["P", "D"], default="P")
+    p.add_argument("--profiel", action="store_true", help="Profileer de pipeline en sla flame graph op.")
+    p.add_argument("--payload", metavar="DEAL_ID", help="Toon de offerte-payload voor Teamleader (dry-run).")
+    p.add_argument("--uitleg", action="store_true", help="Toon per bedrag de prijsregel, tabel en staffel.")
+    p.set_defaults(func=cmd_offerte)
+
+    p = sub.add_parser("prijstabel", help="Toon de huidige prijstabel als JSON (basis voor een kandidaat).")
+    p.set_defaults(func=cmd_prijstabel)
+
+    p = sub.add_parser("herprijs", help="Herprijs een archief onder een kandidaat-prijstabel en rapporteer de verschillen.")
+    p.add_argument("archief", help="Map met inmeet-Excels (.xlsx) en/of bewaarde parses (.json).")
+    p.add_argument("--kandidaat", required=True, help="JSON met (een deel van) de nieuwe prijstabel.")
+    p.add_argument("--uit", help="Uitvoermap (standaard <archief>/herprijs-<tijdstip>).")
+    p.add_argument("--workers", type=int, help="Aantal processen (standaard alle cores).")
+    p.set_defaults(func=cmd_herprijs)
+
+    p = sub.add_parser("export", help="Zaaglijst en beslaglijst voor productie (streamend, CSV of JSONL).")
+    p.add_argument("paden", nargs="+", help="Inmeet-Excels (.xlsx), bewaarde parses (.json) of mappen.")
+    p.add_argument("--uit", required=True, help="Uitvoermap.")
+    p.add_argument("--formaat", choices=["csv", "jsonl"], default="csv")
+    p.add_argument("--maand", help="Alleen bestanden gewijzigd in deze maand (JJJJ-MM).")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("producten", help="Toon welke artikelen aan een Teamleader-product gekoppeld zijn.")
+    p.add_argument("--sync", action="store_true", help="Eerst de hele productcatalogus opnieuw ophalen.")
+    p.set_defaults(func=cmd_producten)
+
+    p = sub.add_parser("sjablonen", help="Toon de werkboek-sjablonen of het herkende sjabloon per werkboek.")
+    p.add_argument("bestanden", nargs="*", help="Inmeet-Excels (.xlsx); zonder: de lijst met sjablonen.")
+    p.set_defaults(func=cmd_sjablonen)
+
+    p = sub.add_parser("bench-prijsregels", help="Vergelijk de gecompileerde prijsregels met de referentieberekening.")
+    p.add_argument("--kasten", type=int, default=20000, help="Aantal willekeurige kasten.")
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_bench_prijsregels)
+
+    p = sub.add_parser("webhook-replay", help="Speel opgenomen Teamleader-webhook-events af tegen de API.")
+    p.add_argument("events", help="JSONL met één opgenomen event-body per regel.")
+    p.add_argument("--url", default="http://localhost:8000/webhooks/teamleader")
+    p.add_argument("--pauze", type=float, default=0.0, help="Seconden tussen twee events.")
+    p.set_defaults(func=cmd_webhook_replay)
+
+    args = parser.parse_args(argv)
+    # meldingen (overgeslagen bestanden e.d.) naar stderr; stdout blijft voor de uitvoer
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    with tenants.gebruik_tenant(args.tenant):
+        return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
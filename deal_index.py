@@ -0,0 +1,146 @@
+import bisect
+import difflib
+import os
+import re
+
+import inmeetverwerker_hellofront as hf
+from state_store import state_pad
+from tenant_cache import PerTenant, SyncCache
+from tenants import STANDAARD_TENANT
+
+# ======================================================
+# 🔎 LOKALE INDEX VAN OPEN TEAMLEADER DEALS
+# Incrementeel gesynct (updated_since + paging), met TTL (tenant_cache.py),
+# zodat zoeken/valideren van een deal geen API-call per toets kost.
+# ======================================================
+
+DEAL_INDEX_FILE = os.getenv("DEAL_INDEX_FILE") or state_pad("deal_index.json")
+DEAL_INDEX_TTL_SEC = int(os.getenv("DEAL_INDEX_TTL_SEC", "300"))
+
+
+def _tokens(tekst):
+    return [t for t in re.split(r"[^0-9a-zà-ÿ]+", str(tekst).lower()) if t]
+
+
+def _klant_naam(item, soort):
+    if soort == "company":
+        return item.get("name") or ""
+    return " ".join(p for p in [item.get("first_name"), item.get("last_name")] if p)
+
+
+class DealIndex(SyncCache):
+    """
+    Open deals (id, titel, klant) in geheugen + op disk.
+    Zoeken gaat op prefix (gesorteerde tokenlijst + bisect) met fuzzy fallback.
+    """
+
+    ENDPOINT = "deals.list"
+    VELD = "deals"
+    NAAM = "Deal-index"
+    MIN_INTERVAL_SEC = 30
+
+    def __init__(self, pad=DEAL_INDEX_FILE, ttl_sec=DEAL_INDEX_TTL_SEC, tenant=STANDAARD_TENANT):
+        self._tokens = []               # gesorteerd: (token, deal_id)
+        self._woorden = []              # unieke tokens, voor fuzzy zoeken
+        super().__init__(pad, ttl_sec, tenant)
+
+    def _herbouw(self):
+        tokens = []
+        for deal_id, deal in self._items.items():
+            for t in set(_tokens(deal["titel"]) + _tokens(deal["klant"]) + _tokens(deal_id)):
+                tokens.append((t, deal_id))
+        tokens.sort()
+        self._tokens = tokens
+        self._woorden = sorted({t for t, _ in tokens})
+
+    # ---------- sync ----------
+    # de eerste keer alle open deals; daarna wat gewijzigd is, gesloten/verloren deals vallen eruit
+
+    def _body(self, volledig):
+        body = super()._body(volledig)
+        if volledig:
+            body["filter"] = {"status": ["open"]}
+        body["sort"] = [{"field": "created_at", "order": "asc"}]
+        return body
+
+    def _voorbereid(self, gewijzigd):
+        return self._klantnamen(gewijzigd)
+
+    def _item(self, d, namen):
+        if d.get("status", "open") != "open":
+            return None
+        klant = ((d.get("lead") or {}).get("customer") or {})
+        return {
+            "id": d["id"],
+            "titel": d.get("title") or "",
+            "klant": namen.get(klant.get("id"), ""),
+            "klant_id": klant.get("id"),
+        }
+
+    def _klantnamen(self, deals):
+        """Klantnamen voor nieuwe klant-ids, per 100 ids één companies.list/contacts.list."""
+        bekend = {d["klant_id"]: d["klant"] for d in self._items.values() if d.get("klant_id")}
+        per_soort = {"company": set(), "contact": set()}
+        for d in deals:
+            klant = ((d.get("lead") or {}).get("customer") or {})
+            if klant.get("id") and klant["id"] not in bekend and klant.get("type") in per_soort:
+                per_soort[klant["type"]].add(klant["id"])
+
+        namen = dict(bekend)
+        for soort, endpoint in [("company", "companies.list"), ("contact", "contacts.list")]:
+            ids = sorted(per_soort[soort])
+            for i in range(0, len(ids), 100):
+                for item in hf.teamleader_lijst(endpoint, {"filter": {"ids": ids[i:i + 100]}}):
+                    namen[item.get("id")] = _klant_naam(item, soort)
+        return namen
+
+    # ---------- zoeken ----------
+
+    def get(self, deal_id):
+        return self._items.get(str(deal_id).strip())
+
+    def bevat(self, deal_id):
+        return str(deal_id).strip() in self._items
+
+    def _ids_met_prefix(self, woord):
+        tokens = self._tokens
+        i = bisect.bisect_left(tokens, (woord, ""))
+        ids = set()
+        while i < len(tokens) and tokens[i][0].startswith(woord):
+            ids.add(tokens[i][1])
+            i += 1
+        return ids
+
+    def zoek(self, query, limiet=10):
+        """
+        Deals waarvan een woord uit titel/klant (of het id) begint met elk
+        woord uit de query. Woorden zonder prefix-treffer worden fuzzy
+        gematcht (tikfouten). Een volledig deal-ID geeft alleen die deal.
+        """
+        if self.bevat(query):
+            return [self.get(query)]
+        woorden = _tokens(query)
+        if not woorden:
+            return []
+
+        treffers = None
+        for w in woorden:
+            ids = self._ids_met_prefix(w)
+            if not ids:
+                for bijna in difflib.get_close_matches(w, self._woorden, n=5, cutoff=0.75):
+                    ids |= self._ids_met_prefix(bijna)
+            treffers = ids if treffers is None else treffers & ids
+            if not treffers:
+                return []
+
+        resultaat = sorted(treffers, key=lambda d: self._items[d]["titel"].lower())
+        return [self._items[d] for d in resultaat[:limiet]]
+
+
+_PER_TENANT = PerTenant(DealIndex, DEAL_INDEX_FILE)
+deal_index = _PER_TENANT.voor(STANDAARD_TENANT)
+
+
+def deal_index_voor(tenant):
+    """Eén index per tenant (de standaard-tenant: deal_index)."""
+    return _PER_TENANT.voor(tenant)
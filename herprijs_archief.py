@@ -0,0 +1,282 @@
+import csv
+import hashlib
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import inmeetverwerker_hellofront as hf
+
+# ======================================================
+# 🔁 ARCHIEF HERPRIJZEN MET EEN KANDIDAAT-PRIJSLIJST
+# python cli.py herprijs <archiefmap> --kandidaat prijzen.json
+# Prijst elk werkboek (.xlsx) of elke bewaarde parse (.json) in de map
+# onder de huidige én de kandidaat-prijstabel, verdeeld over alle cores.
+# Uitvoer: diff_per_project.csv, diff_per_kast.csv en samenvatting.json.
+# ======================================================
+
+PARSE_CACHE_MAP = ".parse_cache"
+UITVOER_PREFIX = "herprijs-"
+
+# per worker-proces gezet door _init_worker
+_HUIDIG = None
+_KANDIDAAT = None
+_CACHE_MAP = None
+
+
+def verzamel_archief(archief):
+    """Alle .xlsx- en .json-bestanden onder archief (recursief, gesorteerd)."""
+    paden = []
+    for map_, submappen, bestanden in os.walk(archief):
+        # eigen cache en eerdere uitvoer niet als archief meenemen
+        submappen[:] = sorted(
+            d for d in submappen if d != PARSE_CACHE_MAP and not d.startswith(UITVOER_PREFIX)
+        )
+        for naam in sorted(bestanden):
+            if naam.startswith("~$"):
+                continue   # Excel lock-bestanden
+            if naam.lower().endswith((".xlsx", ".json")):
+                paden.append(os.path.join(map_, naam))
+    return paden
+
+
+def _init_worker(huidig, kandidaat, cache_map):
+    global _HUIDIG, _KANDIDAAT, _CACHE_MAP
+    _HUIDIG = huidig
+    _KANDIDAAT = kandidaat
+    _CACHE_MAP = cache_map
+
+
+def _lees_keukens(pad):
+    """
+    [(keuken, parse-state)] van één archiefbestand. .json is een bewaarde
+    parse (los, of zoals de parse-cache hem opslaat, met "keukens"); .xlsx
+    wordt uitgelezen met een cache op inhoud-hash + parserversie, zodat een
+    tweede run de Excel niet opnieuw opent. Bij één keuken is de naam "".
+    """
+    if pad.lower().endswith(".json"):
+        with open(pad, "r") as f:
+            inhoud = json.load(f)
+        if not isinstance(inhoud, dict):
+            return []
+        if inhoud.get("keukens"):
+            return [(k["keuken"], k["parse"]) for k in inhoud["keukens"]]
+        parse_state = inhoud.get("parse", inhoud)
+        return [("", parse_state)] if parse_state else []
+
+    # projectnaam komt uit de bestandsnaam, dus die hoort in de sleutel
+    with open(pad, "rb") as f:
+        h = hashlib.sha1(f.read())
+    h.update(os.path.basename(pad).encode())
+    h.update(hf.parse_vingerafdruk().encode())
+    bestand_hash = h.hexdigest()
+
+    cache_pad = os.path.join(_CACHE_MAP, bestand_hash + ".json") if _CACHE_MAP else None
+    if cache_pad and os.path.exists(cache_pad):
+        try:
+            with open(cache_pad, "r") as f:
+                return [tuple(k) for k in json.load(f)]
+        except (OSError, ValueError):
+            pass
+
+    uitkomsten = hf.lees_excel_keukens(pad)
+    meerdere = len(uitkomsten) > 1
+    keukens = [
+        (naam if meerdere else "", hf.maak_parse_state(*uitkomst))
+        for naam, uitkomst in uitkomsten
+    ]
+
+    if cache_pad:
+        tmp = f"{cache_pad}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(keukens, f)
+        os.replace(tmp, cache_pad)
+    return keukens
+
+
+def _prijs(parse_state, model, prijstabel):
+    return hf.bereken_offerte(
+        parse_state["onderdelen"],
+        model,
+        {
+            "name": parse_state["project"],
+            "maatwerk_kasten": parse_state["maatwerk_kasten"],
+            "inventaris": parse_state.get("inventaris", []),
+        },
+        parse_state["kleur"],
+        parse_state["klantregels"],
+        parse_state["scharnieren"],
+        parse_state["lades"],
+        prijstabel=prijstabel,
+    )
+
+
+def herprijs_project(pad):
+    """Prijst elke keuken van één archiefbestand onder beide tabellen (draait in een worker)."""
+    try:
+        keukens = _lees_keukens(pad)
+    except Exception as e:
+        return [_leeg_resultaat(pad, "", f"fout: {e}")]
+    if not keukens:
+        return [_leeg_resultaat(pad, "", "geen parse")]
+    return [_herprijs_keuken(pad, keuken, parse_state) for keuken, parse_state in keukens]
+
+
+def _leeg_resultaat(pad, keuken, status="ok"):
+    return {"bestand": pad, "keuken": keuken, "project": "", "model": "", "status": status, "kasten": []}
+
+
+def _herprijs_keuken(pad, keuken, parse_state):
+    resultaat = _leeg_resultaat(pad, keuken)
+    try:
+        resultaat["project"] = parse_state.get("project") or ""
+        model = hf.bepaal_model(parse_state["g2"], parse_state["h2"])
+        if model not in _HUIDIG["MODEL_INFO"] or model not in _KANDIDAAT["MODEL_INFO"]:
+            resultaat["status"] = f"onbekend model (G2='{parse_state['g2']}', H2='{parse_state['h2']}')"
+            return resultaat
+        resultaat["model"] = model
+
+        oud = _prijs(parse_state, model, _HUIDIG)
+        nieuw = _prijs(parse_state, model, _KANDIDAAT)
+    except Exception as e:
+        resultaat["status"] = f"fout: {e}"
+        return resultaat
+
+    resultaat["totaal_excl_oud"] = oud["totaal_excl"]
+    resultaat["totaal_excl_nieuw"] = nieuw["totaal_excl"]
+    resultaat["maatwerk_oud"] = oud["maatwerk_totaal_verkoop"]
+    resultaat["maatwerk_nieuw"] = nieuw["maatwerk_totaal_verkoop"]
+
+    # kasten met verkoop 0 staan niet in de regels; match op kolom_index
+    kasten_oud = {k["kolom_index"]: k for k in oud["maatwerk_kasten"]}
+    kasten_nieuw = {k["kolom_index"]: k for k in nieuw["maatwerk_kasten"]}
+    for kolom in sorted(set(kasten_oud) | set(kasten_nieuw), key=lambda k: (k is None, k)):
+        k_oud = kasten_oud.get(kolom, {})
+        k_nieuw = kasten_nieuw.get(kolom, {})
+        resultaat["kasten"].append({
+            "kolom_index": kolom,
+            "titel": k_nieuw.get("titel") or k_oud.get("titel", ""),
+            "verkoop_oud": k_oud.get("verkoop_excl", 0.0),
+            "verkoop_nieuw": k_nieuw.get("verkoop_excl", 0.0),
+        })
+    return resultaat
+
+
+def _pct(oud, nieuw):
+    return round(100.0 * (nieuw - oud) / oud, 2) if oud else None
+
+
+def _leeg_totaal():
+    return {"projecten": 0, "kasten": 0, "totaal_excl_oud": 0.0, "totaal_excl_nieuw": 0.0,
+            "kasten_oud": 0.0, "kasten_nieuw": 0.0, "gewijzigd": 0}
+
+
+def _schrijf(r, bestand, w_project, w_kast, totaal, per_model, overgeslagen, grootste):
+    """Eén keuken-resultaat naar de CSV's, de totalen en de top 10."""
+    if r["status"] != "ok":
+        overgeslagen.append({"bestand": bestand, "keuken": r["keuken"], "status": r["status"]})
+        w_project.writerow([bestand, r["keuken"], r["project"], r["model"], "", "", "", "", "", "", r["status"]])
+        return
+
+    oud, nieuw = r["totaal_excl_oud"], r["totaal_excl_nieuw"]
+    verschil = round(nieuw - oud, 2)
+    w_project.writerow([
+        bestand, r["keuken"], r["project"], r["model"], round(oud, 2), round(nieuw, 2),
+        verschil, _pct(oud, nieuw), r["maatwerk_oud"], r["maatwerk_nieuw"], "ok",
+    ])
+    for k in r["kasten"]:
+        w_kast.writerow([
+            bestand, r["keuken"], r["project"], r["model"], k["kolom_index"], k["titel"],
+            k["verkoop_oud"], k["verkoop_nieuw"],
+            round(k["verkoop_nieuw"] - k["verkoop_oud"], 2), _pct(k["verkoop_oud"], k["verkoop_nieuw"]),
+        ])
+
+    for t in (totaal, per_model.setdefault(r["model"], _leeg_totaal())):
+        t["projecten"] += 1
+        t["kasten"] += len(r["kasten"])
+        t["totaal_excl_oud"] += oud
+        t["totaal_excl_nieuw"] += nieuw
+        t["kasten_oud"] += sum(k["verkoop_oud"] for k in r["kasten"])
+        t["kasten_nieuw"] += sum(k["verkoop_nieuw"] for k in r["kasten"])
+        t["gewijzigd"] += abs(verschil) >= 0.01
+
+    # top 10 grootste absolute verschillen, zonder alles te bewaren
+    item = (abs(verschil), bestand, r["keuken"], r["project"], verschil)
+    if len(grootste) < 10:
+        heapq.heappush(grootste, item)
+    else:
+        heapq.heappushpop(grootste, item)
+
+
+def herprijs_archief(archief, kandidaat, uit_map=None, workers=None, voortgang=None):
+    """
+    Herprijst het hele archief. kandidaat is een (deel)prijstabel; ontbrekende
+    tabellen komen uit de huidige (zie hf.prijstabel_met_wijzigingen).
+    Geeft de samenvatting terug en schrijft de CSV's naar uit_map.
+    """
+    start = time.perf_counter()
+    uit_map = uit_map or os.path.join(archief, UITVOER_PREFIX + time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(uit_map, exist_ok=True)
+    cache_map = os.path.join(archief, PARSE_CACHE_MAP)
+    os.makedirs(cache_map, exist_ok=True)
+
+    huidig = hf.huidige_prijstabel()
+    kandidaat = hf.prijstabel_met_wijzigingen(kandidaat, huidig)
+    paden = verzamel_archief(archief)
+    workers = workers or os.cpu_count() or 1
+
+    totaal = _leeg_totaal()
+    per_model = {}
+    overgeslagen = []
+    grootste = []
+
+    with open(os.path.join(uit_map, "diff_per_project.csv"), "w", newline="") as f_project, \
+            open(os.path.join(uit_map, "diff_per_kast.csv"), "w", newline="") as f_kast, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(huidig, kandidaat, cache_map)) as pool:
+        w_project = csv.writer(f_project)
+        w_project.writerow([
+            "bestand", "keuken", "project", "model", "totaal_excl_oud", "totaal_excl_nieuw",
+            "verschil", "verschil_pct", "maatwerk_oud", "maatwerk_nieuw", "status",
+        ])
+        w_kast = csv.writer(f_kast)
+        w_kast.writerow([
+            "bestand", "keuken", "project", "model", "kolom_index", "titel",
+            "verkoop_oud", "verkoop_nieuw", "verschil", "verschil_pct",
+        ])
+
+        chunk = max(1, len(paden) // (workers * 8))
+        for i, resultaten in enumerate(pool.map(herprijs_project, paden, chunksize=chunk), 1):
+            if voortgang:
+                voortgang(i, len(paden))
+            for r in resultaten:
+                _schrijf(r, os.path.relpath(r["bestand"], archief), w_project, w_kast,
+                         totaal, per_model, overgeslagen, grootste)
+
+    def afgerond(t):
+        t = {k: round(v, 2) if isinstance(v, float) else v for k, v in t.items()}
+        t["verschil_excl"] = round(t["totaal_excl_nieuw"] - t["totaal_excl_oud"], 2)
+        t["verschil_pct"] = _pct(t["totaal_excl_oud"], t["totaal_excl_nieuw"])
+        t["verschil_kasten"] = round(t["kasten_nieuw"] - t["kasten_oud"], 2)
+        return t
+
+    samenvatting = {
+        "archief": archief,
+        "bestanden": len(paden),
+        "workers": workers,
+        "duur_sec": round(time.perf_counter() - start, 2),
+        "prijzen_huidig": hf.prijzen_vingerafdruk(huidig),
+        "prijzen_kandidaat": hf.prijzen_vingerafdruk(kandidaat),
+        "totaal": afgerond(totaal),
+        "per_model": {m: afgerond(t) for m, t in sorted(per_model.items())},
+        "grootste_verschillen": [
+            {"bestand": b, "keuken": k, "project": p, "verschil": v}
+            for _, b, k, p, v in sorted(grootste, reverse=True)[:10]
+        ],
+        "overgeslagen": overgeslagen,
+        "uitvoer": uit_map,
+    }
+    with open(os.path.join(uit_map, "samenvatting.json"), "w") as f:
+        json.dump(samenvatting, f, indent=2, ensure_ascii=False)
+    return samenvatting
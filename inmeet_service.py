@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import tempfile
+from urllib.parse import quote
+
+import requests
+
+import inmeetverwerker_hellofront as hf
+from deal_index import deal_index_voor
+from state_store import get_state_store
+from tenants import huidige_tenant
+
+# ======================================================
+# 🧩 QUOTE-PIPELINE ALS SERVICE
+# lees_werkboek → prijs → verstuur, met JSON-vriendelijke in- en uitvoer.
+# api.py biedt dit aan over HTTP; app.py gebruikt via kies_service()
+# de HTTP-service (INMEET_API_URL) of, zonder URL, deze functies lokaal.
+# ======================================================
+
+INMEET_API_URL = os.getenv("INMEET_API_URL", "").rstrip("/")
+# gedeeld token voor de schrijf- en archiefroutes van api.py (standaard ADMIN_TOKEN)
+API_TOKEN = os.getenv("API_TOKEN") or os.getenv("ADMIN_TOKEN", "")
+PARSE_CACHE_TTL_SEC = 7 * 24 * 3600
+PARSE_CACHE_PREFIX = f"parse:v{hf.PARSE_VERSIE}:"
+PRIJS_CACHE_TTL_SEC = 24 * 3600
+PRIJS_CACHE_PREFIX = "prijs:"
+
+
+def _parse_sleutel(inhoud: bytes, bestandsnaam: str):
+    h = hashlib.sha1(inhoud)
+    h.update(os.path.basename(bestandsnaam).encode())
+    h.update(hf.parse_vingerafdruk().encode())   # ander sjabloon → andere parse
+    return PARSE_CACHE_PREFIX + h.hexdigest()
+
+
+def uit_parse_cache(inhoud: bytes, bestandsnaam: str):
+    return get_state_store().get_json(_parse_sleutel(inhoud, bestandsnaam))
+
+
+def naar_parse_cache(inhoud: bytes, bestandsnaam: str, resultaat):
+    get_state_store().set_json(_parse_sleutel(inhoud, bestandsnaam), resultaat, PARSE_CACHE_TTL_SEC)
+
+
+def lees_werkboek_zonder_cache(inhoud: bytes, bestandsnaam: str):
+    """
+    Valideert en leest een werkboek uit (CPU-werk, geschikt voor een process pool).
+    Geeft {"problemen": [...], "parse": parse-state of None bij fouten} terug;
+    bij meerdere keukens ook "keukens": [{"keuken", "parse"}] ("parse" = de eerste).
+    """
+    with tempfile.TemporaryDirectory() as map_:
+        pad = os.path.join(map_, os.path.basename(bestandsnaam) or "werkboek.xlsx")
+        with open(pad, "wb") as f:
+            f.write(inhoud)
+
+        problemen = hf.valideer_werkboek(pad)
+        if any(p["ernst"] == "fout" for p in problemen):
+            return {"problemen": problemen, "parse": None}
+
+        try:
+            keukens = [
+                {"keuken": naam, "parse": hf.maak_parse_state(*uitkomst)}
+                for naam, uitkomst in hf.lees_excel_keukens(pad)
+            ]
+        except hf.WerkboekFout as e:
+            # alleen-lezen validatie ziet niet alles (bv. extra keuken-tabbladen)
+            return {"problemen": problemen + e.problemen, "parse": None}
+        resultaat = {"problemen": problemen, "parse": keukens[0]["parse"]}
+        if len(keukens) > 1:
+            resultaat["keukens"] = keukens
+        return resultaat
+
+
+def lees_werkboek(inhoud: bytes, bestandsnaam: str):
+    """lees_werkboek_zonder_cache, met de parse-cache uit de state store ervoor."""
+    resultaat = uit_parse_cache(inhoud, bestandsnaam)
+    if resultaat is None:
+        resultaat = lees_werkboek_zonder_cache(inhoud, bestandsnaam)
+        naar_parse_cache(inhoud, bestandsnaam, resultaat)
+    return resultaat
+
+
+def prijs(parse_state, model=None, deal_id=None, vergelijk=False, uitleg=False):
+    """
+    Prijst een parse-state. Zonder model wordt het uit G2/H2 bepaald; met
+    deal_id wordt incrementeel t.o.v. de vorige offerte van die deal geprijsd.
+    Met uitleg: per bedrag de regel, tabel en staffel (hf.verklaar_offerte).
+    """
+    model = model or hf.bepaal_model(parse_state["g2"], parse_state["h2"])
+    if model not in hf.huidige_prijstabel()["MODEL_INFO"]:
+        raise ValueError(f"Onbekend model (G2='{parse_state['g2']}', H2='{parse_state['h2']}').")
+
+    store = get_state_store()
+    vorige = hf.laad_offerte_state(deal_id) if deal_id else None
+
+    # prijs-cache: zelfde parse + model + prijstabellen → zelfde bedragen
+    h = hashlib.sha1(json.dumps(parse_state, sort_keys=True).encode())
+    h.update(f"|{model}|{hf.prijzen_vingerafdruk()}".encode())
+    cache_sleutel = PRIJS_CACHE_PREFIX + h.hexdigest()
+    gecachet = store.get_json(cache_sleutel) or {}
+
+    data = gecachet.get("data")
+    if data is None:
+        data, _ = hf.bereken_offerte_incrementeel(parse_state, model, vorige)
+    verschil = hf.vergelijk_parse((vorige or {}).get("parse"), parse_state)
+
+    vergelijking = gecachet.get("vergelijking")
+    if vergelijk and vergelijking is None:
+        vergelijking = hf.vergelijk_modellen(
+            parse_state["onderdelen"],
+            {"maatwerk_kasten": parse_state["maatwerk_kasten"], "inventaris": parse_state.get("inventaris", [])},
+            parse_state["scharnieren"],
+            parse_state["lades"],
+        )
+
+    if "data" not in gecachet or (vergelijking is not None and "vergelijking" not in gecachet):
+        nieuw = {"data": data}
+        if vergelijking is not None:
+            nieuw["vergelijking"] = vergelijking
+        store.set_json(cache_sleutel, nieuw, PRIJS_CACHE_TTL_SEC)
+
+    resultaat = {
+        "model": model,
+        "data": data,
+        "verschil": verschil,
+        "bestaande_offerte": bool(vorige and vorige.get("quotation_id")),
+    }
+    if vergelijk:
+        resultaat["vergelijking"] = vergelijking
+    if uitleg:
+        resultaat["uitleg"] = hf.json_waarde(hf.verklaar_offerte(
+            parse_state["onderdelen"],
+            model,
+            {"maatwerk_kasten": parse_state["maatwerk_kasten"], "inventaris": parse_state.get("inventaris", [])},
+            parse_state["scharnieren"],
+            parse_state["lades"],
+        ))
+    return resultaat
+
+
+def verstuur(deal_id, data, mode, parse_state, dry_run=False, forceer=False):
+    """
+    Met dry_run: {"payload": bytes of None}, zonder iets naar Teamleader te sturen.
+    Met forceer ook versturen als er niets gewijzigd is.
+    """
+    if mode not in ("P", "D"):
+        raise ValueError(f"Onbekende mode '{mode}' (P of D).")
+    if dry_run:
+        return {"payload": hf.verstuur_offerte(deal_id, data, mode, parse_state, dry_run=True, forceer=forceer)}
+    return {"status": hf.verstuur_offerte(deal_id, data, mode, parse_state, forceer=forceer)}
+
+
+def prijs_keukens(keukens, model=None):
+    """Prijst alle keukens uit lees_werkboek()["keukens"]; geeft {"keukens": [{"keuken", "model", "data"}]}."""
+    return {"keukens": hf.bereken_offertes_keukens(keukens, model)}
+
+
+def verstuur_keukens(eenheden, mode, deal_id=None, deals=None):
+    """
+    eenheden = [{"keuken", "data", "parse"}]. Met deal_id één offerte met een
+    sectie per keuken; met deals ({keuken: deal_id}) een offerte per deal.
+    """
+    if mode not in ("P", "D"):
+        raise ValueError(f"Onbekende mode '{mode}' (P of D).")
+    if deals:
+        return {"status": hf.verstuur_offertes_per_deal(eenheden, deals, mode)}
+    if not deal_id:
+        raise ValueError("Geef een deal_id (één offerte) of deals per keuken.")
+    return {"status": hf.maak_teamleader_offerte_keukens(deal_id, eenheden, mode)}
+
+
+def zoek_deals(query, limiet=10):
+    """Open deals van de tenant waarvan titel, klant of id op query lijkt: {"deals": [...]}."""
+    return {"deals": deal_index_voor(huidige_tenant().naam).zoek(query, limiet)}
+
+
+def deal(deal_id):
+    """{"deal": gegevens}: uit de deal-index, anders via deals.info; None als hij niet bestaat."""
+    index = deal_index_voor(huidige_tenant().naam)
+    if index.bevat(deal_id):
+        return {"deal": index.get(deal_id)}
+    return {"deal": hf.controleer_deal(deal_id)}
+
+
+# ======================================================
+# 🌐 CLIENT
+# ======================================================
+
+class LokaleService:
+    """Zelfde interface als HttpService, maar in dit proces."""
+
+    lees_werkboek = staticmethod(lees_werkboek)
+    prijs = staticmethod(prijs)
+    verstuur = staticmethod(verstuur)
+    prijs_keukens = staticmethod(prijs_keukens)
+    verstuur_keukens = staticmethod(verstuur_keukens)
+    zoek_deals = staticmethod(zoek_deals)
+    deal = staticmethod(deal)
+
+
+class HttpService:
+    """Client voor api.py."""
+
+    def __init__(self, url=INMEET_API_URL, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _request(self, methode, pad, **kwargs):
+        headers = {"X-Tenant": huidige_tenant().naam}
+        if API_TOKEN:
+            headers["Authorization"] = f"Bearer {API_TOKEN}"
+        resp = self.session.request(methode, f"{self.url}{pad}", timeout=self.timeout, headers=headers, **kwargs)
+        if resp.status_code == 422:
+            raise ValueError(resp.json().get("detail", resp.text))
+        if resp.status_code not in (200, 204):
+            raise Exception(f"Inmeet API {pad} mislukt: {resp.text}")
+        return resp
+
+    def _post(self, pad, **kwargs):
+        return self._request("POST", pad, **kwargs).json()
+
+    def lees_werkboek(self, inhoud: bytes, bestandsnaam: str):
+        return self._post("/parse", files={"bestand": (bestandsnaam, inhoud)})
+
+    def prijs(self, parse_state, model=None, deal_id=None, vergelijk=False, uitleg=False):
+        return self._post("/price", json={
+            "parse": parse_state, "model": model, "deal_id": deal_id, "vergelijk": vergelijk, "uitleg": uitleg,
+        })
+
+    def verstuur(self, deal_id, data, mode, parse_state, dry_run=False, forceer=False):
+        # de API rekent de bedragen zelf opnieuw uit de parse; alleen het model gaat mee
+        body = {
+            "deal_id": deal_id, "model": data["model"], "mode": mode, "parse": parse_state,
+            "dry_run": dry_run, "forceer": forceer,
+        }
+        if dry_run:
+            # 200: de ruwe body voor Teamleader; 204: niets te versturen
+            resp = self._request("POST", "/quotations", json=body)
+            return {"payload": None if resp.status_code == 204 else resp.content}
+        return self._post("/quotations", json=body)
+
+    def prijs_keukens(self, keukens, model=None):
+        return self._post("/price/units", json={"keukens": keukens, "model": model})
+
+    def verstuur_keukens(self, eenheden, mode, deal_id=None, deals=None):
+        return self._post("/quotations/units", json={
+            "eenheden": eenheden, "mode": mode, "deal_id": deal_id, "deals": deals,
+        })
+
+    def zoek_deals(self, query, limiet=10):
+        return self._request("GET", "/deals", params={"q": query, "limiet": limiet}).json()
+
+    def deal(self, deal_id):
+        return self._request("GET", f"/deals/{quote(str(deal_id).strip(), safe='')}").json()
+
+
+def kies_service():
+    return HttpService() if INMEET_API_URL else LokaleService()
@@ -1,24 +1,30 @@
+import numpy as np
 import pandas as pd
-import requests
 import os
 import json
+import logging
 import math
+import hashlib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from offerte_archief import get_offerte_archief
+from prijsregels import PRIJSREGELS, REGELS_VINGERAFDRUK, plan_voor
+from state_store import get_state_store
+from teamleader_scheduler import PRIORITEIT_BATCH, PRIORITEIT_INTERACTIEF
+from tenants import huidige_tenant, in_context
+from werkboek_sjablonen import get_sjablonen, kolom_letters
 
 # ======================================================
 # 🔧 TEAMLEADER CONFIG — VIA RAILWAY ENV
+# Credentials en tax rate per Teamleader-account: zie tenants.py.
 # ======================================================
 
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-
 API_BASE = "https://api.focus.teamleader.eu"
 TOKEN_URL = "https://focus.teamleader.eu/oauth2/access_token"
 
-# ✅ BTW (21%) — nieuw: dynamisch / via ENV
-# Zet in Railway bij voorkeur: TAX_RATE_21_ID=<uuid uit jouw nieuwe Teamleader omgeving>
-# Als je hem niet zet, probeert de code automatisch een 21%-taxrate op te zoeken.
-TAX_RATE_21_ID_ENV = os.getenv("TAX_RATE_21_ID") or os.getenv("TAX_RATE_ID")
-
 # Vaste kosten
 MONTAGE_PER_FRONT = 34.71
 INMETEN = 99.17
@@ -27,95 +33,200 @@ VRACHT = 60.00
 PRIJS_SCHARNIER = 6.5
 PRIJS_LADE = 184.0
 
+log = logging.getLogger(__name__)
+
 # ======================================================
 # 🔒 TOKEN MANAGEMENT — AUTOMATISCHE REFRESH + OPSLAAN
 # ======================================================
 
-TOKEN_FILE = "/app/refresh_token.txt"        # persistent binnen Railway container
-TAX_RATE_FILE = "/app/tax_rate_21_id.txt"    # cache voor gevonden tax rate id
+# Opslag via de state store (standaard: STATE_DIR/refresh_token.txt, STATE_DIR/tax_rate_21_id.txt).
+# Met een gedeelde store (sqlite/redis) delen alle workers één token:
+# de refresh_token wordt met compare-and-swap geroteerd, onder een korte lock.
+# Alles per tenant: sleutels via tenant.sleutel(), caches op het Tenant-object.
+TOKEN_KEY = "refresh_token"
+ACCESS_TOKEN_KEY = "access_token"
+TOKEN_LOCK_KEY = "refresh_token_lock"
+TOKEN_LOCK_TTL_SEC = 30
+TAX_RATE_KEY = "tax_rate_21_id"
+TAX_RATES_KEY = "tax_rates"
 
 
 def load_refresh_token():
-    """Laadt refresh_token vanaf disk, of fallback naar ENV (1e keer)."""
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, "r") as f:
-            return f.read().strip()
-    return os.getenv("REFRESH_TOKEN")
+    """Laadt refresh_token uit de state store, of fallback naar ENV (1e keer)."""
+    tenant = huidige_tenant()
+    return get_state_store().get(tenant.sleutel(TOKEN_KEY)) or tenant.refresh_token_env
 
 
 def save_refresh_token(token: str):
     """Slaat vernieuwde refresh_token op zodat altijd geldig blijft."""
-    with open(TOKEN_FILE, "w") as f:
-        f.write(token)
+    get_state_store().set(huidige_tenant().sleutel(TOKEN_KEY), token)
 
 
-# Laad token bij opstart
-REFRESH_TOKEN = load_refresh_token()
+# access_token in geheugen (tot vlak voor expires_in), zodat een token dat
+# vooraf is opgehaald (prefetch) bij het aanmaken van de offerte hergebruikt wordt
+TOKEN_MARGE_SEC = 60
 
 
-def get_access_token():
+def get_access_token(forceer=False):
     """
-    Haal een nieuwe access_token op. Sla vernieuwde refresh_token op.
+    Geeft een geldige access_token; vernieuwt alleen als de vorige (bijna)
+    verlopen is. Sla vernieuwde refresh_token op.
     Werkt onbeperkt zonder opnieuw inloggen.
     """
-    global REFRESH_TOKEN
+    tenant = huidige_tenant()
 
-    if not REFRESH_TOKEN:
-        raise Exception("Geen refresh_token gevonden — log eerst in via de app.")
+    with tenant.token_lock:
+        if not forceer and tenant.access_token and time.time() < tenant.access_token_geldig_tot:
+            return tenant.access_token
 
-    if not CLIENT_ID or not CLIENT_SECRET:
-        raise Exception("CLIENT_ID / CLIENT_SECRET ontbreken in ENV (Railway).")
+        # een andere worker heeft misschien al vernieuwd
+        gedeeld = _gedeelde_access_token(tenant)
+        if gedeeld and gedeeld["token"] != (tenant.access_token if forceer else None):
+            tenant.access_token, tenant.access_token_geldig_tot = gedeeld["token"], gedeeld["geldig_tot"]
+            return tenant.access_token
 
-    data = {
-        "grant_type": "refresh_token",
-        "refresh_token": REFRESH_TOKEN,
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-    }
+        return _vernieuw_access_token(tenant)
 
-    resp = requests.post(TOKEN_URL, data=data)
 
-    if resp.status_code != 200:
-        raise Exception(f"Kon access_token niet vernieuwen: {resp.text}")
+def _gedeelde_access_token(tenant):
+    gedeeld = get_state_store().get_json(tenant.sleutel(ACCESS_TOKEN_KEY))
+    if gedeeld and time.time() < gedeeld.get("geldig_tot", 0):
+        return gedeeld
+    return None
 
-    tokens = resp.json()
 
-    # Teamleader geeft (in de praktijk) vaak een nieuwe refresh_token terug
-    # maar niet elke flow/tenant is 100% gelijk → veilig checken.
-    if "refresh_token" in tokens and tokens["refresh_token"]:
-        REFRESH_TOKEN = tokens["refresh_token"]
-        save_refresh_token(REFRESH_TOKEN)
+def _vernieuw_access_token(tenant):
+    """Vernieuwt onder de store-lock; maar één worker tegelijk roteert de refresh_token."""
+    store = get_state_store()
+    verouderd = tenant.access_token
+    lock_sleutel = tenant.sleutel(TOKEN_LOCK_KEY)
+    token_sleutel = tenant.sleutel(TOKEN_KEY)
+    lock_id = f"{os.getpid()}-{threading.get_ident()}-{time.time()}"
 
-    return tokens["access_token"]
+    deadline = time.time() + TOKEN_LOCK_TTL_SEC
+    while not store.compare_and_set(lock_sleutel, None, lock_id, TOKEN_LOCK_TTL_SEC):
+        if time.time() > deadline:
+            raise Exception("Kon access_token niet vernieuwen: token-lock bezet.")
+        time.sleep(0.1)
 
+    try:
+        # wie vóór ons de lock had, heeft misschien al een nieuwe token neergezet
+        gedeeld = _gedeelde_access_token(tenant)
+        if gedeeld and gedeeld["token"] != verouderd:
+            tenant.access_token, tenant.access_token_geldig_tot = gedeeld["token"], gedeeld["geldig_tot"]
+            return tenant.access_token
+
+        opgeslagen = store.get(token_sleutel)
+        refresh_token = opgeslagen or tenant.refresh_token_env
+
+        if not refresh_token:
+            raise Exception(f"Geen refresh_token gevonden voor tenant '{tenant.naam}' — log eerst in via de app.")
+
+        if not tenant.client_id or not tenant.client_secret:
+            raise Exception(f"CLIENT_ID / CLIENT_SECRET ontbreken in ENV (Railway) voor tenant '{tenant.naam}'.")
+
+        data = {
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": tenant.client_id,
+            "client_secret": tenant.client_secret,
+        }
+
+        resp = tenant.session.post(TOKEN_URL, data=data)
+
+        if resp.status_code != 200:
+            raise Exception(f"Kon access_token niet vernieuwen: {resp.text}")
 
-def request_with_auto_refresh(method: str, url: str, json_data=None, files=None):
-    """API wrapper die automatisch token vernieuwt."""
+        tokens = resp.json()
+
+        # Teamleader geeft (in de praktijk) vaak een nieuwe refresh_token terug
+        # maar niet elke flow/tenant is 100% gelijk → veilig checken.
+        if "refresh_token" in tokens and tokens["refresh_token"]:
+            # compare-and-swap: als iemand anders intussen al geroteerd heeft,
+            # blijft diens (ook geldige) refresh_token staan
+            if not store.compare_and_set(token_sleutel, opgeslagen, tokens["refresh_token"]):
+                log.warning("Refresh_token tegelijk door een andere worker geroteerd; die blijft staan.")
+
+        tenant.access_token = tokens["access_token"]
+        tenant.access_token_geldig_tot = time.time() + float(tokens.get("expires_in") or 3600) - TOKEN_MARGE_SEC
+        store.set_json(
+            tenant.sleutel(ACCESS_TOKEN_KEY),
+            {"token": tenant.access_token, "geldig_tot": tenant.access_token_geldig_tot},
+            ttl_sec=max(1, tenant.access_token_geldig_tot - time.time()),
+        )
+        return tenant.access_token
+    finally:
+        store.compare_and_set(lock_sleutel, lock_id, None)
+
+
+MAX_429_POGINGEN = 3
+
+
+def request_with_auto_refresh(method: str, url: str, json_data=None, files=None, prioriteit=PRIORITEIT_INTERACTIEF):
+    """
+    API wrapper die automatisch token vernieuwt. Gaat via de rate-limit
+    scheduler van de tenant (interactief vóór batch) en probeert opnieuw na een 429.
+    """
+    tenant = huidige_tenant()
+    scheduler = tenant.scheduler
     access_token = get_access_token()
 
     headers = {"Authorization": f"Bearer {access_token}"}
     if not files:
         headers["Content-Type"] = "application/json"
 
-    resp = requests.request(method, url, headers=headers, json=json_data, files=files)
+    # json_data mag al geserialiseerd zijn (offerte_payload); één keer encoden, ook bij retries
+    body = json_data if json_data is None or isinstance(json_data, bytes) else payload_bytes(json_data)
+
+    for _ in range(MAX_429_POGINGEN):
+        scheduler.wacht_op_beurt(prioriteit)
+        resp = tenant.session.request(method, url, headers=headers, data=body, files=files)
+        scheduler.verwerk_antwoord(resp)
+
+        # token in geheugen toch ingetrokken → één keer opnieuw met verse token
+        if resp.status_code == 401 and headers["Authorization"] == f"Bearer {access_token}":
+            headers["Authorization"] = f"Bearer {get_access_token(forceer=True)}"
+            scheduler.wacht_op_beurt(prioriteit)
+            resp = tenant.session.request(method, url, headers=headers, data=body, files=files)
+            scheduler.verwerk_antwoord(resp)
+
+        if resp.status_code != 429:
+            break
+
     return resp
 
 
+def teamleader_lijst(endpoint: str, body=None, pagina_grootte=100, prioriteit=PRIORITEIT_BATCH):
+    """
+    Haalt alle pagina's van een *.list endpoint op (page.size / page.number)
+    en geeft de items één voor één terug. Standaard met batch-prioriteit.
+    """
+    body = dict(body or {})
+    nummer = 1
+    while True:
+        body["page"] = {"size": pagina_grootte, "number": nummer}
+        resp = request_with_auto_refresh("POST", f"{API_BASE}/{endpoint}", json_data=body, prioriteit=prioriteit)
+        if resp.status_code != 200:
+            raise Exception(f"Kan {endpoint} niet ophalen: {resp.text}")
+
+        items = resp.json().get("data") or []
+        yield from items
+
+        if len(items) < pagina_grootte:
+            return
+        nummer += 1
+
+
 # ======================================================
 # ✅ TAX RATE (21%) — AUTO FIND + CACHE
 # ======================================================
 
 def _load_cached_tax_rate_id():
-    if os.path.exists(TAX_RATE_FILE):
-        with open(TAX_RATE_FILE, "r") as f:
-            v = f.read().strip()
-            return v or None
-    return None
+    return get_state_store().get(huidige_tenant().sleutel(TAX_RATE_KEY))
 
 
 def _save_cached_tax_rate_id(tax_rate_id: str):
-    with open(TAX_RATE_FILE, "w") as f:
-        f.write(tax_rate_id)
+    get_state_store().set(huidige_tenant().sleutel(TAX_RATE_KEY), tax_rate_id)
 
 
 def _find_tax_rate_21_id_via_api():
@@ -134,6 +245,13 @@ def _find_tax_rate_21_id_via_api():
     payload = resp.json()
     data = payload.get("data") or []
 
+    # volledige index (id, rate, naam) in de store, voor alle workers
+    get_state_store().set_json(huidige_tenant().sleutel(TAX_RATES_KEY), [
+        {"id": tr.get("id"), "rate": tr.get("rate"),
+         "naam": tr.get("name") or tr.get("description") or tr.get("label")}
+        for tr in data
+    ])
+
     # 1) harde match op rate
     for tr in data:
         rate = tr.get("rate")
@@ -151,21 +269,28 @@ def _find_tax_rate_21_id_via_api():
 
 def get_tax_rate_21_id():
     """
-    Resolves tax rate id in deze volgorde:
+    Resolves tax rate id (van de huidige tenant) in deze volgorde:
     1) ENV (TAX_RATE_21_ID of TAX_RATE_ID)
-    2) cache file
+    2) geheugen / cache file
     3) auto lookup via API (taxRates.list) + cache
     """
-    if TAX_RATE_21_ID_ENV:
-        return TAX_RATE_21_ID_ENV
+    tenant = huidige_tenant()
+
+    if tenant.tax_rate_21_id_env:
+        return tenant.tax_rate_21_id_env
+
+    if tenant.tax_rate_21_id:
+        return tenant.tax_rate_21_id
 
     cached = _load_cached_tax_rate_id()
     if cached:
+        tenant.tax_rate_21_id = cached
         return cached
 
     found = _find_tax_rate_21_id_via_api()
     if found:
         _save_cached_tax_rate_id(found)
+        tenant.tax_rate_21_id = found
         return found
 
     raise Exception(
@@ -173,6 +298,68 @@ def get_tax_rate_21_id():
     )
 
 
+# ======================================================
+# 🔎 DEAL CONTROLEREN
+# ======================================================
+
+def controleer_deal(deal_id):
+    """
+    Controleert via deals.info of de deal bestaat.
+    Geeft de deal-gegevens terug (o.a. title), of None als hij niet bestaat.
+    """
+    resp = request_with_auto_refresh("POST", f"{API_BASE}/deals.info", json_data={"id": str(deal_id).strip()})
+
+    if resp.status_code in (400, 404):
+        return None
+    if resp.status_code != 200:
+        raise Exception(f"Kan deal niet controleren (deals.info): {resp.text}")
+
+    return resp.json().get("data")
+
+
+# ======================================================
+# 📎 BESTANDEN BIJ EEN DEAL
+# ======================================================
+
+def deal_bestanden(deal_id):
+    """Bestanden gekoppeld aan een deal (files.list), nieuwste eerst."""
+    body = {"filter": {"subject": {"type": "deal", "id": str(deal_id).strip()}}}
+    bestanden = list(teamleader_lijst("files.list", body))
+    bestanden.sort(key=lambda b: b.get("updated_at") or b.get("created_at") or "", reverse=True)
+    return bestanden
+
+
+def bestand_info(file_id):
+    """files.info: o.a. name en subject (waar het bestand aan hangt), of None."""
+    resp = request_with_auto_refresh(
+        "POST", f"{API_BASE}/files.info", json_data={"id": file_id}, prioriteit=PRIORITEIT_BATCH
+    )
+    if resp.status_code in (400, 404):
+        return None
+    if resp.status_code != 200:
+        raise Exception(f"Kan bestand niet ophalen (files.info): {resp.text}")
+    return resp.json().get("data")
+
+
+def download_bestand(file_id):
+    """Inhoud (bytes) van een Teamleader-bestand via files.download."""
+    resp = request_with_auto_refresh(
+        "POST", f"{API_BASE}/files.download", json_data={"id": file_id}, prioriteit=PRIORITEIT_BATCH
+    )
+    if resp.status_code != 200:
+        raise Exception(f"Kan bestand niet downloaden (files.download): {resp.text}")
+
+    locatie = (resp.json().get("data") or {}).get("location")
+    if not locatie:
+        raise Exception("files.download gaf geen downloadlocatie terug.")
+
+    # tijdelijke, al ondertekende URL: geen token of rate limit nodig
+    download = huidige_tenant().session.get(locatie, timeout=60)
+    if download.status_code != 200:
+        raise Exception(f"Download van bestand mislukt ({download.status_code}).")
+    return download.content
+
+
 # ======================================================
 # 🧮 MODEL- EN PRIJSLOGICA (FRONTEN)
 # ======================================================
@@ -271,21 +458,84 @@ APOTHEKERS_LADE = [546, 546, 546, 546, 546, 546, 546, 546]  # rij 28
 CARROUSEL = [0, 0, 0, 452, 452, 452, 452, 452]  # G–J=452, C–F=0
 
 
+# ======================================================
+# 📋 PRIJSTABEL ALS GEHEEL (voor kandidaat-prijslijsten)
+# ======================================================
+
+PRIJSTABEL_NAMEN = [
+    "MODEL_INFO", "M2_FRONT_PRIJZEN", "VLAK_MODEL_PER_MATERIAAL", "BREEDTE_STAFFELS",
+    "A_LADE_KAST", "A_OVEN_KAST", "B_HOOG_1001_2079", "B_HOOG_2080_2770",
+    "C_CORPUS_0_390", "C_CORPUS_391_520", "C_CORPUS_521_780", "C_CORPUS_781_PLUS",
+    "PLANK_A_OF_B", "LADES_KAST", "PUSH_TO_OPEN_LADE", "SCHARNIER_PER_STUK_MAATWERK",
+    "BESTEK_BAK", "SPOELKAST_BESCHERMING", "APOTHEKERS_LADE", "CARROUSEL",
+    "MONTAGE_PER_FRONT", "INMETEN", "VRACHT", "PRIJS_SCHARNIER", "PRIJS_LADE",
+]
+
+
+def _module_prijstabel():
+    g = globals()
+    return {naam: g[naam] for naam in PRIJSTABEL_NAMEN}
+
+
+def huidige_prijstabel():
+    """
+    Alle prijstabellen in één dict (naam → tabel): die van deze module, met
+    de prijswijzigingen van de huidige tenant erover (en eventueel de
+    catalogusprijzen, zie product_catalogus.py). Niet wijzigen.
+    """
+    tenant = huidige_tenant()
+    if not tenant.prijs_wijzigingen and not tenant.catalogus_prijzen:
+        return _module_prijstabel()
+    if tenant.prijstabel is None:
+        tabel = _module_prijstabel()
+        for wijzigingen in (tenant.prijs_wijzigingen, tenant.catalogus_prijzen):
+            if wijzigingen:
+                tabel = prijstabel_met_wijzigingen(wijzigingen, tabel)
+        tenant.prijstabel = tabel
+    return tenant.prijstabel
+
+
+def prijstabel_met_wijzigingen(wijzigingen, basis=None):
+    """
+    Nieuwe prijstabel = basis (standaard de huidige) met wijzigingen erover.
+    Dicts worden per sleutel samengevoegd (bv. één model in M2_FRONT_PRIJZEN),
+    lijsten en getallen in hun geheel vervangen.
+    """
+    tabel = json.loads(json.dumps(basis or huidige_prijstabel()))
+
+    def voeg_samen(doel, bron, pad):
+        for sleutel, waarde in bron.items():
+            if isinstance(waarde, dict) and isinstance(doel.get(sleutel), dict):
+                voeg_samen(doel[sleutel], waarde, f"{pad}.{sleutel}")
+            else:
+                doel[sleutel] = waarde
+
+    for naam, waarde in wijzigingen.items():
+        if naam not in PRIJSTABEL_NAMEN:
+            raise ValueError(f"Onbekende prijstabel '{naam}'.")
+        if isinstance(waarde, dict) and isinstance(tabel[naam], dict):
+            voeg_samen(tabel[naam], waarde, naam)
+        else:
+            tabel[naam] = waarde
+    return tabel
+
+
 # ======================================================
 # 🔎 HULPFUNCTIES MAATWERK KASTEN
 # ======================================================
 
-def _staffel_index(breedte_mm: float) -> int:
+def _staffel_index(breedte_mm: float, staffels=None) -> int:
     """
     Bepaal index in BREEDTE_STAFFELS:
     altijd naar BOVEN afronden naar de eerstvolgende staffel.
     """
+    staffels = staffels or BREEDTE_STAFFELS
     if breedte_mm is None or math.isnan(breedte_mm):
         return 0
-    for i, grens in enumerate(BREEDTE_STAFFELS):
+    for i, grens in enumerate(staffels):
         if breedte_mm <= grens:
             return i
-    return len(BREEDTE_STAFFELS) - 1
+    return len(staffels) - 1
 
 
 def _safe_float(val):
@@ -358,125 +608,52 @@ def _parse_inrichting(inrichting_raw: str):
     return result
 
 
-def _lees_maatwerk_kasten(path: str):
+MAATWERK_SHEET = "MAATWERK KASTEN"   # sheetnaam van het standaard-sjabloon
+
+
+def _cel(df, r, c):
+    """df.iat[r, c], of None buiten het frame (kortere tabbladen)."""
+    if r < df.shape[0] and c < df.shape[1]:
+        return df.iat[r, c]
+    return None
+
+
+def _kast_waarde(val, soort):
+    if soort == "getal":
+        return _safe_float(val) if val is not None else None
+    if soort == "geheel":
+        return _safe_int(val) if val is not None else 0
+    if val is None or pd.isna(val):
+        return ""
+    tekst = str(val).strip()
+    return tekst.upper() if soort == "hoofdletters" else tekst
+
+
+def _lees_maatwerk_kasten(bron, sheet=None, plan=None):
     """
-    Leest tabblad 'MAATWERK KASTEN' en geeft een lijst met kast-dicts terug.
-
-    Rijstructuur (EXACT):
-      5  = TYPE KAST (A,B of C)
-      6  = Hoogte
-      7  = Breedte
-      8  = Diepte
-      9  = Hoogte pootje
-      10 = Zichtbare zijde
-      11 = Inrichting
-      12 = Scharnieren
-      13 = Frontmodel
-      14 = Aantal fronten
-      15 = Kleur corpus
-      16 = Dubbelzijdig afgewerkt
-      17 = Handgreep
-      18 = Afwerking
+    Leest het kasten-tabblad en geeft een lijst met kast-dicts terug.
+    bron is een pad of een open pd.ExcelFile; plan een SjabloonPlan
+    (standaard: het sjabloon zonder herkenning, zie werkboek_sjablonen.py).
+    Welke rij welk veld is en welke kolommen kasten zijn, staat in het plan;
+    er worden niet meer rijen gelezen dan het plan nodig heeft.
     """
+    plan = plan or get_sjablonen().standaard
     try:
-        df = pd.read_excel(path, sheet_name="MAATWERK KASTEN", header=None)
+        df = pd.read_excel(bron, sheet_name=sheet or plan.maatwerk_sheet, header=None, nrows=plan.kast_nrows)
     except Exception:
         return []
 
     kasten = []
-    max_row_idx = df.shape[0] - 1
-
-    # Mapping naar 0-based index:
-    ROW_TYPE            = 4   # rij 5
-    ROW_HOOGTE          = 5   # rij 6
-    ROW_BREEDTE         = 6   # rij 7
-    ROW_DIEPTE          = 7   # rij 8
-    ROW_POOTHOOGTE      = 8   # rij 9
-    ROW_ZICHTBARE_ZIJDE = 9   # rij 10
-    ROW_INRICHTING      = 10  # rij 11
-    ROW_SCHARNIEREN     = 11  # rij 12
-    ROW_FRONTMODEL      = 12  # rij 13
-    ROW_AANTAL_FRONTEN  = 13  # rij 14
-    ROW_KLEUR_CORPUS    = 14  # rij 15
-    ROW_DUBBELZIJDIG    = 15  # rij 16
-    ROW_HANDGREEP       = 16  # rij 17
-    ROW_AFWERKING       = 17  # rij 18
-
-    for col in range(1, 11):  # kolommen B..K (0-based: 1..10)
-
-        rows_to_check = list(range(ROW_TYPE, ROW_AFWERKING + 1))
-        filled = any(
-            r <= max_row_idx and not pd.isna(df.iloc[r, col])
-            for r in rows_to_check
-        )
-        if not filled:
+    for col in plan.kast_kolommen:
+        waarden = {r: _cel(df, r, col) for r in plan.kast_rijen}
+        if all(v is None or pd.isna(v) for v in waarden.values()):
             continue
 
-        kast_type_raw = df.iloc[ROW_TYPE, col]
-        kast_type = str(kast_type_raw).strip().upper() if not pd.isna(kast_type_raw) else ""
-
-        hoogte = _safe_float(df.iloc[ROW_HOOGTE, col]) if ROW_HOOGTE <= max_row_idx else None
-        breedte = _safe_float(df.iloc[ROW_BREEDTE, col]) if ROW_BREEDTE <= max_row_idx else None
-        diepte = _safe_float(df.iloc[ROW_DIEPTE, col]) if ROW_DIEPTE <= max_row_idx else None
-        poothoogte = _safe_float(df.iloc[ROW_POOTHOOGTE, col]) if ROW_POOTHOOGTE <= max_row_idx else None
-
-        zichtbare_zijde = ""
-        if ROW_ZICHTBARE_ZIJDE <= max_row_idx and not pd.isna(df.iloc[ROW_ZICHTBARE_ZIJDE, col]):
-            zichtbare_zijde = str(df.iloc[ROW_ZICHTBARE_ZIJDE, col]).strip()
-
-        inrichting_raw = ""
-        if ROW_INRICHTING <= max_row_idx and not pd.isna(df.iloc[ROW_INRICHTING, col]):
-            inrichting_raw = str(df.iloc[ROW_INRICHTING, col]).strip()
-
-        scharnieren = 0
-        if ROW_SCHARNIEREN <= max_row_idx:
-            scharnieren = _safe_int(df.iloc[ROW_SCHARNIEREN, col])
-
-        frontmodel = ""
-        if ROW_FRONTMODEL <= max_row_idx and not pd.isna(df.iloc[ROW_FRONTMODEL, col]):
-            frontmodel = str(df.iloc[ROW_FRONTMODEL, col]).strip().upper()
-
-        aantal_fronten = 0
-        if ROW_AANTAL_FRONTEN <= max_row_idx and not pd.isna(df.iloc[ROW_AANTAL_FRONTEN, col]):
-            aantal_fronten = _safe_int(df.iloc[ROW_AANTAL_FRONTEN, col])
-
-        kleur_corpus = ""
-        if ROW_KLEUR_CORPUS <= max_row_idx and not pd.isna(df.iloc[ROW_KLEUR_CORPUS, col]):
-            kleur_corpus = str(df.iloc[ROW_KLEUR_CORPUS, col]).strip()
-
-        dubbelzijdig = ""
-        if ROW_DUBBELZIJDIG <= max_row_idx and not pd.isna(df.iloc[ROW_DUBBELZIJDIG, col]):
-            dubbelzijdig = str(df.iloc[ROW_DUBBELZIJDIG, col]).strip()
-
-        handgreep = ""
-        if ROW_HANDGREEP <= max_row_idx and not pd.isna(df.iloc[ROW_HANDGREEP, col]):
-            handgreep = str(df.iloc[ROW_HANDGREEP, col]).strip()
-
-        afwerking = ""
-        if ROW_AFWERKING <= max_row_idx and not pd.isna(df.iloc[ROW_AFWERKING, col]):
-            afwerking = str(df.iloc[ROW_AFWERKING, col]).strip()
-
-        inrichting_parsed = _parse_inrichting(inrichting_raw)
-
-        kast = {
-            "kolom_index": col,
-            "type": kast_type,
-            "hoogte": hoogte,
-            "breedte": breedte,
-            "diepte": diepte,
-            "poothoogte": poothoogte,
-            "kleur_corpus": kleur_corpus,
-            "zichtbare_zijde": zichtbare_zijde,
-            "inrichting_raw": inrichting_raw,
-            "inrichting": inrichting_parsed,
-            "scharnieren": scharnieren,
-            "frontmodel": frontmodel,
-            "aantal_fronten": aantal_fronten,
-            "dubbelzijdig": dubbelzijdig,
-            "handgreep": handgreep,
-            "afwerking": afwerking,
-        }
-
+        kast = {"kolom_index": col}
+        for veld, r, soort in plan.kast_velden:
+            kast[veld] = _kast_waarde(waarden[r] if r is not None else None, soort)
+            if veld == "inrichting_raw":
+                kast["inrichting"] = _parse_inrichting(kast[veld])
         kasten.append(kast)
 
     return kasten
@@ -493,16 +670,18 @@ def _kast_titel(kast_type: str) -> str:
     return "Maatwerk kast"
 
 
-def _bereken_maatwerk_kast(kast: dict):
+def _maatwerk_kast_basis(kast: dict, prijstabel=None):
     """
-    Berekent inkoop- en verkoopprijs voor één maatwerk kast.
+    Modelonafhankelijke delen van één maatwerk kast volgens de standaard
+    prijsregels, uitgeschreven: alleen voor de referentie _bereken_maatwerk_kast.
     """
+    pt = prijstabel or huidige_prijstabel()
     kast_type = kast.get("type", "").upper()
     hoogte = kast.get("hoogte") or 0
     breedte = kast.get("breedte") or 0
     diepte = kast.get("diepte") or 0
 
-    idx = _staffel_index(breedte)
+    idx = _staffel_index(breedte, pt["BREEDTE_STAFFELS"])
 
     inrichting = kast.get("inrichting", {})
     planken = inrichting.get("planken", 0)
@@ -522,33 +701,33 @@ def _bereken_maatwerk_kast(kast: dict):
     if kast_type == "A":
         inrichting_raw = (kast.get("inrichting_raw") or "").lower()
         if "lade" in inrichting_raw:
-            corpus_inkoop = A_LADE_KAST[idx]
+            corpus_inkoop = pt["A_LADE_KAST"][idx]
         elif "plank" in inrichting_raw:
-            corpus_inkoop = A_LADE_KAST[idx]
+            corpus_inkoop = pt["A_LADE_KAST"][idx]
         else:
-            corpus_inkoop = A_OVEN_KAST[idx]
+            corpus_inkoop = pt["A_OVEN_KAST"][idx]
 
     elif kast_type == "B":
         if hoogte is None:
             hoogte = 0
         if 1001 <= hoogte <= 2079:
-            corpus_inkoop = B_HOOG_1001_2079[idx]
+            corpus_inkoop = pt["B_HOOG_1001_2079"][idx]
         elif 2080 <= hoogte <= 2770:
-            corpus_inkoop = B_HOOG_2080_2770[idx]
+            corpus_inkoop = pt["B_HOOG_2080_2770"][idx]
         else:
-            corpus_inkoop = B_HOOG_1001_2079[idx]
+            corpus_inkoop = pt["B_HOOG_1001_2079"][idx]
 
     elif kast_type == "C":
         if hoogte is None:
             hoogte = 0
         if hoogte <= 390:
-            corpus_inkoop = C_CORPUS_0_390[idx]
+            corpus_inkoop = pt["C_CORPUS_0_390"][idx]
         elif 391 <= hoogte <= 520:
-            corpus_inkoop = C_CORPUS_391_520[idx]
+            corpus_inkoop = pt["C_CORPUS_391_520"][idx]
         elif 521 <= hoogte <= 780:
-            corpus_inkoop = C_CORPUS_521_780[idx]
+            corpus_inkoop = pt["C_CORPUS_521_780"][idx]
         else:
-            corpus_inkoop = C_CORPUS_781_PLUS[idx]
+            corpus_inkoop = pt["C_CORPUS_781_PLUS"][idx]
 
     # 2) INRICHTING
     inrichting_inkoop = 0.0
@@ -570,58 +749,84 @@ def _bereken_maatwerk_kast(kast: dict):
 
     extra_planken = max(0, planken - inbegrepen_planken)
     if extra_planken > 0:
-        inrichting_inkoop += extra_planken * PLANK_A_OF_B[idx]
+        inrichting_inkoop += extra_planken * pt["PLANK_A_OF_B"][idx]
 
     if lades > 0:
-        inrichting_inkoop += lades * LADES_KAST[idx]
+        inrichting_inkoop += lades * pt["LADES_KAST"][idx]
     if push_lades > 0:
-        inrichting_inkoop += push_lades * PUSH_TO_OPEN_LADE[idx]
+        inrichting_inkoop += push_lades * pt["PUSH_TO_OPEN_LADE"][idx]
     if bestek > 0:
-        inrichting_inkoop += bestek * BESTEK_BAK[idx]
+        inrichting_inkoop += bestek * pt["BESTEK_BAK"][idx]
     if spoelbesch > 0:
-        inrichting_inkoop += spoelbesch * SPOELKAST_BESCHERMING[idx]
+        inrichting_inkoop += spoelbesch * pt["SPOELKAST_BESCHERMING"][idx]
     if apothekers > 0:
-        inrichting_inkoop += apothekers * APOTHEKERS_LADE[idx]
+        inrichting_inkoop += apothekers * pt["APOTHEKERS_LADE"][idx]
     if carrousels > 0:
-        inrichting_inkoop += carrousels * CARROUSEL[idx]
+        inrichting_inkoop += carrousels * pt["CARROUSEL"][idx]
     if klepscharnieren > 0:
-        inrichting_inkoop += klepscharnieren * SCHARNIER_PER_STUK_MAATWERK[idx]
+        inrichting_inkoop += klepscharnieren * pt["SCHARNIER_PER_STUK_MAATWERK"][idx]
 
     scharnier_inkoop = 0.0
     if scharnieren > 0:
-        scharnier_inkoop = scharnieren * SCHARNIER_PER_STUK_MAATWERK[idx]
+        scharnier_inkoop = scharnieren * pt["SCHARNIER_PER_STUK_MAATWERK"][idx]
 
     corpus_inrichting_inkoop = corpus_inkoop + inrichting_inkoop + scharnier_inkoop
 
+    # 3) M² FRONT + ZICHTBARE ZIJDEN
+    front_m2 = (hoogte * breedte) / 1_000_000.0 if hoogte and breedte else 0.0
+
+    zichtbaar = (kast.get("zichtbare_zijde") or "").lower()
+    links = "links" in zichtbaar
+    rechts = "rechts" in zichtbaar
+    if "ja" in zichtbaar and not (links or rechts):
+        links = True
+
+    zijden = 0
+    if links:
+        zijden += 1
+    if rechts:
+        zijden += 1
+
+    zijde_m2 = (hoogte * diepte) / 1_000_000.0 if hoogte and diepte else 0.0
+
+    return {
+        "hoogte": hoogte,
+        "breedte": breedte,
+        "diepte": diepte,
+        "corpus_inrichting_inkoop": corpus_inrichting_inkoop,
+        "front_m2": front_m2,
+        "zijden": zijden,
+        "zijde_m2": zijde_m2,
+    }
+
+
+def _bereken_maatwerk_kast(kast: dict, prijstabel=None):
+    """
+    Berekent inkoop- en verkoopprijs voor één maatwerk kast.
+    Alleen referentie voor de standaard prijsregels (benchmark en tests):
+    offertes en vergelijkingen gebruiken het gecompileerde plan uit
+    prijsregels.py, dat dezelfde bedragen moet geven.
+    """
+    pt = prijstabel or huidige_prijstabel()
+    basis = _maatwerk_kast_basis(kast, pt)
+
+    corpus_inrichting_inkoop = basis["corpus_inrichting_inkoop"]
+
     # 3) FRONTEN + ZIJKANTEN IN M² + 40% OPSLAG
     frontmodel = (kast.get("frontmodel") or "").upper()
-    front_m2_prijs = M2_FRONT_PRIJZEN.get(frontmodel, 0.0)
+    front_m2_prijs = pt["M2_FRONT_PRIJZEN"].get(frontmodel, 0.0)
 
-    front_m2 = (hoogte * breedte) / 1_000_000.0 if hoogte and breedte else 0.0
-    front_inkoop = front_m2 * front_m2_prijs
+    front_inkoop = basis["front_m2"] * front_m2_prijs
 
-    materiaal_type = MODEL_INFO.get(frontmodel, {}).get("materiaal")
+    materiaal_type = pt["MODEL_INFO"].get(frontmodel, {}).get("materiaal")
 
     zij_m2_inkoop = 0.0
-    if materiaal_type in VLAK_MODEL_PER_MATERIAAL:
-        vlak_model = VLAK_MODEL_PER_MATERIAAL[materiaal_type]
-        vlak_m2_prijs = M2_FRONT_PRIJZEN.get(vlak_model, 0.0)
-
-        zichtbaar = (kast.get("zichtbare_zijde") or "").lower()
-        links = "links" in zichtbaar
-        rechts = "rechts" in zichtbaar
-        if "ja" in zichtbaar and not (links or rechts):
-            links = True
-
-        zijden = 0
-        if links:
-            zijden += 1
-        if rechts:
-            zijden += 1
-
-        if zijden > 0 and hoogte and diepte:
-            zijde_m2 = (hoogte * diepte) / 1_000_000.0
-            zij_m2_inkoop = zijden * zijde_m2 * vlak_m2_prijs
+    if materiaal_type in pt["VLAK_MODEL_PER_MATERIAAL"]:
+        vlak_model = pt["VLAK_MODEL_PER_MATERIAAL"][materiaal_type]
+        vlak_m2_prijs = pt["M2_FRONT_PRIJZEN"].get(vlak_model, 0.0)
+
+        if basis["zijden"] > 0 and basis["zijde_m2"]:
+            zij_m2_inkoop = basis["zijden"] * basis["zijde_m2"] * vlak_m2_prijs
 
     front_en_zijden_inkoop = front_inkoop + zij_m2_inkoop
     front_en_zijden_met_opslag_inkoop = front_en_zijden_inkoop * 1.40
@@ -631,7 +836,17 @@ def _bereken_maatwerk_kast(kast: dict):
     verkoop_excl = round(totaal_inkoop / 0.4, 2) if totaal_inkoop > 0 else 0.0
     totaal_inkoop = round(totaal_inkoop, 2)
 
-    # 5) BESCHRIJVING
+    return _maatwerk_kast_regel(kast, totaal_inkoop, verkoop_excl)
+
+
+def _maatwerk_kast_regel(kast, totaal_inkoop, verkoop_excl):
+    """Offerteregel (titel + beschrijving + bedragen) voor één geprijsde kast."""
+    kast_type = kast.get("type", "").upper()
+    hoogte = kast.get("hoogte") or 0
+    breedte = kast.get("breedte") or 0
+    diepte = kast.get("diepte") or 0
+    scharnieren = kast.get("scharnieren", 0)
+    frontmodel = (kast.get("frontmodel") or "").upper()
     aantal_fronten = kast.get("aantal_fronten", 0)
 
     beschrijving_regels = [
@@ -653,6 +868,7 @@ def _bereken_maatwerk_kast(kast: dict):
     beschrijving = "\r\n".join(beschrijving_regels)
 
     return {
+        "kolom_index": kast.get("kolom_index"),
         "titel": _kast_titel(kast_type),
         "beschrijving": beschrijving,
         "totaal_inkoop": totaal_inkoop,
@@ -660,12 +876,38 @@ def _bereken_maatwerk_kast(kast: dict):
     }
 
 
-def _bereken_alle_maatwerk_kasten(kasten_lijst):
+# vanaf zoveel te prijzen kasten rekent het plan in één keer met numpy
+KASTEN_BATCH_VANAF = 24
+
+
+def _bereken_alle_maatwerk_kasten(kasten_lijst, vorige_kasten=None, prijstabel=None):
+    """
+    Prijst alle kasten met het plan uit prijsregels.py. vorige_kasten
+    ({kolom_index: {"raw": kast, "res": res}}) is de vorige berekening:
+    ongewijzigde kasten worden daaruit overgenomen.
+    """
+    vorige_kasten = vorige_kasten or {}
+    plan = plan_voor(prijstabel or huidige_prijstabel())
+
+    uitkomsten = [None] * len(kasten_lijst)
+    te_prijzen = []
+    for i, kast in enumerate(kasten_lijst):
+        vorige = vorige_kasten.get(kast.get("kolom_index"))
+        if vorige and vorige["raw"] == kast:
+            uitkomsten[i] = vorige["res"]
+        else:
+            te_prijzen.append(i)
+
+    if len(te_prijzen) >= KASTEN_BATCH_VANAF:
+        bedragen = zip(*plan.kasten([kasten_lijst[i] for i in te_prijzen]))
+    else:
+        bedragen = (plan.kast(kasten_lijst[i]) for i in te_prijzen)
+    for i, (totaal_inkoop, verkoop_excl) in zip(te_prijzen, bedragen):
+        uitkomsten[i] = _maatwerk_kast_regel(kasten_lijst[i], totaal_inkoop, verkoop_excl)
+
     regels = []
     totaal_verkoop = 0.0
-
-    for kast in kasten_lijst:
-        res = _bereken_maatwerk_kast(kast)
+    for res in uitkomsten:
         if res["verkoop_excl"] > 0:
             regels.append(res)
             totaal_verkoop += res["verkoop_excl"]
@@ -674,96 +916,412 @@ def _bereken_alle_maatwerk_kasten(kasten_lijst):
     return regels, totaal_verkoop
 
 
+MODEL_MAPPING = {
+    ("K01 - vlak", "MDF gespoten"): "NOAH",
+    ("K02 - greeploos", "MDF gespoten"): "FEDDE",
+    ("K04 - 70mm kader", "MDF gespoten"): "DAVE",
+    ("K05 - 25mm kader", "MDF gespoten"): "JOLIE",
+    ("K13 - Vgroef", "MDF gespoten"): "DEX",
+
+    ("K09 - 10mm kader", "Eikenfineer"): "JAMES",
+    ("K02 - greeploos", "Eikenfineer"): "CHIEL",
+    ("K01 - vlak", "Eikenfineer"): "JACK",
+
+    ("K01 - vlak", "Noten fineer"): "SAM",
+    ("K02 - greeploos", "Noten fineer"): "DUKE",
+}
+
+
 def bepaal_model(g2, h2):
-    mapping = {
-        ("K01 - vlak", "MDF gespoten"): "NOAH",
-        ("K02 - greeploos", "MDF gespoten"): "FEDDE",
-        ("K04 - 70mm kader", "MDF gespoten"): "DAVE",
-        ("K05 - 25mm kader", "MDF gespoten"): "JOLIE",
-        ("K13 - Vgroef", "MDF gespoten"): "DEX",
-
-        ("K09 - 10mm kader", "Eikenfineer"): "JAMES",
-        ("K02 - greeploos", "Eikenfineer"): "CHIEL",
-        ("K01 - vlak", "Eikenfineer"): "JACK",
-
-        ("K01 - vlak", "Noten fineer"): "SAM",
-        ("K02 - greeploos", "Noten fineer"): "DUKE",
-    }
-    return mapping.get((str(g2).strip(), str(h2).strip()), None)
+    return MODEL_MAPPING.get((str(g2).strip(), str(h2).strip()), None)
+
+
+# ======================================================
+# ✅ SNELLE VALIDATIE VAN HET WERKBOEK
+# ======================================================
+
+def _is_getal(val):
+    if val is None or isinstance(val, bool):
+        return False
+    if isinstance(val, (int, float)):
+        return not math.isnan(val)
+    try:
+        float(str(val).replace(",", "."))
+        return True
+    except ValueError:
+        return False
+
+
+class WerkboekFout(ValueError):
+    """Werkboek dat lees_excel niet kan uitlezen; problemen zoals valideer_werkboek ze geeft."""
+
+    def __init__(self, problemen):
+        self.problemen = problemen
+        super().__init__("; ".join(
+            f"{p['cel']}: verwacht {p['verwacht']}, gevonden {p['gevonden']}" for p in problemen
+        ))
+
+
+def valideer_werkboek(path):
+    """
+    Controleert alleen de sheetnamen en kopcellen (read-only, zonder
+    het hele werkboek te parsen) en geeft ALLE gevonden problemen terug:
+    [{"cel", "verwacht", "gevonden", "ernst"}], ernst = "fout" of "waarschuwing".
+    Een lege lijst betekent: veilig om lees_excel aan te roepen.
+    """
+    from openpyxl import load_workbook
+
+    problemen = []
+
+    def probleem(cel, verwacht, gevonden, ernst="fout"):
+        problemen.append({"cel": cel, "verwacht": verwacht, "gevonden": gevonden, "ernst": ernst})
+
+    try:
+        wb = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        probleem("-", "geldig .xlsx-bestand", f"onleesbaar ({e.__class__.__name__})")
+        return problemen
+
+    try:
+        if not wb.sheetnames:
+            probleem("-", "minstens één tabblad", "geen tabbladen")
+            return problemen
+
+        ws = wb.worksheets[0]
+        sjablonen = get_sjablonen()
+
+        # herkenningscellen + kopcellen van elk sjabloon in één blok
+        # (read-only: alleen deze rijen worden gelezen)
+        rijen = max([sjablonen.herkenning_rijen] + [p.kop_rijen for p in sjablonen.alle])
+        max_kolom = max([sjablonen.herkenning_max_kolom] + [p.kop_max_kolom for p in sjablonen.alle])
+        blok = [list(rij) for rij in ws.iter_rows(min_row=1, max_row=rijen, max_col=max_kolom + 1, values_only=True)]
+
+        def cel(r, c):
+            return blok[r][c] if r < len(blok) and c < len(blok[r]) else None
+
+        plan = sjablonen.herken(cel)
+        namen = plan.celnamen
+
+        g2, h2 = cel(*plan.cellen["frontmodel"]), cel(*plan.cellen["materiaal"])
+        if g2 in (None, ""):
+            probleem(namen["frontmodel"], "frontmodel (bv. 'K01 - vlak')", "leeg")
+        if h2 in (None, ""):
+            probleem(namen["materiaal"], "materiaal (bv. 'MDF gespoten')", "leeg")
+        if g2 not in (None, "") and h2 not in (None, "") and not bepaal_model(g2, h2):
+            probleem(
+                f"{namen['frontmodel']}/{namen['materiaal']}",
+                "bekende combinatie: " + "; ".join(f"{a} + {b}" for a, b in MODEL_MAPPING),
+                f"{g2} + {h2}",
+            )
+
+        for veld in ("scharnieren", "lades"):
+            val = cel(*plan.cellen[veld])
+            if val not in (None, "") and not _is_getal(val):
+                probleem(namen[veld], "getal (aantal)", repr(val))
+
+        if not any(cel(r, c) not in (None, "") for r, c in plan.klantgegevens):
+            probleem(plan.klantgegevens_bereik, "klantgegevens", "leeg", "waarschuwing")
+
+        # kasten-tabblad: aanwezig + numerieke maten (rijen en kolommen uit het sjabloon)
+        kasten_sheet = plan.maatwerk_sheet
+        if kasten_sheet not in wb.sheetnames:
+            probleem(kasten_sheet, "tabblad aanwezig", "ontbreekt (geen maatwerk kasten)", "waarschuwing")
+        else:
+            mk = wb[kasten_sheet]
+            labels = {r: veld for veld, r, _ in plan.kast_velden if veld in ("hoogte", "breedte", "diepte")}
+            eerste, laatste = min(labels), max(labels)
+            kolommen = plan.kast_kolommen
+            for r, rij in enumerate(
+                mk.iter_rows(min_row=eerste + 1, max_row=laatste + 1, min_col=kolommen[0] + 1,
+                             max_col=kolommen[-1] + 1, values_only=True),
+                start=eerste,
+            ):
+                if r not in labels:
+                    continue
+                for c, val in enumerate(rij, start=kolommen[0]):
+                    if val not in (None, "") and not _is_getal(val):
+                        probleem(f"{kasten_sheet}!{kolom_letters(c)}{r + 1}", f"{labels[r]} in mm", repr(val))
+    finally:
+        wb.close()
+
+    return problemen
 
 
 # ======================================================
 # 📥 EXCEL UITLEZEN
 # ======================================================
 
-def lees_excel(path):
-    df = pd.read_excel(path, sheet_name=0, header=None)
+# ======================================================
+# 📦 ONDERDELEN-INVENTARIS (INMEET-TABBLAD)
+# Kolom met de soort onderdeel uit het sjabloon (standaard F);
+# hoogte/breedte/aantal worden op kopnaam gezocht. Zonder die koppen
+# blijft het bij aantallen (aantal = 1 per regel).
+# ======================================================
+
+INVENTARIS_KOPPEN = {
+    "hoogte": ("hoogte",),
+    "breedte": ("breedte",),
+    "aantal": ("aantal", "stuks"),
+}
+FRONT_ONDERDELEN = frozenset({"DEUR", "LADE", "BEDEKKINGSPANEEL"})
+PASSTUK_ONDERDELEN = frozenset({"PASSTUK", "PLINT"})
+
+
+def _inventaris_kolommen(df, kop_kolommen, max_rijen=10):
+    """(kopregel, {veld: kolom}) van de eerste regel met een bekende kopnaam."""
+    for r in range(min(max_rijen, df.shape[0])):
+        kolommen = {}
+        for c in range(df.shape[1]):
+            if c in kop_kolommen:
+                continue   # model/kleur/klantgegevens
+            waarde = df.iat[r, c]
+            if not isinstance(waarde, str):
+                continue
+            tekst = waarde.strip().lower()
+            for veld, koppen in INVENTARIS_KOPPEN.items():
+                if veld not in kolommen and tekst.startswith(koppen):
+                    kolommen[veld] = c
+        if kolommen:
+            return r, kolommen
+    return None, {}
+
+
+def _lees_onderdelen_inventaris(df, plan=None):
+    """
+    Leest de onderdelentabel één keer als getypeerd frame en telt per soort
+    (vectorieel): [{"categorie", "type", "regels", "aantal", "m2"}].
+    categorie = front | passtuk | anders | overig.
+    """
+    plan = plan or get_sjablonen().standaard
+    if df.shape[1] <= plan.onderdeel_kolom:
+        return []
+
+    kop_rij, kolommen = _inventaris_kolommen(df, plan.kop_kolommen)
+    soort = df.iloc[:, plan.onderdeel_kolom]
+    masker = soort.notna().to_numpy(copy=True)
+    if kop_rij is not None:
+        masker[kop_rij] = False
+    if not masker.any():
+        return []
+
+    def getallen(veld):
+        if veld not in kolommen:
+            return np.full(int(masker.sum()), np.nan)
+        return pd.to_numeric(df.iloc[masker, kolommen[veld]], errors="coerce").to_numpy(dtype=float)
+
+    frame = pd.DataFrame({
+        "type": soort[masker].astype(str).str.strip().str.upper().to_numpy(),
+        "hoogte": getallen("hoogte"),
+        "breedte": getallen("breedte"),
+        "aantal": np.nan_to_num(getallen("aantal"), nan=1.0),
+    })
+    frame["m2"] = np.nan_to_num(frame["hoogte"] * frame["breedte"] / 1_000_000.0) * frame["aantal"]
+    frame["categorie"] = np.select(
+        [
+            frame["type"].isin(FRONT_ONDERDELEN),
+            frame["type"].isin(PASSTUK_ONDERDELEN),
+            frame["type"].str.contains("ANDERS", regex=False),
+        ],
+        ["front", "passtuk", "anders"],
+        "overig",
+    )
+
+    per_type = (
+        frame.groupby(["categorie", "type"], sort=True)
+        .agg(regels=("type", "size"), aantal=("aantal", "sum"), m2=("m2", "sum"))
+        .reset_index()
+    )
+    per_type["m2"] = per_type["m2"].round(4)
+    return per_type.to_dict("records")
+
+
+def _sjabloon_voor(df):
+    """Het sjabloon van een inmeet-tabblad (herkenningscel, anders het standaard-sjabloon)."""
+    return get_sjablonen().herken(lambda r, c: _cel(df, r, c))
 
-    onderdelen = df.iloc[:, 5].dropna().astype(str).str.upper().tolist()
 
-    g2 = df.iloc[1, 6]
-    h2 = df.iloc[1, 7]
-    kleur = df.iloc[1, 8]
+def _lees_keuken(df, xls, kasten_sheet, projectnaam, plan=None):
+    """Uitkomst van lees_excel voor één keuken-tabblad (df) en zijn kasten-tabblad."""
+    plan = plan or _sjabloon_voor(df)
+    cellen = plan.cellen
+
+    if df.shape[1] > plan.onderdeel_kolom:
+        onderdelen = df.iloc[:, plan.onderdeel_kolom].dropna().astype(str).str.upper().tolist()
+    else:
+        onderdelen = []
+
+    g2 = _cel(df, *cellen["frontmodel"])
+    h2 = _cel(df, *cellen["materiaal"])
+    kleur = _cel(df, *cellen["kleur"])
 
     klantregels = [
-        str(df.iloc[r, 10])
-        for r in range(1, 6)
-        if pd.notna(df.iloc[r, 10])
+        str(waarde)
+        for waarde in (_cel(df, r, c) for r, c in plan.klantgegevens)
+        if waarde is not None and pd.notna(waarde)
     ]
 
-    scharnieren = int(df.iloc[2, 9]) if pd.notna(df.iloc[2, 9]) else 0
-    lades = int(df.iloc[4, 9]) if pd.notna(df.iloc[4, 9]) else 0
+    def aantal(veld):
+        # zelfde regel als valideer_werkboek: leeg = 0, anders een getal (ook "12,0")
+        waarde = _cel(df, *cellen[veld])
+        if waarde is None or waarde == "" or (not isinstance(waarde, str) and pd.isna(waarde)):
+            return 0
+        if not _is_getal(waarde):
+            raise WerkboekFout([{
+                "cel": plan.celnamen[veld], "verwacht": "getal (aantal)", "gevonden": repr(waarde), "ernst": "fout",
+            }])
+        return _safe_int(waarde)
 
-    projectnaam = os.path.splitext(os.path.basename(path))[0]
+    scharnieren = aantal("scharnieren")
+    lades = aantal("lades")
 
-    maatwerk_kasten_raw = _lees_maatwerk_kasten(path)
+    maatwerk_kasten_raw = _lees_maatwerk_kasten(xls, kasten_sheet, plan) if kasten_sheet else []
 
     project_meta = {
         "name": projectnaam,
         "maatwerk_kasten": maatwerk_kasten_raw,
+        "inventaris": _lees_onderdelen_inventaris(df, plan),
+        "sjabloon": plan.naam,
     }
 
     return onderdelen, g2, h2, kleur, klantregels, scharnieren, lades, project_meta
 
 
+def lees_excel(path):
+    projectnaam = os.path.splitext(os.path.basename(path))[0]
+
+    # één keer openen voor het inmeet-tabblad én het kasten-tabblad.
+    # Het inmeet-tabblad wel helemaal: de onderdelenkolom loopt tot de laatste
+    # regel en de inventariskolommen (_inventaris_kolommen) staan op kopnaam,
+    # niet op een vaste plek; het sjabloon is pas na het inlezen bekend.
+    with pd.ExcelFile(path) as xls:
+        df = pd.read_excel(xls, sheet_name=0, header=None)
+        plan = _sjabloon_voor(df)
+        return _lees_keuken(df, xls, plan.maatwerk_sheet, projectnaam, plan)
+
+
+# ======================================================
+# 🏢 MEERDERE KEUKENS IN ÉÉN WERKBOEK
+# Elk tabblad met een bekend model (frontmodel/materiaal-cel van zijn
+# sjabloon) is een keuken (het eerste tabblad altijd). Kasten staan in
+# "<kasten-tabblad> <keuken>" of "<keuken> <kasten-tabblad>"; het gewone
+# kasten-tabblad hoort bij de eerste keuken. Elk tabblad krijgt zijn eigen
+# sjabloon, dus oude en nieuwe formulieren mogen door elkaar staan.
+# ======================================================
+
+def _is_kasten_sheet(naam):
+    naam = str(naam).upper()
+    return any(sheet in naam for sheet in get_sjablonen().maatwerk_sheets)
+
+
+def _kasten_sheet_voor(keuken, sheetnames, eerste, kasten_sheet=MAATWERK_SHEET):
+    per_naam = {str(n).strip().upper(): n for n in sheetnames}
+    kandidaten = [f"{kasten_sheet} {keuken}", f"{keuken} {kasten_sheet}"]
+    if eerste:
+        kandidaten.append(kasten_sheet)
+    for kandidaat in kandidaten:
+        if kandidaat.strip().upper() in per_naam:
+            return per_naam[kandidaat.strip().upper()]
+    return None
+
+
+def lees_excel_keukens(path):
+    """
+    Leest alle keukens uit één werkboek (één keer geopend).
+    Geeft [(keukennaam, uitkomst zoals lees_excel)] terug; bij één keuken
+    is de uitkomst gelijk aan lees_excel(path).
+    """
+    projectnaam = os.path.splitext(os.path.basename(path))[0]
+
+    with pd.ExcelFile(path) as xls:
+        # één tabblad tegelijk: inlezen, uitlezen, frame weg (grote werkboeken, veel tabbladen)
+        resultaat = []
+        for i, sheet in enumerate(xls.sheet_names):
+            if _is_kasten_sheet(sheet):
+                continue
+            df = pd.read_excel(xls, sheet_name=sheet, header=None)
+            plan = _sjabloon_voor(df)
+            if i > 0 and not bepaal_model(_cel(df, *plan.cellen["frontmodel"]), _cel(df, *plan.cellen["materiaal"])):
+                continue   # hulp-tabblad, geen keuken
+            kasten_sheet = _kasten_sheet_voor(sheet, xls.sheet_names, not resultaat, plan.maatwerk_sheet)
+            resultaat.append((sheet, _lees_keuken(df, xls, kasten_sheet, projectnaam, plan)))
+            del df
+
+    # pas na het laatste tabblad bekend: bij meerdere keukens de tabbladnaam erbij
+    if len(resultaat) > 1:
+        for sheet, uitkomst in resultaat:
+            uitkomst[7]["name"] = f"{projectnaam} - {sheet}"
+    return resultaat
+
+
 # ======================================================
 # 🧮 OFFERTE BEREKENING
 # ======================================================
 
-def bereken_offerte(onderdelen, model, project, kleur, klantregels, scharnieren, lades):
-    info = MODEL_INFO[model]
+def _tel_onderdelen(onderdelen):
+    """Aantal fronten + of er passtukken/plinten en 'ANDERS'-onderdelen in zitten."""
+    fronts = 0
+    heeft_passtuk = heeft_anders = False
+    for o in onderdelen:
+        if o in FRONT_ONDERDELEN:
+            fronts += 1
+        elif o in PASSTUK_ONDERDELEN:
+            heeft_passtuk = True
+        elif "ANDERS" in o:
+            heeft_anders = True
+    return fronts, heeft_passtuk, heeft_anders
+
+
+# Passtukken/plinten en 'ANDERS' op maat prijzen i.p.v. vaste toeslag
+# (TOESLAG_OP_MAAT=1): m² uit de inventaris × m²-prijs van het vlakke model
+# van het materiaal, met dezelfde 40% opslag en marge als bij de kasten.
+# De vaste passtuk-toeslag blijft het minimum; zonder maten geldt die alleen.
+TOESLAG_OP_MAAT = os.getenv("TOESLAG_OP_MAAT", "0") == "1"
+
+
+def _m2_per_categorie(inventaris):
+    m2 = {}
+    for regel in inventaris or []:
+        m2[regel["categorie"]] = m2.get(regel["categorie"], 0.0) + regel["m2"]
+    return m2
+
+
+def bereken_offerte(onderdelen, model, project, kleur, klantregels, scharnieren, lades, vorige_kasten=None, prijstabel=None):
+    pt = prijstabel or huidige_prijstabel()
+    info = pt["MODEL_INFO"][model]
 
     if isinstance(project, dict):
         projectnaam = project.get("name", "")
         maatwerk_kasten_raw = project.get("maatwerk_kasten", [])
+        inventaris = project.get("inventaris") or []
     else:
         projectnaam = project
         maatwerk_kasten_raw = []
+        inventaris = []
 
-    fronts = sum(o in ["DEUR", "LADE", "BEDEKKINGSPANEEL"] for o in onderdelen)
-    heeft_passtuk = any(o in ["PASSTUK", "PLINT"] for o in onderdelen)
-    heeft_anders = any("ANDERS" in o for o in onderdelen)
-
-    passtuk_kosten = info["passtuk"] if heeft_passtuk else 0
-    anders_kosten = info["passtuk"] if heeft_anders else 0
-
-    materiaal_totaal = fronts * info["prijs_per_front"]
-    montage = fronts * MONTAGE_PER_FRONT
-    scharnier_totaal = scharnieren * PRIJS_SCHARNIER
-    lades_totaal = lades * PRIJS_LADE
-
-    totaal_excl_frontdeel = (
-        materiaal_totaal +
-        passtuk_kosten +
-        anders_kosten +
-        montage +
-        INMETEN +
-        VRACHT +
-        scharnier_totaal +
-        lades_totaal
-    )
+    fronts, heeft_passtuk, heeft_anders = _tel_onderdelen(onderdelen)
 
-    maatwerk_regels, maatwerk_totaal_verkoop = _bereken_alle_maatwerk_kasten(maatwerk_kasten_raw)
+    # vaste kosten volgens de prijsregels (prijsregels.py), in hun optelvolgorde
+    posten, totaal_excl_frontdeel = plan_voor(pt).vaste_kosten(
+        model,
+        {
+            "fronts": fronts,
+            "scharnieren": scharnieren,
+            "lades": lades,
+            "heeft_passtuk": heeft_passtuk,
+            "heeft_anders": heeft_anders,
+        },
+        _m2_per_categorie(inventaris) if TOESLAG_OP_MAAT and inventaris else None,
+    )
+    passtuk_kosten = posten.get("toeslag_passtuk", 0)
+    anders_kosten = posten.get("toeslag_anders", 0)
+    materiaal_totaal = posten.get("materiaal_totaal", 0)
+    montage = posten.get("montage", 0)
+    scharnier_totaal = posten.get("scharnier_totaal", 0)
+    lades_totaal = posten.get("lades_totaal", 0)
+
+    maatwerk_regels, maatwerk_totaal_verkoop = _bereken_alle_maatwerk_kasten(
+        maatwerk_kasten_raw, vorige_kasten, pt
+    )
 
     totaal_excl = totaal_excl_frontdeel + maatwerk_totaal_verkoop
     btw = totaal_excl * 0.21
@@ -791,23 +1349,236 @@ def bereken_offerte(onderdelen, model, project, kleur, klantregels, scharnieren,
         "maatwerk_kasten": maatwerk_regels,
         "maatwerk_totaal_verkoop": maatwerk_totaal_verkoop,
         "totaal_excl_frontdeel": totaal_excl_frontdeel,
+        "onderdelen_per_type": inventaris,
+    }
+
+
+def verklaar_offerte(onderdelen, model, project, scharnieren, lades, prijstabel=None):
+    """
+    Uitleg bij bereken_offerte: welke tabel, band, staffel en toeslag elk
+    bedrag gaf. {"vaste_kosten": [{"post", "bedrag", "uitleg"}],
+    "kasten": [{"kolom_index", "titel", "stappen": [...]}]}.
+    """
+    pt = prijstabel or huidige_prijstabel()
+    plan = plan_voor(pt)
+    project = project if isinstance(project, dict) else {}
+    inventaris = project.get("inventaris") or []
+    fronts, heeft_passtuk, heeft_anders = _tel_onderdelen(onderdelen)
+
+    vaste_kosten = []
+    plan.vaste_kosten(
+        model,
+        {
+            "fronts": fronts,
+            "scharnieren": scharnieren,
+            "lades": lades,
+            "heeft_passtuk": heeft_passtuk,
+            "heeft_anders": heeft_anders,
+        },
+        _m2_per_categorie(inventaris) if TOESLAG_OP_MAAT and inventaris else None,
+        uitleg=vaste_kosten,
+    )
+    kasten = [
+        {
+            "kolom_index": kast.get("kolom_index"),
+            "titel": _kast_titel(kast.get("type", "")),
+            "stappen": plan.verklaar_kast(kast),
+        }
+        for kast in project.get("maatwerk_kasten", [])
+    ]
+    return {"vaste_kosten": vaste_kosten, "kasten": kasten}
+
+
+# ======================================================
+# 📊 VERGELIJKING ALLE MODELLEN
+# ======================================================
+
+def vergelijk_modellen(onderdelen, project, scharnieren, lades, prijstabel=None):
+    """
+    Prijst dezelfde onderdelen en maatwerk kasten in één keer voor ELK model
+    uit MODEL_INFO, met hetzelfde gecompileerde plan als bereken_offerte.
+
+    Kasten met een frontmodel krijgen voor de vergelijking het vergeleken
+    model; kasten zonder (bekend) frontmodel blijven zonder fronten/zijden.
+    Corpus, inrichting en m² worden per kast maar één keer bepaald.
+    """
+    pt = prijstabel or huidige_prijstabel()
+    plan = plan_voor(pt)
+    modellen = [m for m in pt["MODEL_INFO"] if m in pt[plan.front_naam]]
+
+    if isinstance(project, dict):
+        maatwerk_kasten_raw = project.get("maatwerk_kasten", [])
+        inventaris = project.get("inventaris") or []
+    else:
+        maatwerk_kasten_raw = []
+        inventaris = []
+
+    fronts, heeft_passtuk, heeft_anders = _tel_onderdelen(onderdelen)
+
+    # vaste kosten per model volgens de prijsregels, zoals in bereken_offerte
+    tellers = {
+        "fronts": fronts,
+        "scharnieren": scharnieren,
+        "lades": lades,
+        "heeft_passtuk": heeft_passtuk,
+        "heeft_anders": heeft_anders,
     }
+    m2 = _m2_per_categorie(inventaris) if TOESLAG_OP_MAAT and inventaris else None
+    totaal_excl_frontdeel = np.array([plan.vaste_kosten(m, tellers, m2)[1] for m in modellen], dtype=float)
+
+    # kasten × modellen: corpus, inrichting en m² per kast één keer
+    delen = [plan.kast_delen(k) for k in maatwerk_kasten_raw]
+    maatwerk_totaal = np.zeros(len(modellen))
+
+    if delen:
+        m2_front = np.array([plan.fronten[m][0] for m in modellen])
+        m2_vlak = np.array([plan.vlak_prijs_model(m) for m in modellen])
+
+        heeft_front = np.array([
+            (k.get("frontmodel") or "").upper() in pt["MODEL_INFO"] for k in maatwerk_kasten_raw
+        ])
+        corpus = np.array([d[0] for d in delen])
+        front_m2 = np.array([d[1] for d in delen])
+        zij_m2 = np.array([d[2] for d in delen])
+
+        front_inkoop = front_m2[:, None] * m2_front[None, :]
+        zij_inkoop = zij_m2[:, None] * m2_vlak[None, :]
+        front_en_zijden = np.where(heeft_front[:, None], front_inkoop + zij_inkoop, 0.0)
+
+        totaal_inkoop = corpus[:, None] + front_en_zijden * plan.opslag
+        verkoop = totaal_inkoop / plan.marge
+
+        # zelfde afronding per kastregel als plan.kast
+        for j in range(len(modellen)):
+            maatwerk_totaal[j] = round(
+                sum(round(v, 2) for v in verkoop[:, j].tolist() if v > 0), 2
+            )
+
+    totaal_excl = totaal_excl_frontdeel + maatwerk_totaal
+    btw = totaal_excl * 0.21
+    totaal_incl = totaal_excl + btw
+
+    return [
+        {
+            "model": m,
+            "materiaal": pt["MODEL_INFO"][m]["materiaal"],
+            "prijs_per_front": pt["MODEL_INFO"][m]["prijs_per_front"],
+            "fronts": fronts,
+            "totaal_excl_frontdeel": float(totaal_excl_frontdeel[j]),
+            "maatwerk_totaal_verkoop": float(maatwerk_totaal[j]),
+            "totaal_excl": float(totaal_excl[j]),
+            "btw": float(btw[j]),
+            "totaal_incl": float(totaal_incl[j]),
+        }
+        for j, m in enumerate(modellen)
+    ]
 
 
 # ======================================================
 # 🧾 TEAMLEADER OFFERTE AANMAKEN
+# Payload-compiler: regels die per tax rate en prijstabel vastliggen
+# (accessoire-stukprijzen, INMETEN/LEVEREN/MONTEREN) worden één keer
+# opgebouwd en daarna gedeeld; per offerte komen alleen aantallen en
+# bedragen erbij. Gedeelde regels nooit muteren, kopiëren met {**regel, ...}.
 # ======================================================
 
-def maak_teamleader_offerte(deal_id, data, mode):
-    url = f"{API_BASE}/quotations.create"
+try:
+    import orjson
+except ImportError:   # valt terug op json (zelfde uitvoer, trager)
+    orjson = None
 
-    model = data["model"]
-    cfg = FRONT_DESCRIPTION_CONFIG.get(model)
-    fronts = data["fronts"]
+# prijzen waar de vaste regels van afhangen (naast het tax rate-id)
+STATISCHE_PRIJZEN = ("INMETEN", "MONTAGE_PER_FRONT", "VRACHT", "PRIJS_SCHARNIER", "PRIJS_LADE")
+MAX_PAYLOAD_SJABLONEN = 32
+
+_PAYLOAD_SJABLONEN = {}
+_PAYLOAD_SJABLONEN_LOCK = threading.Lock()
+
+
+def payload_bytes(payload):
+    """Serialiseert een request-body precies zoals hij naar Teamleader gaat."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _regel(aantal, omschrijving, uitleg, bedrag, tax_rate_21_id, product_id=None):
+    regel = {
+        "quantity": aantal,
+        "description": omschrijving,
+        "extended_description": uitleg,
+        "unit_price": {"amount": bedrag, "tax": "excluding"},
+        "tax_rate_id": tax_rate_21_id,
+    }
+    if product_id:
+        regel["product_id"] = product_id
+    return regel
+
+
+def product_sleutels():
+    """Artikelsleutels die aan een Teamleader-product gekoppeld kunnen worden."""
+    return (
+        list(STATISCHE_PRIJZEN)
+        + ["TOESLAG_PASSTUK", "TOESLAG_ANDERS", "MAATWERK_KAST"]
+        + [f"MODEL_{m}" for m in huidige_prijstabel()["MODEL_INFO"]]
+    )
+
+
+def _product_id(sleutel):
+    # uit geheugen (product_catalogus.py zet dit na elke sync): geen API-call per offerte
+    return huidige_tenant().product_ids.get(sleutel)
+
+
+def _sectie(titel, regels):
+    # sectie-dict altijd nieuw: _bouw_grouped_lines_keukens past de titel aan
+    return {"section": {"title": titel}, "line_items": regels}
+
+
+def _payload_sjablonen(tax_rate_21_id, pt):
+    """
+    Vaste regels per tenant, tax rate en prijzen. De vaste prijzen zelf zijn
+    de vingerafdruk: prijzen_vingerafdruk() over de hele tabel kost per
+    offerte meer dan het opbouwen van de regels.
+    """
+    producten = {naam: _product_id(naam) for naam in STATISCHE_PRIJZEN}
+    sleutel = (
+        (huidige_tenant().naam, tax_rate_21_id)
+        + tuple(pt[naam] for naam in STATISCHE_PRIJZEN)
+        + tuple(producten[naam] for naam in STATISCHE_PRIJZEN)
+    )
+    sjablonen = _PAYLOAD_SJABLONEN.get(sleutel)
+    if sjablonen is not None:
+        return sjablonen
+
+    sjablonen = {
+        "scharnier": _regel(
+            0, "Scharnieren - Softclose", "Prijs per stuk", pt["PRIJS_SCHARNIER"], tax_rate_21_id,
+            producten["PRIJS_SCHARNIER"],
+        ),
+        "lade": _regel(
+            0, "Maatwerk lades - Softclose", "Prijs per stuk (incl. montage)", pt["PRIJS_LADE"], tax_rate_21_id,
+            producten["PRIJS_LADE"],
+        ),
+        "inmeten": _regel(
+            1, "Inmeten", "Inmeten op locatie", pt["INMETEN"], tax_rate_21_id, producten["INMETEN"]
+        ),
+        "montage": _regel(
+            0, "Montage per front", "Inclusief demontage oude fronten & afvoeren",
+            pt["MONTAGE_PER_FRONT"], tax_rate_21_id, producten["MONTAGE_PER_FRONT"],
+        ),
+        "vracht": _regel(
+            1, "Vracht- & verpakkingskosten", "Levering op locatie", pt["VRACHT"], tax_rate_21_id,
+            producten["VRACHT"],
+        ),
+    }
+    with _PAYLOAD_SJABLONEN_LOCK:
+        if len(_PAYLOAD_SJABLONEN) >= MAX_PAYLOAD_SJABLONEN:
+            _PAYLOAD_SJABLONEN.clear()
+        # bij een gelijktijdige eerste offerte wint de eerste; de regels zijn gelijk
+        return _PAYLOAD_SJABLONEN.setdefault(sleutel, sjablonen)
 
-    # ✅ resolve tax rate id (nieuwe TL omgeving)
-    tax_rate_21_id = get_tax_rate_21_id()
 
+def _klantgegevens_regels(data, tax_rate_21_id):
     klantregels = data["klantgegevens"] + ["", "", "", "", ""]
     klanttekst = (
         f"Naam: {klantregels[0]}\r\n"
@@ -816,209 +1587,624 @@ def maak_teamleader_offerte(deal_id, data, mode):
         f"Tel: {klantregels[3]}\r\n"
         f"Email: {klantregels[4]}"
     )
+    return [_regel(1, "Klantgegevens", klanttekst, 0, tax_rate_21_id)]
 
-    grouped_lines = []
 
-    grouped_lines.append({
-        "section": {"title": "KLANTGEGEVENS"},
-        "line_items": [{
-            "quantity": 1,
-            "description": "Klantgegevens",
-            "extended_description": klanttekst,
-            "unit_price": {"amount": 0, "tax": "excluding"},
-            "tax_rate_id": tax_rate_21_id,
-        }],
-    })
+def _maatwerk_regels(data, tax_rate_21_id):
+    product_id = _product_id("MAATWERK_KAST")
+    return [
+        _regel(1, kast["titel"], kast["beschrijving"], kast["verkoop_excl"], tax_rate_21_id, product_id)
+        for kast in data.get("maatwerk_kasten") or []
+    ]
 
-    maatwerk_kasten = data.get("maatwerk_kasten") or []
-    maatwerk_totaal = data.get("maatwerk_totaal_verkoop", 0.0)
-
-    # -----------------------------
-    # PARTICULIER
-    # -----------------------------
-    if mode == "P":
-        tekst = []
-        toevoegingen = []
-
-        if data["toeslag_passtuk"] > 0:
-            toevoegingen.append("inclusief passtukken en/of plinten")
-        if data["toeslag_anders"] > 0:
-            toevoegingen.append("inclusief licht- en/of sierlijsten")
-
-        extra_text = f" ({', '.join(toevoegingen)})" if toevoegingen else ""
-
-        tekst += [
-            f"Aantal fronten: {fronts} fronten{extra_text}",
-            f"Materiaal: {cfg['materiaal']}",
-            f"Frontdikte: {cfg['frontdikte']}",
-            f"Kleur: {data['kleur']}",
-            f"Afwerking: {cfg['afwerking']}",
-            f"Dubbelzijdig in kleur afwerken: {cfg['dubbelzijdig']}",
-            "Inmeten: Ja",
-            "Montage: Ja",
-            "Handgrepen: Te bepalen",
-            "",
-            "Prijs is inclusief:",
-            "- Demontage oude fronten & materialen",
-            "- Inmeten, leveren en montage van de fronten",
-        ]
-
-        if data["toeslag_passtuk"] > 0:
-            tekst.append("- Montage van passtukken en/of plinten")
-        if data["toeslag_anders"] > 0:
-            tekst.append("- Montage van licht- en/of sierlijsten")
-
-        tekst.append("- Afvoeren van oude fronten")
-
-        if data["scharnieren"] > 0:
-            tekst.append(f"- Inclusief vervangen scharnieren ({data['scharnieren']} stuks)")
-        if data["lades"] > 0:
-            tekst.append(f"- Inclusief plaatsen maatwerk lades ({data['lades']} stuks)")
-
-        final = "\r\n".join(tekst)
-
-        keuken_bedrag = round(data["totaal_excl"] - maatwerk_totaal, 2)
-
-        grouped_lines.append({
-            "section": {"title": "KEUKENRENOVATIE"},
-            "line_items": [{
-                "quantity": 1,
-                "description": f"Keukenrenovatie model {model}",
-                "extended_description": final,
-                "unit_price": {"amount": keuken_bedrag, "tax": "excluding"},
-                "tax_rate_id": tax_rate_21_id,
-            }],
-        })
-
-        if maatwerk_kasten:
-            mk_section = {"section": {"title": "MAATWERK KASTEN"}, "line_items": []}
-            for kast in maatwerk_kasten:
-                mk_section["line_items"].append({
-                    "quantity": 1,
-                    "description": kast["titel"],
-                    "extended_description": kast["beschrijving"],
-                    "unit_price": {"amount": kast["verkoop_excl"], "tax": "excluding"},
-                    "tax_rate_id": tax_rate_21_id,
-                })
-            grouped_lines.append(mk_section)
-
-    # -----------------------------
-    # DEALER
-    # -----------------------------
-    else:
-        section = {"section": {"title": "KEUKENRENOVATIE"}, "line_items": []}
-
-        section["line_items"].append({
-            "quantity": fronts,
-            "description": cfg["titel"],
-            "extended_description": (
-                f"Aantal fronten: {fronts}\r\n"
-                f"Materiaal: {cfg['materiaal']}\r\n"
-                f"Frontdikte: {cfg['frontdikte']}\r\n"
-                f"Kleur: {data['kleur']}\r\n"
-                f"Afwerking: {cfg['afwerking']}\r\n"
-                f"Dubbelzijdig in kleur afwerken: {cfg['dubbelzijdig']}\r\n"
-                "Inmeten: Ja\r\n"
-                "Montage: Ja\r\n"
-                "\r\n"
-                "Fronten worden geleverd zonder scharnieren"
-            ),
-            "unit_price": {"amount": data["prijs_per_front"], "tax": "excluding"},
-            "tax_rate_id": tax_rate_21_id,
-        })
-
-        if data["toeslag_passtuk"] > 0:
-            section["line_items"].append({
-                "quantity": 1,
-                "description": "Plinten en/of passtukken",
-                "extended_description": "inclusief montage",
-                "unit_price": {"amount": data["toeslag_passtuk"], "tax": "excluding"},
-                "tax_rate_id": tax_rate_21_id,
-            })
-
-        if data["toeslag_anders"] > 0:
-            section["line_items"].append({
-                "quantity": 1,
-                "description": "Licht- en/of sierlijsten",
-                "extended_description": "inclusief montage",
-                "unit_price": {"amount": data["toeslag_anders"], "tax": "excluding"},
-                "tax_rate_id": tax_rate_21_id,
-            })
-
-        grouped_lines.append(section)
-
-        if maatwerk_kasten:
-            mk_section = {"section": {"title": "MAATWERK KASTEN"}, "line_items": []}
-            for kast in maatwerk_kasten:
-                mk_section["line_items"].append({
-                    "quantity": 1,
-                    "description": kast["titel"],
-                    "extended_description": kast["beschrijving"],
-                    "unit_price": {"amount": kast["verkoop_excl"], "tax": "excluding"},
-                    "tax_rate_id": tax_rate_21_id,
-                })
-            grouped_lines.append(mk_section)
-
-        if data["scharnieren"] > 0 or data["lades"] > 0:
-            acc = {"section": {"title": "ACCESSOIRES"}, "line_items": []}
 
-            if data["scharnieren"] > 0:
-                acc["line_items"].append({
-                    "quantity": data["scharnieren"],
-                    "description": "Scharnieren - Softclose",
-                    "extended_description": "Prijs per stuk",
-                    "unit_price": {"amount": PRIJS_SCHARNIER, "tax": "excluding"},
-                    "tax_rate_id": tax_rate_21_id,
-                })
+def _particulier_regels(data, tax_rate_21_id):
+    """KEUKENRENOVATIE als één regel met de volledige omschrijving."""
+    cfg = FRONT_DESCRIPTION_CONFIG.get(data["model"])
+    fronts = data["fronts"]
+
+    toevoegingen = []
+    if data["toeslag_passtuk"] > 0:
+        toevoegingen.append("inclusief passtukken en/of plinten")
+    if data["toeslag_anders"] > 0:
+        toevoegingen.append("inclusief licht- en/of sierlijsten")
+
+    extra_text = f" ({', '.join(toevoegingen)})" if toevoegingen else ""
+
+    tekst = [
+        f"Aantal fronten: {fronts} fronten{extra_text}",
+        f"Materiaal: {cfg['materiaal']}",
+        f"Frontdikte: {cfg['frontdikte']}",
+        f"Kleur: {data['kleur']}",
+        f"Afwerking: {cfg['afwerking']}",
+        f"Dubbelzijdig in kleur afwerken: {cfg['dubbelzijdig']}",
+        "Inmeten: Ja",
+        "Montage: Ja",
+        "Handgrepen: Te bepalen",
+        "",
+        "Prijs is inclusief:",
+        "- Demontage oude fronten & materialen",
+        "- Inmeten, leveren en montage van de fronten",
+    ]
+
+    if data["toeslag_passtuk"] > 0:
+        tekst.append("- Montage van passtukken en/of plinten")
+    if data["toeslag_anders"] > 0:
+        tekst.append("- Montage van licht- en/of sierlijsten")
+
+    tekst.append("- Afvoeren van oude fronten")
+
+    if data["scharnieren"] > 0:
+        tekst.append(f"- Inclusief vervangen scharnieren ({data['scharnieren']} stuks)")
+    if data["lades"] > 0:
+        tekst.append(f"- Inclusief plaatsen maatwerk lades ({data['lades']} stuks)")
+
+    keuken_bedrag = round(data["totaal_excl"] - data.get("maatwerk_totaal_verkoop", 0.0), 2)
+
+    return [_regel(
+        1, f"Keukenrenovatie model {data['model']}", "\r\n".join(tekst), keuken_bedrag, tax_rate_21_id,
+        _product_id(f"MODEL_{data['model']}"),
+    )]
 
+
+def _dealer_regels(data, tax_rate_21_id):
+    """KEUKENRENOVATIE per front, plus de toeslagen als losse regels."""
+    cfg = FRONT_DESCRIPTION_CONFIG.get(data["model"])
+    fronts = data["fronts"]
+
+    regels = [_regel(
+        fronts,
+        cfg["titel"],
+        (
+            f"Aantal fronten: {fronts}\r\n"
+            f"Materiaal: {cfg['materiaal']}\r\n"
+            f"Frontdikte: {cfg['frontdikte']}\r\n"
+            f"Kleur: {data['kleur']}\r\n"
+            f"Afwerking: {cfg['afwerking']}\r\n"
+            f"Dubbelzijdig in kleur afwerken: {cfg['dubbelzijdig']}\r\n"
+            "Inmeten: Ja\r\n"
+            "Montage: Ja\r\n"
+            "\r\n"
+            "Fronten worden geleverd zonder scharnieren"
+        ),
+        data["prijs_per_front"],
+        tax_rate_21_id,
+        _product_id(f"MODEL_{data['model']}"),
+    )]
+
+    if data["toeslag_passtuk"] > 0:
+        regels.append(_regel(
+            1, "Plinten en/of passtukken", "inclusief montage", data["toeslag_passtuk"], tax_rate_21_id,
+            _product_id("TOESLAG_PASSTUK"),
+        ))
+    if data["toeslag_anders"] > 0:
+        regels.append(_regel(
+            1, "Licht- en/of sierlijsten", "inclusief montage", data["toeslag_anders"], tax_rate_21_id,
+            _product_id("TOESLAG_ANDERS"),
+        ))
+    return regels
+
+
+def _compileer(data, modes, tax_rate_21_id):
+    """grouped_lines per mode; wat P en D gemeen hebben wordt één keer gebouwd."""
+    klant = _klantgegevens_regels(data, tax_rate_21_id)
+    maatwerk = _maatwerk_regels(data, tax_rate_21_id)
+    resultaat = {}
+
+    for mode in modes:
+        if mode == "P":
+            grouped_lines = [
+                _sectie("KLANTGEGEVENS", klant),
+                _sectie("KEUKENRENOVATIE", _particulier_regels(data, tax_rate_21_id)),
+            ]
+            if maatwerk:
+                grouped_lines.append(_sectie("MAATWERK KASTEN", maatwerk))
+        else:
+            sjablonen = _payload_sjablonen(tax_rate_21_id, huidige_prijstabel())
+            fronts = data["fronts"]
+            grouped_lines = [
+                _sectie("KLANTGEGEVENS", klant),
+                _sectie("KEUKENRENOVATIE", _dealer_regels(data, tax_rate_21_id)),
+            ]
+            if maatwerk:
+                grouped_lines.append(_sectie("MAATWERK KASTEN", maatwerk))
+
+            accessoires = []
+            if data["scharnieren"] > 0:
+                accessoires.append({**sjablonen["scharnier"], "quantity": data["scharnieren"]})
             if data["lades"] > 0:
-                acc["line_items"].append({
-                    "quantity": data["lades"],
-                    "description": "Maatwerk lades - Softclose",
-                    "extended_description": "Prijs per stuk (incl. montage)",
-                    "unit_price": {"amount": PRIJS_LADE, "tax": "excluding"},
-                    "tax_rate_id": tax_rate_21_id,
-                })
-
-            grouped_lines.append(acc)
-
-        grouped_lines.append({
-            "section": {"title": "INMETEN, LEVEREN & MONTEREN"},
-            "line_items": [
-                {
-                    "quantity": 1,
-                    "description": "Inmeten",
-                    "extended_description": "Inmeten op locatie",
-                    "unit_price": {"amount": INMETEN, "tax": "excluding"},
-                    "tax_rate_id": tax_rate_21_id,
-                },
-                {
-                    "quantity": fronts,
-                    "description": "Montage per front",
-                    "extended_description": "Inclusief demontage oude fronten & afvoeren",
-                    "unit_price": {"amount": MONTAGE_PER_FRONT, "tax": "excluding"},
-                    "tax_rate_id": tax_rate_21_id,
-                },
-                {
-                    "quantity": 1,
-                    "description": "Vracht- & verpakkingskosten",
-                    "extended_description": "Levering op locatie",
-                    "unit_price": {"amount": VRACHT, "tax": "excluding"},
-                    "tax_rate_id": tax_rate_21_id,
-                },
-            ],
-        })
-
-    payload = {
-        "deal_id": deal_id,
-        "currency": {"code": "EUR", "exchange_rate": 1.0},
-        "grouped_lines": grouped_lines,
-        "text": "\u200b"
-    }
+                accessoires.append({**sjablonen["lade"], "quantity": data["lades"]})
+            if accessoires:
+                grouped_lines.append(_sectie("ACCESSOIRES", accessoires))
+
+            grouped_lines.append(_sectie("INMETEN, LEVEREN & MONTEREN", [
+                sjablonen["inmeten"],
+                {**sjablonen["montage"], "quantity": fronts},
+                sjablonen["vracht"],
+            ]))
+        resultaat[mode] = grouped_lines
+
+    return resultaat
+
+
+def _bouw_grouped_lines(data, mode, tax_rate_21_id):
+    return _compileer(data, (mode,), tax_rate_21_id)[mode]
+
 
-    resp = request_with_auto_refresh("POST", url, json_data=payload)
+def bouw_grouped_lines_p_en_d(data, tax_rate_21_id=None):
+    """Particulier- én dealervariant uit één bereken_offerte-resultaat (voorbeeld)."""
+    return _compileer(data, ("P", "D"), tax_rate_21_id)
+
+
+def offerte_payload(data, mode, deal_id=None, quotation_id=None, grouped_lines=None):
+    """
+    Body voor quotations.create (deal_id) of quotations.update (quotation_id),
+    als de bytes die verstuurd worden.
+    """
+    if grouped_lines is None:
+        grouped_lines = _bouw_grouped_lines(data, mode, get_tax_rate_21_id())
+    payload = {"id": quotation_id} if quotation_id else {"deal_id": deal_id}
+    payload["currency"] = {"code": "EUR", "exchange_rate": 1.0}
+    payload["grouped_lines"] = grouped_lines
+    payload["text"] = "\u200b"
+    return payload_bytes(payload)
+
+
+def _maak_quotation(deal_id, data, mode, dry_run=False, grouped_lines=None):
+    """
+    Maakt de offerte aan in Teamleader en geeft het quotation-id terug.
+    Met dry_run alleen de bytes die verstuurd zouden worden.
+    """
+    body = offerte_payload(data, mode, deal_id=deal_id, grouped_lines=grouped_lines)
+    if dry_run:
+        return body
+
+    resp = request_with_auto_refresh("POST", f"{API_BASE}/quotations.create", json_data=body)
 
     if resp.status_code not in (200, 201):
         raise Exception(f"Offerte NIET aangemaakt: {resp.text}")
 
+    try:
+        return (resp.json().get("data") or {}).get("id")
+    except ValueError:
+        return None
+
+
+def _werk_quotation_bij(quotation_id, data, mode, grouped_lines=None):
+    """
+    Werkt een bestaande offerte in Teamleader bij (quotations.update).
+    Geeft False terug als de offerte daar niet meer bestaat.
+    """
+    body = offerte_payload(data, mode, quotation_id=quotation_id, grouped_lines=grouped_lines)
+    resp = request_with_auto_refresh("POST", f"{API_BASE}/quotations.update", json_data=body)
+
+    if resp.status_code == 404:
+        return False
+    if resp.status_code not in (200, 201, 204):
+        raise Exception(f"Offerte NIET bijgewerkt: {resp.text}")
+
+    return True
+
+
+def maak_teamleader_offerte(deal_id, data, mode, dry_run=False):
+    if dry_run:
+        return _maak_quotation(deal_id, data, mode, dry_run=True)
+    start = time.perf_counter()
+    quotation_id = _maak_quotation(deal_id, data, mode)
+    _archiveer(data, mode, "aangemaakt", deal_id, quotation_id,
+               duur_versturen_ms=(time.perf_counter() - start) * 1000)
     return True
+
+
+def _archiveer(data, mode, status, deal_id, quotation_id=None, keuken=None, prijzen=None,
+               duur_versturen_ms=None):
+    """Legt de verstuurde offerte vast in het lokale archief; mag het versturen nooit breken."""
+    try:
+        archief = get_offerte_archief()
+        if archief is not None:
+            archief.bewaar(
+                huidige_tenant().naam, data, mode, status, deal_id=deal_id, quotation_id=quotation_id,
+                keuken=keuken, prijzen=prijzen or prijzen_vingerafdruk(),
+                duur_versturen_ms=round(duur_versturen_ms, 2) if duur_versturen_ms is not None else None,
+            )
+    except Exception:
+        log.exception("Offerte niet gearchiveerd (%s)", deal_id)
+
+
+# ======================================================
+# 🔁 INCREMENTEEL HERPRIJZEN + OFFERTE BIJWERKEN
+# ======================================================
+
+OFFERTE_STATE_PREFIX = "offerte_state:"     # laatst geprijsde staat per deal (state store)
+OFFERTE_LOCK_PREFIX = "offerte_lock:"       # één verzender per deal (app, API, webhook, replica's)
+OFFERTE_LOCK_TTL_SEC = 120
+
+KOP_VELDEN = ["g2", "h2", "kleur", "klantregels", "scharnieren", "lades"]
+
+
+def json_waarde(val):
+    """Maakt een Excel/pandas-waarde vergelijkbaar en JSON-veilig."""
+    if isinstance(val, (list, tuple)):
+        return [json_waarde(v) for v in val]
+    if isinstance(val, dict):
+        return {k: json_waarde(v) for k, v in val.items()}
+    if isinstance(val, np.generic):
+        val = val.item()
+    if isinstance(val, float) and math.isnan(val):
+        return None
+    return val
+
+
+def maak_parse_state(onderdelen, g2, h2, kleur, klantregels, scharnieren, lades, project):
+    """Bundelt de uitkomst van lees_excel tot één vergelijkbare dict."""
+    return json_waarde({
+        "onderdelen": onderdelen,
+        "g2": g2,
+        "h2": h2,
+        "kleur": kleur,
+        "klantregels": klantregels,
+        "scharnieren": scharnieren,
+        "lades": lades,
+        "project": project.get("name", "") if isinstance(project, dict) else project,
+        "maatwerk_kasten": project.get("maatwerk_kasten", []) if isinstance(project, dict) else [],
+        "inventaris": project.get("inventaris", []) if isinstance(project, dict) else [],
+        "sjabloon": project.get("sjabloon") if isinstance(project, dict) else None,
+    })
+
+
+# omhoog bij elke wijziging in wat lees_excel/maak_parse_state oplevert
+# (v4: met "sjabloon", v3: "inventaris", v2: "keukens")
+PARSE_VERSIE = 4
+
+
+def parse_vingerafdruk():
+    """Parserversie + geladen sjablonen; hoort in de sleutel van elke parse-cache."""
+    return f"v{PARSE_VERSIE}|{get_sjablonen().vingerafdruk}"
+
+
+def prijzen_vingerafdruk(prijstabel=None):
+    """Hash van de prijstabellen; bij een prijswijziging wordt alles opnieuw geprijsd."""
+    pt = prijstabel or huidige_prijstabel()
+    tekst = json.dumps(pt, sort_keys=True) + ("|toeslag_op_maat" if TOESLAG_OP_MAAT else "")
+    if PRIJSREGELS:
+        tekst += "|regels:" + REGELS_VINGERAFDRUK
+    return hashlib.sha1(tekst.encode()).hexdigest()
+
+
+def laad_offerte_state(deal_id):
+    """Laatst geprijsde staat van een deal, of None."""
+    return get_state_store().get_json(huidige_tenant().sleutel(OFFERTE_STATE_PREFIX + str(deal_id).strip()))
+
+
+def _bewaar_offerte_state(deal_id, state):
+    get_state_store().set_json(huidige_tenant().sleutel(OFFERTE_STATE_PREFIX + str(deal_id).strip()), state)
+
+
+@contextmanager
+def deal_lock(deal_id):
+    """
+    Lezen van de offerte-state → aanmaken/bijwerken → state bewaren, voor maar
+    één verzender per deal tegelijk (zelfde patroon als _vernieuw_access_token).
+    """
+    store = get_state_store()
+    sleutel = huidige_tenant().sleutel(OFFERTE_LOCK_PREFIX + str(deal_id).strip())
+    lock_id = f"{os.getpid()}-{threading.get_ident()}-{time.time()}"
+
+    deadline = time.time() + OFFERTE_LOCK_TTL_SEC
+    while not store.compare_and_set(sleutel, None, lock_id, OFFERTE_LOCK_TTL_SEC):
+        if time.time() > deadline:
+            raise Exception(f"Offerte voor deal '{deal_id}' wordt al verstuurd; probeer het zo opnieuw.")
+        time.sleep(0.2)
+    try:
+        yield
+    finally:
+        store.compare_and_set(sleutel, lock_id, None)
+
+
+def vergelijk_parse(oud, nieuw):
+    """
+    Verschil tussen twee parse-states (zie maak_parse_state):
+    onderdelen, kopvelden en elke kolom van MAATWERK KASTEN.
+    """
+    oude_kasten = {k["kolom_index"]: k for k in (oud or {}).get("maatwerk_kasten", [])}
+    nieuwe_kasten = {k["kolom_index"]: k for k in nieuw.get("maatwerk_kasten", [])}
+
+    verschil = {
+        "onderdelen": (
+            (oud or {}).get("onderdelen") != nieuw.get("onderdelen")
+            or (oud or {}).get("inventaris", []) != nieuw.get("inventaris", [])
+        ),
+        "kop": [v for v in KOP_VELDEN if (oud or {}).get(v) != nieuw.get(v)],
+        "kasten_nieuw": sorted(set(nieuwe_kasten) - set(oude_kasten)),
+        "kasten_verwijderd": sorted(set(oude_kasten) - set(nieuwe_kasten)),
+        "kasten_gewijzigd": sorted(
+            c for c in set(oude_kasten) & set(nieuwe_kasten)
+            if oude_kasten[c] != nieuwe_kasten[c]
+        ),
+    }
+    verschil["gewijzigd"] = bool(
+        verschil["onderdelen"] or verschil["kop"] or verschil["kasten_nieuw"]
+        or verschil["kasten_verwijderd"] or verschil["kasten_gewijzigd"]
+    )
+    return verschil
+
+
+def bereken_offerte_incrementeel(parse_state, model, vorige_state=None, prijstabel=None):
+    """
+    bereken_offerte op basis van een parse-state, waarbij alleen kasten die
+    t.o.v. vorige_state gewijzigd zijn opnieuw geprijsd worden.
+    Geeft (data, verschil) terug.
+    """
+    start = time.perf_counter()
+    vorige_kasten = {}
+    if vorige_state and vorige_state.get("prijzen") == prijzen_vingerafdruk(prijstabel):
+        vorige_kasten = {
+            k["raw"]["kolom_index"]: k for k in vorige_state.get("kasten", [])
+        }
+
+    project = {
+        "name": parse_state["project"],
+        "maatwerk_kasten": parse_state["maatwerk_kasten"],
+        "inventaris": parse_state.get("inventaris", []),
+    }
+    data = bereken_offerte(
+        parse_state["onderdelen"],
+        model,
+        project,
+        parse_state["kleur"],
+        parse_state["klantregels"],
+        parse_state["scharnieren"],
+        parse_state["lades"],
+        vorige_kasten=vorige_kasten,
+        prijstabel=prijstabel,
+    )
+    data["duur_prijzen_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    verschil = vergelijk_parse((vorige_state or {}).get("parse"), parse_state)
+    return data, verschil
+
+
+def verstuur_offerte(deal_id, data, mode, parse_state, dry_run=False, forceer=False):
+    """
+    Maakt de offerte aan of werkt de vorige offerte van deze deal bij,
+    en bewaart de geprijsde staat voor de volgende keer.
+    Geeft "aangemaakt", "bijgewerkt" of "ongewijzigd" terug; met dry_run
+    de bytes van de create/update die verstuurd zou worden (None als er
+    niets te versturen is), zonder Teamleader of de state aan te raken.
+    Met forceer wordt de offerte ook zonder wijzigingen opnieuw verstuurd.
+    """
+    if dry_run:
+        return _verstuur_offerte(deal_id, data, mode, parse_state, True, forceer)
+    with deal_lock(deal_id):
+        return _verstuur_offerte(deal_id, data, mode, parse_state, False, forceer)
+
+
+def _quotation_bestaat(quotation_id):
+    resp = request_with_auto_refresh("POST", f"{API_BASE}/quotations.info", json_data={"id": quotation_id})
+    if resp.status_code == 404:
+        return False
+    if resp.status_code != 200:
+        raise Exception(f"Offerte niet op te vragen: {resp.text}")
+    return True
+
+
+def _verstuur_offerte(deal_id, data, mode, parse_state, dry_run, forceer):
+    vorige = laad_offerte_state(deal_id)
+    quotation_id = (vorige or {}).get("quotation_id")
+
+    status = None
+    if quotation_id:
+        ongewijzigd = (
+            not forceer
+            and vorige.get("mode") == mode
+            and vorige.get("model") == data["model"]
+            and vorige.get("prijzen") == prijzen_vingerafdruk()
+            and not vergelijk_parse(vorige.get("parse"), parse_state)["gewijzigd"]
+        )
+        if ongewijzigd and dry_run:
+            return None
+        # de offerte-state verloopt niet: in Teamleader verwijderd = opnieuw aanmaken
+        if ongewijzigd and _quotation_bestaat(quotation_id):
+            return "ongewijzigd"
+        if dry_run:
+            return offerte_payload(data, mode, quotation_id=quotation_id)
+        start = time.perf_counter()
+        if not ongewijzigd and _werk_quotation_bij(quotation_id, data, mode):
+            status = "bijgewerkt"
+
+    if status is None:
+        if dry_run:
+            return _maak_quotation(deal_id, data, mode, dry_run=True)
+        start = time.perf_counter()
+        quotation_id = _maak_quotation(deal_id, data, mode)
+        status = "aangemaakt"
+    duur_ms = (time.perf_counter() - start) * 1000
+
+    raw_per_kolom = {k["kolom_index"]: k for k in parse_state["maatwerk_kasten"]}
+    kasten = [
+        {"raw": raw_per_kolom[res["kolom_index"]], "res": res}
+        for res in data.get("maatwerk_kasten", [])
+        if res.get("kolom_index") in raw_per_kolom
+    ]
+    prijzen = prijzen_vingerafdruk()
+    _bewaar_offerte_state(deal_id, {
+        "deal_id": deal_id,
+        "quotation_id": quotation_id,
+        "mode": mode,
+        "model": data["model"],
+        "prijzen": prijzen,
+        "parse": parse_state,
+        "kasten": kasten,
+    })
+    _archiveer(data, mode, status, deal_id, quotation_id, prijzen=prijzen, duur_versturen_ms=duur_ms)
+    return status
+
+
+# ======================================================
+# 🏢 MEERDERE KEUKENS PRIJZEN + VERSTUREN
+# ======================================================
+
+# vanaf zoveel keukens over processen verdelen; daaronder kost het
+# overzetten naar de processen meer dan het prijzen zelf
+KEUKENS_PARALLEL_VANAF = int(os.getenv("KEUKENS_PARALLEL_VANAF", "8"))
+KEUKENS_WORKERS = int(os.getenv("KEUKENS_WORKERS", str(os.cpu_count() or 2)))
+MAX_KEUKENS_POOLS = 4   # één pool per prijstabel (tenant / prijswijziging)
+
+_KEUKENS_POOLS = {}
+_KEUKENS_POOLS_LOCK = threading.Lock()
+_KEUKENS_PRIJSTABEL = None   # per worker-proces gezet door _init_keukens_worker
+
+
+def _prijs_keuken(parse_state, model, prijstabel):
+    model = model or bepaal_model(parse_state["g2"], parse_state["h2"])
+    if model not in prijstabel["MODEL_INFO"]:
+        raise ValueError(
+            f"Onbekend model in '{parse_state['project']}' "
+            f"(G2='{parse_state['g2']}', H2='{parse_state['h2']}')."
+        )
+    data, _ = bereken_offerte_incrementeel(parse_state, model, prijstabel=prijstabel)
+    return data
+
+
+def _init_keukens_worker(prijstabel):
+    # één keer per proces: plan_voor compileert dan ook maar één keer per worker
+    global _KEUKENS_PRIJSTABEL
+    _KEUKENS_PRIJSTABEL = prijstabel
+
+
+def _prijs_keuken_in_worker(parse_state, model):
+    return _prijs_keuken(parse_state, model, _KEUKENS_PRIJSTABEL)
+
+
+def _keukens_pool(prijstabel):
+    """
+    Blijvende process pool per prijstabel; de tabel gaat één keer per worker
+    mee (initializer), niet met elke taak. spawn: geen fork van een proces
+    met threads (API, Streamlit).
+    """
+    sleutel = prijzen_vingerafdruk(prijstabel)
+    with _KEUKENS_POOLS_LOCK:
+        pool = _KEUKENS_POOLS.get(sleutel)
+        if pool is None:
+            if len(_KEUKENS_POOLS) >= MAX_KEUKENS_POOLS:
+                _KEUKENS_POOLS.pop(next(iter(_KEUKENS_POOLS))).shutdown(wait=False)
+            import multiprocessing
+            pool = ProcessPoolExecutor(
+                max_workers=KEUKENS_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_keukens_worker, initargs=(prijstabel,),
+            )
+            _KEUKENS_POOLS[sleutel] = pool
+        return pool
+
+
+def bereken_offertes_keukens(keukens, model=None, workers=None):
+    """
+    Prijst elke keuken ([{"keuken", "parse"}]) met bereken_offerte; bij veel
+    keukens parallel over processen (workers=1: altijd in dit proces).
+    Zonder model per keuken uit G2/H2.
+    Geeft [{"keuken", "model", "data"}] in dezelfde volgorde terug.
+    """
+    parse_states = [k["parse"] for k in keukens]
+    pt = huidige_prijstabel()
+    if len(parse_states) >= KEUKENS_PARALLEL_VANAF and workers != 1:
+        n = len(parse_states)
+        datas = list(_keukens_pool(pt).map(_prijs_keuken_in_worker, parse_states, [model] * n))
+    else:
+        datas = [_prijs_keuken(p, model, pt) for p in parse_states]
+
+    return [
+        {"keuken": k["keuken"], "model": data["model"], "data": data}
+        for k, data in zip(keukens, datas)
+    ]
+
+
+def _bouw_grouped_lines_keukens(eenheden, mode, tax_rate_21_id):
+    """Eén offerte met per keuken eigen secties; klantgegevens één keer bovenaan."""
+    grouped_lines = []
+    for i, eenheid in enumerate(eenheden):
+        for groep in _bouw_grouped_lines(eenheid["data"], mode, tax_rate_21_id):
+            titel = groep["section"]["title"]
+            if titel == "KLANTGEGEVENS":
+                if i > 0:
+                    continue
+            else:
+                groep["section"]["title"] = f"{eenheid['keuken']} — {titel}"
+            grouped_lines.append(groep)
+    return grouped_lines
+
+
+def maak_teamleader_offerte_keukens(deal_id, eenheden, mode, dry_run=False, forceer=False):
+    """
+    Eén offerte voor alle keukens ([{"keuken", "data", "parse"}]), net als
+    verstuur_offerte: aanmaken, of de vorige offerte van de deal bijwerken.
+    Geeft "aangemaakt", "bijgewerkt" of "ongewijzigd" terug, of met dry_run
+    de bytes die verstuurd zouden worden (None als er niets te versturen is).
+    """
+    if dry_run:
+        return _verstuur_offerte_keukens(deal_id, eenheden, mode, True, forceer)
+    with deal_lock(deal_id):
+        return _verstuur_offerte_keukens(deal_id, eenheden, mode, False, forceer)
+
+
+def _verstuur_offerte_keukens(deal_id, eenheden, mode, dry_run, forceer):
+    vorige = laad_offerte_state(deal_id) or {}
+    quotation_id = vorige.get("quotation_id")
+    prijzen = prijzen_vingerafdruk()
+    keukens = [
+        {"keuken": e["keuken"], "model": e["data"]["model"], "parse": e.get("parse")}
+        for e in eenheden
+    ]
+
+    ongewijzigd = (
+        quotation_id and not forceer
+        and vorige.get("mode") == mode
+        and vorige.get("prijzen") == prijzen
+        and vorige.get("keukens") == keukens
+    )
+    if ongewijzigd and dry_run:
+        return None
+    if ongewijzigd and _quotation_bestaat(quotation_id):
+        return "ongewijzigd"
+
+    grouped_lines = _bouw_grouped_lines_keukens(eenheden, mode, get_tax_rate_21_id())
+    if dry_run:
+        if quotation_id:
+            return offerte_payload(None, mode, quotation_id=quotation_id, grouped_lines=grouped_lines)
+        return offerte_payload(None, mode, deal_id=deal_id, grouped_lines=grouped_lines)
+
+    start = time.perf_counter()
+    if quotation_id and not ongewijzigd and _werk_quotation_bij(quotation_id, None, mode, grouped_lines):
+        status = "bijgewerkt"
+    else:
+        quotation_id = _maak_quotation(deal_id, None, mode, grouped_lines=grouped_lines)
+        status = "aangemaakt"
+    duur_ms = (time.perf_counter() - start) * 1000
+
+    _bewaar_offerte_state(deal_id, {
+        "deal_id": deal_id,
+        "quotation_id": quotation_id,
+        "mode": mode,
+        "prijzen": prijzen,
+        "keukens": keukens,
+    })
+    for eenheid in eenheden:
+        _archiveer(eenheid["data"], mode, status, deal_id, quotation_id, keuken=eenheid["keuken"],
+                   prijzen=prijzen, duur_versturen_ms=duur_ms)
+    return status
+
+
+def verstuur_offertes_per_deal(eenheden, deals, mode):
+    """
+    Aparte offerte per keuken: deals = {keuken: deal_id}. Keukens zonder deal
+    worden overgeslagen. Geeft {keuken: status van verstuur_offerte} terug.
+    """
+    te_versturen = [e for e in eenheden if deals.get(e["keuken"])]
+    if not te_versturen:
+        return {}
+
+    # de scheduler bewaakt de rate limit; threads vangen alleen de latency op
+    with ThreadPoolExecutor(max_workers=min(4, len(te_versturen))) as pool:
+        statussen = pool.map(
+            in_context(lambda e: verstuur_offerte(deals[e["keuken"]], e["data"], mode, e["parse"])),
+            te_versturen,
+        )
+        return {e["keuken"]: status for e, status in zip(te_versturen, statussen)}
@@ -0,0 +1,235 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from state_store import state_pad
+
+# ======================================================
+# 🗃️ OFFERTE-ARCHIEF — ELKE VERSTUURDE OFFERTE LOKAAL
+# Append-only SQLite (WAL): één rij per offerte (kop + totalen + timing)
+# en één rij per maatwerk kast. De aggregaties lopen over een covering
+# index (tenant, datum, model, mode, totaal_excl, ...), zodat SQLite alleen
+# die "kolommen" leest en niet de hele tabel.
+# Standaard in STATE_DIR; OFFERTE_ARCHIEF="" zet het archief uit.
+# ======================================================
+
+OFFERTE_ARCHIEF = os.getenv("OFFERTE_ARCHIEF")
+if OFFERTE_ARCHIEF is None:
+    OFFERTE_ARCHIEF = state_pad("offerte_archief.sqlite3")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS offertes (
+        id INTEGER PRIMARY KEY,
+        tenant TEXT NOT NULL,
+        datum TEXT NOT NULL,
+        maand TEXT NOT NULL,
+        kwartaal TEXT NOT NULL,
+        tijdstip REAL NOT NULL,
+        deal_id TEXT,
+        quotation_id TEXT,
+        keuken TEXT,
+        status TEXT,
+        mode TEXT,
+        model TEXT,
+        materiaal TEXT,
+        project TEXT,
+        kleur TEXT,
+        fronts INTEGER,
+        scharnieren INTEGER,
+        lades INTEGER,
+        kasten INTEGER,
+        toeslag_passtuk REAL,
+        toeslag_anders REAL,
+        totaal_excl_frontdeel REAL,
+        maatwerk_totaal REAL,
+        totaal_excl REAL,
+        btw REAL,
+        totaal_incl REAL,
+        prijzen TEXT,
+        duur_prijzen_ms REAL,
+        duur_versturen_ms REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS offerte_kasten (
+        offerte_id INTEGER NOT NULL,
+        kolom_index INTEGER,
+        titel TEXT,
+        totaal_inkoop REAL,
+        verkoop_excl REAL
+    )""",
+    # covering index voor de dashboard-aggregaties
+    """CREATE INDEX IF NOT EXISTS offertes_aggregaat ON offertes (
+        tenant, datum, maand, kwartaal, model, mode, status, materiaal,
+        totaal_excl, maatwerk_totaal, fronts, kasten
+    )""",
+    "CREATE INDEX IF NOT EXISTS offertes_deal ON offertes (tenant, deal_id)",
+    "CREATE INDEX IF NOT EXISTS offerte_kasten_offerte ON offerte_kasten (offerte_id)",
+]
+
+# groeperen kan alleen op deze kolommen/afleidingen (geen vrije SQL);
+# maand en kwartaal staan als kolom in de index, niet als berekening per rij
+GROEP_KOLOMMEN = {
+    "model": "model",
+    "mode": "mode",
+    "status": "status",
+    "materiaal": "materiaal",
+    "dag": "datum",
+    "maand": "maand",
+    "kwartaal": "kwartaal",
+    "jaar": "substr(maand, 1, 4)",
+}
+
+
+class OfferteArchief:
+    """Eén SQLite-bestand; een verbinding per thread, zoals SqliteStore."""
+
+    def __init__(self, pad=OFFERTE_ARCHIEF):
+        self.pad = pad
+        self._lokaal = threading.local()
+        os.makedirs(os.path.dirname(pad) or ".", exist_ok=True)
+        con = self._con()
+        con.execute("PRAGMA journal_mode=WAL")
+        for sql in SCHEMA:
+            con.execute(sql)
+
+    def _con(self):
+        con = getattr(self._lokaal, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.pad, timeout=30, isolation_level=None)
+            con.row_factory = sqlite3.Row
+            self._lokaal.con = con
+        return con
+
+    # -----------------------------
+    # SCHRIJVEN
+    # -----------------------------
+
+    def bewaar(self, tenant, data, mode, status, deal_id=None, quotation_id=None, keuken=None,
+               prijzen=None, duur_versturen_ms=None):
+        """Voegt één geprijsde offerte (bereken_offerte-resultaat) toe; geeft het id terug."""
+        nu = time.time()
+        dag = datetime.fromtimestamp(nu)
+        kasten = data.get("maatwerk_kasten") or []
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = con.execute(
+                """INSERT INTO offertes (
+                    tenant, datum, maand, kwartaal, tijdstip, deal_id, quotation_id, keuken, status, mode, model,
+                    materiaal, project, kleur, fronts, scharnieren, lades, kasten, toeslag_passtuk,
+                    toeslag_anders, totaal_excl_frontdeel, maatwerk_totaal, totaal_excl, btw,
+                    totaal_incl, prijzen, duur_prijzen_ms, duur_versturen_ms
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    tenant, dag.strftime("%Y-%m-%d"), dag.strftime("%Y-%m"),
+                    f"{dag.year}-Q{(dag.month + 2) // 3}", nu,
+                    deal_id, quotation_id, keuken, status, mode, data.get("model"),
+                    data.get("materiaal"), data.get("project"), data.get("kleur"),
+                    data.get("fronts"), data.get("scharnieren"), data.get("lades"), len(kasten),
+                    data.get("toeslag_passtuk"), data.get("toeslag_anders"),
+                    data.get("totaal_excl_frontdeel"), data.get("maatwerk_totaal_verkoop"),
+                    data.get("totaal_excl"), data.get("btw"), data.get("totaal_incl"),
+                    prijzen, data.get("duur_prijzen_ms"), duur_versturen_ms,
+                ),
+            )
+            offerte_id = cursor.lastrowid
+            con.executemany(
+                "INSERT INTO offerte_kasten (offerte_id, kolom_index, titel, totaal_inkoop, verkoop_excl) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (offerte_id, k.get("kolom_index"), k.get("titel"), k.get("totaal_inkoop"), k.get("verkoop_excl"))
+                    for k in kasten
+                ],
+            )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return offerte_id
+
+    # -----------------------------
+    # LEZEN
+    # -----------------------------
+
+    @staticmethod
+    def _filter(tenant, van=None, tot=None, mode=None, model=None):
+        # tenant altijd eerst: dat is de eerste kolom van de index
+        waar, params = ["tenant = ?"], [tenant]
+        if van:
+            waar.append("datum >= ?")
+            params.append(str(van))
+        if tot:
+            waar.append("datum <= ?")
+            params.append(str(tot))
+        if mode:
+            waar.append("mode = ?")
+            params.append(mode)
+        if model:
+            waar.append("model = ?")
+            params.append(model)
+        return " AND ".join(waar), params
+
+    def aggregeer(self, tenant, groep=("model",), van=None, tot=None, mode=None, model=None):
+        """
+        Aantal, som en gemiddelde per groep (zie GROEP_KOLOMMEN), bv.
+        groep=("kwartaal", "model") voor de gemiddelde keukenwaarde per
+        model per kwartaal. van/tot zijn datums (JJJJ-MM-DD, inclusief).
+        """
+        onbekend = [g for g in groep if g not in GROEP_KOLOMMEN]
+        if onbekend:
+            raise ValueError(
+                f"Onbekende groepering {', '.join(onbekend)} (kies uit {', '.join(GROEP_KOLOMMEN)})."
+            )
+        waar, params = self._filter(tenant, van, tot, mode, model)
+        kolommen = [f"{GROEP_KOLOMMEN[g]} AS {g}" for g in groep]
+        sql = (
+            f"SELECT {', '.join(kolommen + [''])}"
+            "COUNT(*) AS aantal, "
+            "ROUND(SUM(totaal_excl), 2) AS som_totaal_excl, "
+            "ROUND(AVG(totaal_excl), 2) AS gem_totaal_excl, "
+            "ROUND(AVG(maatwerk_totaal), 2) AS gem_maatwerk, "
+            "ROUND(AVG(fronts), 1) AS gem_fronten, "
+            "ROUND(AVG(kasten), 1) AS gem_kasten "
+            f"FROM offertes WHERE {waar}"
+        )
+        if groep:
+            volgorde = ", ".join(str(i + 1) for i in range(len(groep)))
+            sql += f" GROUP BY {volgorde} ORDER BY {volgorde}"
+        return [dict(r) for r in self._con().execute(sql, params)]
+
+    def offertes(self, tenant, deal_id=None, van=None, tot=None, limiet=100):
+        """Laatste offertes (nieuwste eerst), optioneel voor één deal."""
+        waar, params = self._filter(tenant, van, tot)
+        if deal_id:
+            waar += " AND deal_id = ?"
+            params.append(str(deal_id))
+        rijen = self._con().execute(
+            f"SELECT * FROM offertes WHERE {waar} ORDER BY tijdstip DESC LIMIT ?", params + [int(limiet)]
+        )
+        return [dict(r) for r in rijen]
+
+    def kasten(self, tenant, offerte_id):
+        """Kastregels van één offerte (alleen binnen de eigen tenant)."""
+        rijen = self._con().execute(
+            "SELECT k.kolom_index, k.titel, k.totaal_inkoop, k.verkoop_excl "
+            "FROM offerte_kasten k JOIN offertes o ON o.id = k.offerte_id "
+            "WHERE k.offerte_id = ? AND o.tenant = ? ORDER BY k.kolom_index",
+            (offerte_id, tenant),
+        )
+        return [dict(r) for r in rijen]
+
+
+_ARCHIEF = None
+_ARCHIEF_LOCK = threading.Lock()
+
+
+def get_offerte_archief():
+    """Het archief van dit proces, of None als OFFERTE_ARCHIEF leeg is."""
+    global _ARCHIEF
+    if not OFFERTE_ARCHIEF:
+        return None
+    with _ARCHIEF_LOCK:
+        if _ARCHIEF is None:
+            _ARCHIEF = OfferteArchief()
+        return _ARCHIEF
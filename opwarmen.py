@@ -0,0 +1,124 @@
+import io
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+import inmeetverwerker_hellofront as hf
+import tenants
+
+# ======================================================
+# 🔥 OPWARMEN BIJ HET STARTEN VAN DE CONTAINER
+# Na een deploy of scale-from-zero betaalt anders de eerste offerte voor:
+# openpyxl laden, prijstabellen samenstellen, de eerste OAuth-refresh,
+# taxRates.list en koude TLS-verbindingen. Dat gebeurt nu in een thread
+# bij de start; /ready (api.py) meldt pas "klaar" als alles gedaan is.
+# OPWARMEN=0 slaat het over; OPWARMEN_STRIKT=1 meldt alleen klaar als
+# geen enkele stap mislukt is (bv. ontbrekende refresh token).
+# ======================================================
+
+OPWARMEN = os.getenv("OPWARMEN", "1") == "1"
+OPWARMEN_STRIKT = os.getenv("OPWARMEN_STRIKT", "0") == "1"
+
+log = logging.getLogger(__name__)
+
+
+def warm_excel():
+    """Leest een mini-werkboek: laadt openpyxl en het Excel-pad van pandas."""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    wb.active["G2"] = "opwarmen"
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    with pd.ExcelFile(buffer) as xls:
+        pd.read_excel(xls, sheet_name=0, header=None)
+    return True
+
+
+class Opwarmer:
+    """Voert de opwarmstappen één keer uit in een achtergrondthread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self.klaar = threading.Event()
+        self.stappen = {}
+        self.duur_sec = None
+
+    def _stap(self, naam, fn):
+        start = time.perf_counter()
+        status, fout = "ok", None
+        try:
+            fn()
+        except Exception as e:
+            status, fout = "mislukt", str(e)
+        with self._lock:
+            self.stappen[naam] = {"status": status, "ms": round((time.perf_counter() - start) * 1000, 1)}
+            if fout:
+                self.stappen[naam]["fout"] = fout
+
+    def _overgeslagen(self, naam, reden):
+        with self._lock:
+            self.stappen[naam] = {"status": "overgeslagen", "reden": reden}
+
+    def _opwarmen(self, extra_stappen):
+        start = time.perf_counter()
+        self._stap("excel", warm_excel)
+
+        for naam in tenants.tenant_namen():
+            with tenants.gebruik_tenant(naam) as tenant:
+                self._stap(f"{naam}:prijstabel", lambda: hf.prijzen_vingerafdruk(hf.huidige_prijstabel()))
+                if not (tenant.client_id and tenant.client_secret):
+                    self._overgeslagen(f"{naam}:token", f"{tenant.env_prefix}CLIENT_ID/CLIENT_SECRET ontbreken")
+                    continue
+                self._stap(f"{naam}:token", hf.get_access_token)
+                self._stap(f"{naam}:tax_rate", hf.get_tax_rate_21_id)
+                # TLS naar de API openen in de pool van de tenant (telt niet mee voor het rate limit)
+                self._stap(f"{naam}:verbinding", lambda: tenant.session.head(hf.API_BASE, timeout=10))
+
+        for naam, fn in (extra_stappen or {}).items():
+            self._stap(naam, fn)
+
+        self.duur_sec = round(time.perf_counter() - start, 2)
+        self.klaar.set()
+        mislukt = [n for n, s in self.stappen.items() if s["status"] == "mislukt"]
+        if mislukt:
+            log.warning("Opwarmen klaar in %s s (mislukt: %s)", self.duur_sec, ", ".join(mislukt))
+        else:
+            log.info("Opwarmen klaar in %s s", self.duur_sec)
+
+    def start(self, extra_stappen=None):
+        """Start het opwarmen (één keer per proces). extra_stappen: {naam: fn}."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            if not OPWARMEN:
+                self.klaar.set()
+                self._thread = False
+                return
+            self._thread = threading.Thread(
+                target=self._opwarmen, args=(extra_stappen,), name="opwarmen", daemon=True
+            )
+            self._thread.start()
+
+    def is_klaar(self):
+        if not self.klaar.is_set():
+            return False
+        if OPWARMEN_STRIKT:
+            return all(s["status"] != "mislukt" for s in self.stappen.values())
+        return True
+
+    def status(self):
+        with self._lock:
+            return {
+                "klaar": self.is_klaar(),
+                "duur_sec": self.duur_sec,
+                "stappen": dict(self.stappen),
+            }
+
+
+opwarmer = Opwarmer()
@@ -0,0 +1,110 @@
+import os
+import time
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import tenants
+from offerte_archief import GROEP_KOLOMMEN, get_offerte_archief
+
+# ======================================================
+# 📊 OFFERTE-ARCHIEF — DASHBOARD
+# Cijfers uit het lokale archief (offerte_archief.py), niet uit Teamleader.
+# Alleen voor beheer: open eerst de app met ?admin=<ADMIN_TOKEN>.
+# ======================================================
+
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+st.set_page_config(page_title="Hoken Studio – Offerte-archief", layout="wide")
+st.title("Offerte-archief")
+
+is_admin = st.session_state.get("is_admin") or (
+    bool(ADMIN_TOKEN) and st.query_params.get("admin") == ADMIN_TOKEN
+)
+if not is_admin:
+    st.warning("Alleen voor beheer.")
+    st.stop()
+
+archief = get_offerte_archief()
+if archief is None:
+    st.info("Het offerte-archief staat uit (OFFERTE_ARCHIEF).")
+    st.stop()
+
+tenant = tenants.STANDAARD_TENANT
+if len(tenants.tenant_namen()) > 1:
+    tenant = st.selectbox("Teamleader-account", tenants.tenant_namen())
+
+# ======================================================
+# FILTERS
+# ======================================================
+kolom_periode, kolom_groep, kolom_mode = st.columns([2, 2, 1])
+vandaag = date.today()
+periode = kolom_periode.date_input(
+    "Periode", (date(vandaag.year, 3 * ((vandaag.month - 1) // 3) + 1, 1), vandaag)
+)
+groep = kolom_groep.multiselect("Groeperen op", list(GROEP_KOLOMMEN), default=["model"])
+soort = kolom_mode.selectbox("Soort", ["Alle", "Particulier", "Dealer"])
+
+van, tot = (periode if len(periode) == 2 else (periode[0], periode[0])) if periode else (None, None)
+mode = {"Particulier": "P", "Dealer": "D"}.get(soort)
+
+# ======================================================
+# CIJFERS
+# ======================================================
+start = time.perf_counter()
+totaal = archief.aggregeer(tenant, (), van, tot, mode)[0]
+rijen = archief.aggregeer(tenant, groep, van, tot, mode) if groep else []
+duur_ms = (time.perf_counter() - start) * 1000
+
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Offertes", totaal["aantal"])
+m2.metric("Totaal excl. btw", f"€ {totaal['som_totaal_excl'] or 0:.0f}")
+m3.metric("Gem. keukenwaarde", f"€ {totaal['gem_totaal_excl'] or 0:.2f}")
+m4.metric("Gem. maatwerk", f"€ {totaal['gem_maatwerk'] or 0:.2f}")
+
+if rijen:
+    df = pd.DataFrame(rijen)
+    if len(groep) == 1:
+        st.bar_chart(df.set_index(groep[0])["gem_totaal_excl"])
+    elif len(groep) == 2:
+        st.bar_chart(df.pivot(index=groep[0], columns=groep[1], values="gem_totaal_excl"))
+    st.dataframe(
+        df.rename(columns={
+            "aantal": "Aantal",
+            "som_totaal_excl": "Totaal excl.",
+            "gem_totaal_excl": "Gem. excl.",
+            "gem_maatwerk": "Gem. maatwerk",
+            "gem_fronten": "Gem. fronten",
+            "gem_kasten": "Gem. kasten",
+        }),
+        hide_index=True,
+        use_container_width=True,
+    )
+st.caption(f"Query in {duur_ms:.0f} ms")
+
+# ======================================================
+# LAATSTE OFFERTES
+# ======================================================
+with st.expander("Laatste offertes"):
+    deal_id = st.text_input("Deal ID (optioneel)").strip()
+    laatste = archief.offertes(tenant, deal_id or None, van, tot, limiet=50)
+    st.dataframe(
+        [
+            {
+                "Tijdstip": time.strftime("%Y-%m-%d %H:%M", time.localtime(o["tijdstip"])),
+                "Deal": o["deal_id"],
+                "Project": o["project"],
+                "Keuken": o["keuken"] or "",
+                "Soort": o["mode"],
+                "Model": o["model"],
+                "Status": o["status"],
+                "Kasten": o["kasten"],
+                "Totaal excl.": f"€ {o['totaal_excl']:.2f}",
+                "Versturen (ms)": o["duur_versturen_ms"],
+            }
+            for o in laatste
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
@@ -0,0 +1,508 @@
+import bisect
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+# ======================================================
+# 📏 PRIJSREGELS — DECLARATIEF, ÉÉN KEER GECOMPILEERD
+# De bedragen staan in de prijstabel (huidige_prijstabel); hier staat
+# welke tabel wanneer geldt: corpus per kasttype (hoogteband of tekst in
+# de inrichting), inbegrepen planken, inrichting per stuk, de opslag op
+# fronten en zijden, de marge en de vaste kosten van de offerte.
+# Per prijstabel wordt dit één keer gecompileerd tot een PrijsPlan
+# (tabelnamen opgezocht, banden als tuples); daarna is een kast een
+# handvol optellingen. Eén kast: plan.kast(); veel kasten: plan.kasten()
+# (numpy); waarom een bedrag zo is: plan.verklaar_kast() (= plan.kast()
+# met een stap-functie) en plan.vaste_kosten(..., uitleg=[]). Uitleg wordt
+# alleen opgebouwd als erom gevraagd wordt.
+# PRIJSREGELS = pad naar JSON met eigen regels (zelfde vorm als STANDAARD_REGELS).
+# ======================================================
+
+PRIJSREGELS = os.getenv("PRIJSREGELS", "")
+MAX_PLANNEN = 32
+
+# Regels per kasttype: de eerste regel waarvan alle voorwaarden kloppen
+# geldt; een regel zonder voorwaarden is de terugval.
+#   "hoogte": [van, tot]     inclusief, null = open
+#   "inrichting_bevat": tekst in de inrichting (kleine letters)
+STANDAARD_REGELS = {
+    "staffels": "BREEDTE_STAFFELS",
+    "corpus": {
+        "A": [
+            {"inrichting_bevat": "lade", "tabel": "A_LADE_KAST"},
+            {"inrichting_bevat": "plank", "tabel": "A_LADE_KAST"},
+            {"tabel": "A_OVEN_KAST"},
+        ],
+        "B": [
+            {"hoogte": [1001, 2079], "tabel": "B_HOOG_1001_2079"},
+            {"hoogte": [2080, 2770], "tabel": "B_HOOG_2080_2770"},
+            {"tabel": "B_HOOG_1001_2079"},
+        ],
+        "C": [
+            {"hoogte": [None, 390], "tabel": "C_CORPUS_0_390"},
+            {"hoogte": [391, 520], "tabel": "C_CORPUS_391_520"},
+            {"hoogte": [521, 780], "tabel": "C_CORPUS_521_780"},
+            {"tabel": "C_CORPUS_781_PLUS"},
+        ],
+    },
+    "inbegrepen_planken": {
+        "A": [
+            {"inrichting_bevat": "plank", "aantal": 2},
+        ],
+        "C": [
+            {"hoogte": [None, 390], "aantal": 0},
+            {"hoogte": [391, 520], "aantal": 1},
+            {"aantal": 2},
+        ],
+    },
+    # per stuk, prijs uit de staffel van de kast; volgorde = optelvolgorde
+    "inrichting": [
+        {"veld": "planken", "tabel": "PLANK_A_OF_B", "min_inbegrepen": True},
+        {"veld": "lades", "tabel": "LADES_KAST"},
+        {"veld": "push_to_open_lades", "tabel": "PUSH_TO_OPEN_LADE"},
+        {"veld": "bestek_bakken", "tabel": "BESTEK_BAK"},
+        {"veld": "spoelkast_bescherming", "tabel": "SPOELKAST_BESCHERMING"},
+        {"veld": "apothekers", "tabel": "APOTHEKERS_LADE"},
+        {"veld": "carrousels", "tabel": "CARROUSEL"},
+        {"veld": "klepscharnieren", "tabel": "SCHARNIER_PER_STUK_MAATWERK"},
+    ],
+    "scharnieren": "SCHARNIER_PER_STUK_MAATWERK",
+    "front_m2_prijzen": "M2_FRONT_PRIJZEN",
+    "vlak_model_per_materiaal": "VLAK_MODEL_PER_MATERIAAL",
+    "opslag_front_zijden": 1.40,
+    "marge": 0.4,
+    # offerte zonder kasten; "prijs" is een tabel of MODEL_INFO.<veld> van het model,
+    # "aantal" een teller van de offerte, "als" een voorwaarde (anders 0),
+    # "op_maat" de inventaris-categorie voor TOESLAG_OP_MAAT
+    "vaste_kosten": [
+        {"post": "materiaal_totaal", "aantal": "fronts", "prijs": "MODEL_INFO.prijs_per_front"},
+        {"post": "toeslag_passtuk", "als": "heeft_passtuk", "prijs": "MODEL_INFO.passtuk", "op_maat": "passtuk"},
+        {"post": "toeslag_anders", "als": "heeft_anders", "prijs": "MODEL_INFO.passtuk", "op_maat": "anders"},
+        {"post": "montage", "aantal": "fronts", "prijs": "MONTAGE_PER_FRONT"},
+        {"post": "inmeten", "prijs": "INMETEN"},
+        {"post": "vracht", "prijs": "VRACHT"},
+        {"post": "scharnier_totaal", "aantal": "scharnieren", "prijs": "PRIJS_SCHARNIER"},
+        {"post": "lades_totaal", "aantal": "lades", "prijs": "PRIJS_LADE"},
+    ],
+}
+
+
+def _laad_regels(pad):
+    if not pad:
+        return STANDAARD_REGELS
+    with open(pad, "r") as f:
+        return json.load(f)
+
+
+REGELS = _laad_regels(PRIJSREGELS)
+REGELS_VINGERAFDRUK = hashlib.sha1(json.dumps(REGELS, sort_keys=True).encode()).hexdigest()
+
+
+def _band(band):
+    van, tot = band
+    if van is None and tot is None:
+        return "elke hoogte"
+    if van is None:
+        return f"hoogte t/m {tot} mm"
+    if tot is None:
+        return f"hoogte vanaf {van} mm"
+    return f"hoogte {van}–{tot} mm"
+
+
+class _Regel:
+    """Eén gecompileerde regel: voorwaarden + uitkomst (tabelrij of aantal)."""
+
+    __slots__ = ("van", "tot", "bevat", "waarde", "naam")
+
+    def __init__(self, regel, waarde, naam):
+        band = regel.get("hoogte") or (None, None)
+        self.van = float("-inf") if band[0] is None else band[0]
+        self.tot = float("inf") if band[1] is None else band[1]
+        self.bevat = regel.get("inrichting_bevat")
+        self.waarde = waarde
+        voorwaarden = []
+        if regel.get("hoogte"):
+            voorwaarden.append(_band(band))
+        if self.bevat:
+            voorwaarden.append(f"inrichting bevat '{self.bevat}'")
+        self.naam = f"{naam} ({', '.join(voorwaarden) or 'anders'})"
+
+
+def _kies(regels, hoogte, inrichting):
+    for regel in regels:
+        if regel.van <= hoogte <= regel.tot and (regel.bevat is None or regel.bevat in inrichting):
+            return regel
+    return None
+
+
+class PrijsPlan:
+    """Regels + prijstabel, gecompileerd. Niet wijzigen; via plan_voor(prijstabel)."""
+
+    def __init__(self, regels, pt):
+        try:
+            self.staffels_naam = regels["staffels"]
+            self.staffels = tuple(pt[self.staffels_naam])
+            self.corpus = {
+                t.upper(): tuple(_Regel(r, tuple(pt[r["tabel"]]), r["tabel"]) for r in rs)
+                for t, rs in regels.get("corpus", {}).items()
+            }
+            self.inbegrepen = {
+                t.upper(): tuple(_Regel(r, int(r["aantal"]), f"{r['aantal']} inbegrepen") for r in rs)
+                for t, rs in regels.get("inbegrepen_planken", {}).items()
+            }
+            self.inrichting = tuple(
+                (r["veld"], tuple(pt[r["tabel"]]), r["tabel"], bool(r.get("min_inbegrepen")))
+                for r in regels.get("inrichting", [])
+            )
+            self.scharnieren_naam = regels["scharnieren"]
+            self.scharnieren = tuple(pt[self.scharnieren_naam])
+            self.front_naam = regels["front_m2_prijzen"]
+            m2 = pt[self.front_naam]
+            vlak_per_materiaal = pt[regels["vlak_model_per_materiaal"]]
+            self.opslag = regels["opslag_front_zijden"]
+            self.marge = regels["marge"]
+            model_info = pt["MODEL_INFO"]
+        except KeyError as e:
+            raise ValueError(f"Prijsregels verwijzen naar onbekende tabel of sleutel {e}.")
+
+        # frontmodel → (m² front, m² vlak model voor zijden of None, vlak model)
+        self.fronten = {}
+        for model in set(m2) | set(model_info):
+            materiaal = model_info.get(model, {}).get("materiaal")
+            vlak = vlak_per_materiaal.get(materiaal) if materiaal in vlak_per_materiaal else None
+            self.fronten[model] = (m2.get(model, 0.0), m2.get(vlak, 0.0) if vlak is not None else None, vlak)
+
+        self._vaste_posten = {
+            model: tuple(self._vaste_post(post, pt, model) for post in regels.get("vaste_kosten", []))
+            for model in model_info
+        }
+        # snelle paden voor kast(): per type beide regelsets in één opzoeking (en of de
+        # inrichtingstekst nodig is), per staffel de stukprijzen van de inrichting
+        self._per_type = {
+            t: (
+                self.corpus.get(t, ()),
+                self.inbegrepen.get(t, ()),
+                any(r.bevat is not None for r in self.corpus.get(t, ()) + self.inbegrepen.get(t, ())),
+            )
+            for t in set(self.corpus) | set(self.inbegrepen)
+        }
+        self._oplopend = all(a < b for a, b in zip(self.staffels, self.staffels[1:]))
+        self._inrichting_per_staffel = [
+            tuple((veld, rij[i], min_inbegrepen, tabel) for veld, rij, tabel, min_inbegrepen in self.inrichting)
+            for i in range(len(self.staffels))
+        ]
+        self._arrays = None
+
+    @staticmethod
+    def _vaste_post(post, pt, model):
+        bron = post["prijs"]
+        if bron.startswith("MODEL_INFO."):
+            prijs = pt["MODEL_INFO"][model][bron[len("MODEL_INFO."):]]
+        else:
+            prijs = pt[bron]
+        return post["post"], post.get("aantal"), post.get("als"), post.get("op_maat"), prijs, bron
+
+    # -----------------------------
+    # ÉÉN KAST
+    # -----------------------------
+
+    def _staffel(self, breedte):
+        """Eerste staffel met breedte <= grens (naar boven afronden), anders de laatste; NaN → 0."""
+        if breedte != breedte:   # NaN
+            return 0
+        if self._oplopend:
+            return min(bisect.bisect_left(self.staffels, breedte), len(self.staffels) - 1)
+        for i, grens in enumerate(self.staffels):
+            if breedte <= grens:
+                return i
+        return len(self.staffels) - 1
+
+    def _corpus_inrichting(self, kast, hoogte, breedte, stap=None):
+        """Inkoop corpus + inrichting + scharnieren: het modelonafhankelijke deel van een kast."""
+        idx = self._staffel(breedte)
+        if stap is not None:
+            kast_type = kast.get("type", "").upper()
+            staffel = f"staffel {self.staffels[idx]} mm (breedte {breedte:.0f} mm)"
+
+        corpus = 0.0
+        inbegrepen = 0
+        regel = None
+        per_type = self._per_type.get(kast.get("type", "").upper())
+        if per_type is not None:
+            corpus_regels, inbegrepen_regels, met_tekst = per_type
+            tekst = (kast.get("inrichting_raw") or "").lower() if met_tekst else ""
+            regel = _kies(corpus_regels, hoogte, tekst)
+            if regel is not None:
+                corpus = regel.waarde[idx]
+            inbegrepen_regel = _kies(inbegrepen_regels, hoogte, tekst)
+            if inbegrepen_regel is not None:
+                inbegrepen = inbegrepen_regel.waarde
+        if stap is not None:
+            if regel is not None:
+                stap("corpus", corpus, f"type {kast_type}: {regel.naam}, {staffel}")
+            else:
+                stap("corpus", 0.0, f"geen corpusregel voor type '{kast_type}'")
+
+        inrichting = kast.get("inrichting", {})
+        inrichting_inkoop = 0.0
+        for veld, prijs, min_inbegrepen, tabel in self._inrichting_per_staffel[idx]:
+            aantal = inrichting.get(veld, 0)
+            if min_inbegrepen:
+                aantal -= inbegrepen
+            if aantal > 0:
+                inrichting_inkoop += aantal * prijs
+                if stap is not None:
+                    uitleg = f"{aantal} × {tabel} {prijs} ({staffel})"
+                    if min_inbegrepen:
+                        uitleg = f"{aantal} × {tabel} {prijs} ({aantal + inbegrepen} − {inbegrepen} inbegrepen, {staffel})"
+                    stap(veld, aantal * prijs, uitleg)
+
+        scharnieren = kast.get("scharnieren", 0)
+        scharnier_inkoop = scharnieren * self.scharnieren[idx] if scharnieren > 0 else 0.0
+        if stap is not None and scharnieren > 0:
+            stap("scharnieren", scharnier_inkoop,
+                 f"{scharnieren} × {self.scharnieren_naam} {self.scharnieren[idx]} ({staffel})")
+        return corpus + inrichting_inkoop + scharnier_inkoop
+
+    def kast(self, kast, stap=None):
+        """
+        (totaal_inkoop, verkoop_excl) van één kast, afgerond zoals op de offerte.
+        stap(post, bedrag, uitleg) wordt, als meegegeven, per post aangeroepen
+        (zie verklaar_kast); zonder stap wordt er geen uitleg opgebouwd.
+        """
+        hoogte = kast.get("hoogte") or 0
+        breedte = kast.get("breedte") or 0
+        inkoop = self._corpus_inrichting(kast, hoogte, breedte, stap)
+
+        frontmodel = (kast.get("frontmodel") or "").upper()
+        front_prijs, vlak_prijs, vlak = self.fronten.get(frontmodel, (0.0, None, None))
+        front_inkoop = _m2(hoogte, breedte) * front_prijs
+        zij_inkoop = 0.0
+        if vlak_prijs is not None:
+            zijden = _zijden(kast)
+            zijde_m2 = _m2(hoogte, kast.get("diepte") or 0)
+            if zijden > 0 and zijde_m2:
+                zij_inkoop = zijden * zijde_m2 * vlak_prijs
+
+        totaal = inkoop + (front_inkoop + zij_inkoop) * self.opslag
+        totaal_inkoop = round(totaal, 2)
+        verkoop = round(totaal / self.marge, 2) if totaal > 0 else 0.0
+
+        if stap is not None:
+            if front_inkoop:
+                stap("front", front_inkoop,
+                     f"{_m2(hoogte, breedte):.4f} m² × {self.front_naam}[{frontmodel}] {front_prijs}")
+            if zij_inkoop:
+                stap("zijden", zij_inkoop,
+                     f"{zijden} × {zijde_m2:.4f} m² × {self.front_naam}[{vlak}] {vlak_prijs} (vlak model)")
+            if front_inkoop + zij_inkoop:
+                stap("opslag", (front_inkoop + zij_inkoop) * (self.opslag - 1),
+                     f"{(self.opslag - 1) * 100:.0f}% op fronten en zijden")
+            stap("totaal_inkoop", totaal_inkoop, "som van de posten hierboven")
+            stap("verkoop_excl", verkoop, f"inkoop / {self.marge}" if verkoop else "geen inkoop")
+        return totaal_inkoop, verkoop
+
+    def verklaar_kast(self, kast):
+        """
+        kast() stap voor stap: [{"post", "bedrag", "uitleg"}] (inkoop),
+        plus opslag, totaal inkoop en verkoop.
+        """
+        stappen = []
+
+        def stap(post, bedrag, uitleg):
+            stappen.append({"post": post, "bedrag": round(bedrag, 4), "uitleg": uitleg})
+
+        self.kast(kast, stap)
+        return stappen
+
+    def kast_delen(self, kast):
+        """
+        Modelonafhankelijke delen voor het vergelijken van modellen:
+        (inkoop corpus + inrichting + scharnieren, m² front, zijden × m² per zijde).
+        """
+        m = maten(kast)
+        return self._corpus_inrichting(kast, m["hoogte"], m["breedte"]), m["front_m2"], m["zijden"] * m["zijde_m2"]
+
+    # -----------------------------
+    # VEEL KASTEN TEGELIJK (NUMPY)
+    # -----------------------------
+
+    def _np(self):
+        if self._arrays is None:
+            self._arrays = {
+                "staffels": np.array(self.staffels, dtype=float),
+                "corpus": {t: [(r, np.array(r.waarde, dtype=float)) for r in rs] for t, rs in self.corpus.items()},
+                "inrichting": [(veld, np.array(rij, dtype=float), m) for veld, rij, _, m in self.inrichting],
+                "scharnieren": np.array(self.scharnieren, dtype=float),
+            }
+        return self._arrays
+
+    def kasten(self, kasten):
+        """kast() voor een lijst kasten in één keer; zelfde bedragen, als twee lijsten."""
+        n = len(kasten)
+        if not n:
+            return [], []
+        a = self._np()
+
+        types = [k.get("type", "").upper() for k in kasten]
+        teksten = [(k.get("inrichting_raw") or "").lower() for k in kasten]
+        hoogte = np.array([k.get("hoogte") or 0 for k in kasten], dtype=float)
+        breedte = np.array([k.get("breedte") or 0 for k in kasten], dtype=float)
+        diepte = np.array([k.get("diepte") or 0 for k in kasten], dtype=float)
+
+        # eerste staffel met breedte <= grens, anders de laatste; NaN → 0
+        past = breedte[:, None] <= a["staffels"][None, :]
+        idx = np.where(past.any(axis=1), past.argmax(axis=1), len(self.staffels) - 1)
+        idx[np.isnan(breedte)] = 0
+
+        def kies(regels_per_type, waarde):
+            uitkomst = np.zeros(n)
+            gekozen = np.zeros(n, dtype=bool)
+            for kast_type, regels in regels_per_type.items():
+                van_type = np.array([t == kast_type for t in types])
+                for regel, rij in regels:
+                    m = van_type & ~gekozen & (hoogte >= regel.van) & (hoogte <= regel.tot)
+                    if regel.bevat is not None:
+                        m &= np.array([regel.bevat in t for t in teksten])
+                    uitkomst[m] = waarde(regel, rij, m)
+                    gekozen |= m
+            return uitkomst
+
+        corpus = kies(a["corpus"], lambda regel, rij, m: rij[idx[m]])
+        inbegrepen = kies(
+            {t: [(r, None) for r in rs] for t, rs in self.inbegrepen.items()},
+            lambda regel, rij, m: regel.waarde,
+        )
+
+        inrichting_inkoop = np.zeros(n)
+        for veld, rij, min_inbegrepen in a["inrichting"]:
+            aantal = np.array([k.get("inrichting", {}).get(veld, 0) for k in kasten], dtype=float)
+            if min_inbegrepen:
+                aantal = np.maximum(0, aantal - inbegrepen)
+            inrichting_inkoop = inrichting_inkoop + np.where(aantal > 0, aantal * rij[idx], 0.0)
+
+        scharnieren = np.array([k.get("scharnieren", 0) for k in kasten], dtype=float)
+        scharnier_inkoop = np.where(scharnieren > 0, scharnieren * a["scharnieren"][idx], 0.0)
+
+        fronten = [self.fronten.get((k.get("frontmodel") or "").upper(), (0.0, None, None)) for k in kasten]
+        front_prijs = np.array([f[0] for f in fronten])
+        vlak_prijs = np.array([f[1] if f[1] is not None else np.nan for f in fronten])
+        zijden = np.array([_zijden(k) for k in kasten], dtype=float)
+
+        # "if hoogte and breedte" uit kast(): alleen 0 telt als leeg
+        front_m2 = np.where((hoogte != 0) & (breedte != 0), (hoogte * breedte) / 1_000_000.0, 0.0)
+        zijde_m2 = np.where((hoogte != 0) & (diepte != 0), (hoogte * diepte) / 1_000_000.0, 0.0)
+        met_zijden = ~np.isnan(vlak_prijs) & (zijden > 0) & (zijde_m2 != 0)
+        zij_inkoop = np.where(met_zijden, zijden * zijde_m2 * np.nan_to_num(vlak_prijs), 0.0)
+
+        totaal = corpus + inrichting_inkoop + scharnier_inkoop + (front_m2 * front_prijs + zij_inkoop) * self.opslag
+        totaal = totaal.tolist()
+        # afronden met round() zoals kast(): np.round rondt soms anders af
+        return (
+            [round(t, 2) for t in totaal],
+            [round(t / self.marge, 2) if t > 0 else 0.0 for t in totaal],
+        )
+
+    # -----------------------------
+    # VASTE KOSTEN VAN DE OFFERTE
+    # -----------------------------
+
+    def vaste_kosten(self, model, tellers, m2=None, uitleg=None):
+        """
+        {post: bedrag} en het totaal voor model; tellers = {"fronts", "scharnieren",
+        "lades", "heeft_passtuk", "heeft_anders"}. m2 = {categorie: m²} alleen met
+        TOESLAG_OP_MAAT: dan minstens m² × vlak model × opslag / marge.
+        uitleg (lijst) krijgt per post een {"post", "bedrag", "uitleg"}.
+        """
+        posten = {}
+        totaal = None
+        vlak_prijs = None
+        for post, aantal_veld, als, op_maat, prijs, bron in self._vaste_posten[model]:
+            van_toepassing = not als or tellers.get(als)
+            if not van_toepassing:
+                bedrag = 0
+            elif aantal_veld:
+                bedrag = tellers.get(aantal_veld, 0) * prijs
+            else:
+                bedrag = prijs
+            tekst = None
+            if van_toepassing and m2 and op_maat and m2.get(op_maat):
+                if vlak_prijs is None:
+                    vlak_prijs = self.vlak_prijs_model(model)
+                if vlak_prijs:
+                    op_maat_bedrag = round(m2[op_maat] * vlak_prijs * self.opslag / self.marge, 2)
+                    if op_maat_bedrag > bedrag:
+                        tekst = f"op maat: {m2[op_maat]} m² × {vlak_prijs} × {self.opslag} / {self.marge}"
+                    bedrag = max(bedrag, op_maat_bedrag)
+            posten[post] = bedrag
+            totaal = bedrag if totaal is None else totaal + bedrag
+            if uitleg is not None:
+                if not van_toepassing:
+                    tekst = f"niet van toepassing ({als} onwaar)"
+                elif tekst is None:
+                    tekst = f"{tellers.get(aantal_veld, 0)} × {bron} {prijs}" if aantal_veld else f"{bron} {prijs}"
+                uitleg.append({"post": post, "bedrag": bedrag, "uitleg": tekst})
+        return posten, (totaal or 0)
+
+    def vlak_prijs_model(self, model):
+        """m²-prijs van het vlakke model van het materiaal van model (voor zijden en toeslagen op maat)."""
+        return self.fronten.get(model, (0.0, None, None))[1] or 0.0
+
+
+def _m2(a, b):
+    return (a * b) / 1_000_000.0 if a and b else 0.0
+
+
+def maten(kast):
+    """
+    Maten van één kast zoals de prijsregels ze gebruiken: hoogte/breedte/diepte
+    (leeg → 0), m² front, aantal zichtbare zijden en m² per zijde.
+    """
+    hoogte = kast.get("hoogte") or 0
+    breedte = kast.get("breedte") or 0
+    diepte = kast.get("diepte") or 0
+    return {
+        "hoogte": hoogte,
+        "breedte": breedte,
+        "diepte": diepte,
+        "front_m2": _m2(hoogte, breedte),
+        "zijden": _zijden(kast),
+        "zijde_m2": _m2(hoogte, diepte),
+    }
+
+
+def _zijden(kast):
+    zichtbaar = (kast.get("zichtbare_zijde") or "").lower()
+    links = "links" in zichtbaar
+    rechts = "rechts" in zichtbaar
+    if "ja" in zichtbaar and not (links or rechts):
+        links = True
+    return int(links) + int(rechts)
+
+
+_PLANNEN = {}
+_PLANNEN_LOCK = threading.Lock()
+
+
+def plan_voor(prijstabel, regels=None):
+    """
+    Het gecompileerde plan voor deze prijstabel (en REGELS). Per tabel-object
+    één keer: huidige_prijstabel() geeft steeds dezelfde tabellen terug.
+    """
+    regels = regels or REGELS
+    tabellen = tuple(prijstabel.values())
+    sleutel = (id(regels),) + tuple(id(t) for t in tabellen)
+    with _PLANNEN_LOCK:
+        gevonden = _PLANNEN.get(sleutel)
+        # de tabellen zelf bewaren, zodat een id niet hergebruikt kan worden
+        if gevonden is not None and all(a is b for a, b in zip(gevonden[0], tabellen)):
+            return gevonden[1]
+    plan = PrijsPlan(regels, prijstabel)
+    with _PLANNEN_LOCK:
+        if len(_PLANNEN) >= MAX_PLANNEN:
+            _PLANNEN.clear()
+        _PLANNEN[sleutel] = (tabellen, plan, regels)
+    return plan
@@ -0,0 +1,121 @@
+import json
+import os
+
+import inmeetverwerker_hellofront as hf
+from state_store import state_pad
+from tenant_cache import PerTenant, SyncCache
+from tenants import STANDAARD_TENANT, gebruik_tenant, get_tenant
+
+# ======================================================
+# 🏷️ LOKALE KOPIE VAN DE TEAMLEADER PRODUCTCATALOGUS
+# Incrementeel gesynct (updated_since + paging), met TTL, net als de
+# deal-index (tenant_cache.py). Na elke sync wordt de koppeling artikel → product_id op de
+# tenant gezet; de offerte-compiler leest die uit geheugen, dus een
+# offerte kost geen extra API-calls.
+# Koppeling: standaard het product met code = artikelsleutel (bv.
+# INMETEN, PRIJS_LADE, MODEL_NOAH, zie hf.product_sleutels()); afwijkend
+# via PRODUCT_KOPPELING = pad naar JSON {artikelsleutel: code of id}.
+# PRODUCT_PRIJZEN=1: verkoopprijzen uit de catalogus gaan vóór de
+# prijstabel (vaste kosten en prijs per front), ook in de berekening.
+# ======================================================
+
+PRODUCT_CATALOGUS_FILE = os.getenv("PRODUCT_CATALOGUS_FILE") or state_pad("product_catalogus.json")
+PRODUCT_CATALOGUS_TTL_SEC = int(os.getenv("PRODUCT_CATALOGUS_TTL_SEC", "3600"))
+PRODUCT_KOPPELING = os.getenv("PRODUCT_KOPPELING", "")
+PRODUCT_PRIJZEN = os.getenv("PRODUCT_PRIJZEN", "0") == "1"
+
+
+def _lees_koppeling(pad):
+    if not pad:
+        return {}
+    with open(pad, "r") as f:
+        return json.load(f)
+
+
+class ProductCatalogus(SyncCache):
+    """Producten (id, naam, code, verkoopprijs) in geheugen + op disk, met index op code."""
+
+    ENDPOINT = "products.list"
+    VELD = "producten"
+    NAAM = "Productcatalogus"
+    MIN_INTERVAL_SEC = 60
+
+    def __init__(self, pad=PRODUCT_CATALOGUS_FILE, ttl_sec=PRODUCT_CATALOGUS_TTL_SEC, tenant=STANDAARD_TENANT,
+                 koppeling=None):
+        self.koppeling = _lees_koppeling(PRODUCT_KOPPELING) if koppeling is None else koppeling
+        self._per_code = {}
+        super().__init__(pad, ttl_sec, tenant)
+
+    def _herbouw(self):
+        self._per_code = {
+            p["code"].strip().upper(): product_id
+            for product_id, p in self._items.items() if p.get("code")
+        }
+
+    def _item(self, p, extra):
+        prijs = (p.get("selling_price") or {}).get("amount")
+        return {
+            "id": p["id"],
+            "naam": p.get("name") or "",
+            "code": p.get("code") or "",
+            "verkoopprijs": float(prijs) if prijs is not None else None,
+        }
+
+    def _bijgewerkt(self):
+        self._koppel()
+
+    # ---------- koppeling ----------
+
+    def get(self, product_id):
+        return self._items.get(product_id)
+
+    def zoek_code(self, code):
+        product_id = self._per_code.get(str(code).strip().upper())
+        return self._items.get(product_id) if product_id else None
+
+    def product_voor(self, sleutel):
+        """Product voor een artikelsleutel: via PRODUCT_KOPPELING (id of code), anders code = sleutel."""
+        verwijzing = self.koppeling.get(sleutel, sleutel)
+        return self._items.get(verwijzing) or self.zoek_code(verwijzing)
+
+    def koppeling_overzicht(self):
+        """[{sleutel, product_id, naam, verkoopprijs}] voor alle artikelen; product_id None = niet gevonden."""
+        with gebruik_tenant(self.tenant):
+            sleutels = hf.product_sleutels()
+        overzicht = []
+        for sleutel in sleutels:
+            p = self.product_voor(sleutel) or {}
+            overzicht.append({
+                "sleutel": sleutel,
+                "product_id": p.get("id"),
+                "naam": p.get("naam"),
+                "verkoopprijs": p.get("verkoopprijs"),
+            })
+        return overzicht
+
+    def _koppel(self):
+        """Zet product_ids (en met PRODUCT_PRIJZEN de catalogusprijzen) op de tenant."""
+        tenant = get_tenant(self.tenant)
+        overzicht = self.koppeling_overzicht()
+        tenant.product_ids = {r["sleutel"]: r["product_id"] for r in overzicht if r["product_id"]}
+
+        if PRODUCT_PRIJZEN:
+            prijzen = {r["sleutel"]: r["verkoopprijs"] for r in overzicht if r["verkoopprijs"] is not None}
+            wijzigingen = {n: prijzen[n] for n in hf.STATISCHE_PRIJZEN if n in prijzen}
+            per_front = {
+                s[len("MODEL_"):]: {"prijs_per_front": p} for s, p in prijzen.items() if s.startswith("MODEL_")
+            }
+            if per_front:
+                wijzigingen["MODEL_INFO"] = per_front
+            if wijzigingen != tenant.catalogus_prijzen:
+                tenant.catalogus_prijzen = wijzigingen or None
+                tenant.prijstabel = None   # huidige_prijstabel opnieuw samenstellen
+
+
+_PER_TENANT = PerTenant(ProductCatalogus, PRODUCT_CATALOGUS_FILE)
+catalogus = _PER_TENANT.voor(STANDAARD_TENANT)
+
+
+def catalogus_voor(tenant):
+    """Eén catalogus per tenant (de standaard-tenant: catalogus)."""
+    return _PER_TENANT.voor(tenant)
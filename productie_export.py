@@ -0,0 +1,188 @@
+import csv
+import json
+import logging
+import os
+from datetime import datetime
+
+import inmeetverwerker_hellofront as hf
+from herprijs_archief import verzamel_archief
+from prijsregels import maten
+
+# ======================================================
+# 🪚 PRODUCTIE-EXPORT: ZAAGLIJST + BESLAGLIJST (BOM)
+# python cli.py export <bestanden/mappen...> --uit map [--formaat csv|jsonl] [--maand 2026-10]
+# Generator-pipeline: bestand → parse-state → regels → writer. Er staat
+# steeds maar één project in geheugen, dus een hele maand gaat in één keer.
+# De zaaglijst geeft BRUTO maten: de kastmaten uit de prijsregels (planken op
+# de buitenbreedte, fronten alleen over de breedte verdeeld, zonder voegen of
+# plaatdikte). Netto zaagmaten rekent de werkvoorbereiding er zelf uit.
+# ======================================================
+
+ZAAGLIJST_VELDEN = [
+    "bron", "project", "kolom_index", "kast_type", "onderdeel",
+    "aantal", "bruto_lengte_mm", "bruto_breedte_mm", "bruto_m2", "materiaal", "kleur",
+]
+BOM_VELDEN = ["bron", "project", "kolom_index", "artikel", "aantal"]
+
+log = logging.getLogger(__name__)
+
+# inrichting-sleutel (_parse_inrichting) → artikel op de beslaglijst
+BESLAG_ARTIKELEN = [
+    ("lades", "Lade softclose"),
+    ("push_to_open_lades", "Lade push-to-open"),
+    ("bestek_bakken", "Bestekbak"),
+    ("spoelkast_bescherming", "Spoelkastbescherming"),
+    ("apothekers", "Apothekerslade"),
+    ("carrousels", "Carrousel"),
+    ("klepscharnieren", "Klepscharnier"),
+]
+
+
+def parse_states(paden, maand=None):
+    """
+    Parse-states uit .xlsx (alle keukens), bewaarde parses (.json) en mappen
+    daarvan, één voor één. maand ("JJJJ-MM") filtert op wijzigingsdatum.
+    Yield't (bron, parse_state).
+    """
+    for pad in paden:
+        bestanden = verzamel_archief(pad) if os.path.isdir(pad) else [pad]
+        for bestand in bestanden:
+            if maand and datetime.fromtimestamp(os.path.getmtime(bestand)).strftime("%Y-%m") != maand:
+                continue
+            try:
+                if bestand.lower().endswith(".json"):
+                    with open(bestand, "r") as f:
+                        inhoud = json.load(f)
+                    if "keukens" in inhoud:
+                        for keuken in inhoud["keukens"]:
+                            yield bestand, keuken["parse"]
+                    elif inhoud.get("parse") or "onderdelen" in inhoud:
+                        yield bestand, inhoud.get("parse") or inhoud
+                else:
+                    for _, uitkomst in hf.lees_excel_keukens(bestand):
+                        yield bestand, hf.maak_parse_state(*uitkomst)
+            except Exception as e:
+                log.warning("Overgeslagen: %s (%s)", bestand, e)
+
+
+def _paneel(bron, project, kast, onderdeel, aantal, lengte, breedte, materiaal, kleur):
+    if not aantal or not lengte or not breedte:
+        return None
+    return {
+        "bron": bron,
+        "project": project,
+        "kolom_index": kast.get("kolom_index"),
+        "kast_type": kast.get("type", ""),
+        "onderdeel": onderdeel,
+        "aantal": aantal,
+        "bruto_lengte_mm": round(lengte),
+        "bruto_breedte_mm": round(breedte),
+        "bruto_m2": round(aantal * lengte * breedte / 1_000_000.0, 4),
+        "materiaal": materiaal,
+        "kleur": kleur,
+    }
+
+
+def zaaglijst_regels(bron, parse_state):
+    """
+    Panelen per maatwerk kast: corpuszijden en planken (kleur corpus),
+    fronten (verdeeld over de breedte) en zichtbare zijden in het vlakke
+    model van het frontmateriaal. Bruto maten/m² zoals de prijsregels
+    (prijsregels.maten): buitenmaten van de kast, geen plaatdikte of voegen eraf.
+    """
+    project = parse_state.get("project", "")
+    for kast in parse_state.get("maatwerk_kasten", []):
+        basis = maten(kast)
+        hoogte, breedte, diepte = basis["hoogte"], basis["breedte"], basis["diepte"]
+        kleur_corpus = kast.get("kleur_corpus") or ""
+        frontmodel = (kast.get("frontmodel") or "").upper()
+        materiaal = hf.MODEL_INFO.get(frontmodel, {}).get("materiaal", "")
+        aantal_fronten = kast.get("aantal_fronten") or (1 if frontmodel else 0)
+
+        panelen = [
+            _paneel(bron, project, kast, "Corpuszijde", 2, hoogte, diepte, "Corpus", kleur_corpus),
+            _paneel(bron, project, kast, "Plank", kast.get("inrichting", {}).get("planken", 0),
+                    breedte, diepte, "Corpus", kleur_corpus),
+        ]
+        if frontmodel and basis["front_m2"]:
+            panelen.append(_paneel(
+                bron, project, kast, f"Front {frontmodel}", aantal_fronten,
+                hoogte, breedte / aantal_fronten, materiaal, parse_state.get("kleur") or "",
+            ))
+        if basis["zijden"] and basis["zijde_m2"]:
+            vlak_model = hf.VLAK_MODEL_PER_MATERIAAL.get(materiaal, "")
+            panelen.append(_paneel(
+                bron, project, kast, f"Zichtbare zijde {vlak_model}".strip(), basis["zijden"],
+                hoogte, diepte, materiaal, parse_state.get("kleur") or "",
+            ))
+
+        for paneel in panelen:
+            if paneel:
+                yield paneel
+
+
+def bom_regels(bron, parse_state):
+    """Beslag per kast (scharnieren + inrichting) en voor de keuken zelf (J3/J5)."""
+    project = parse_state.get("project", "")
+
+    for artikel, aantal in [("Scharnier softclose", parse_state.get("scharnieren")),
+                            ("Maatwerk lade softclose", parse_state.get("lades"))]:
+        if aantal:
+            yield {"bron": bron, "project": project, "kolom_index": "", "artikel": artikel, "aantal": aantal}
+
+    for kast in parse_state.get("maatwerk_kasten", []):
+        regels = [("Scharnier softclose", kast.get("scharnieren", 0))]
+        inrichting = kast.get("inrichting", {})
+        regels += [(artikel, inrichting.get(sleutel, 0)) for sleutel, artikel in BESLAG_ARTIKELEN]
+        for artikel, aantal in regels:
+            if aantal:
+                yield {
+                    "bron": bron, "project": project, "kolom_index": kast.get("kolom_index"),
+                    "artikel": artikel, "aantal": aantal,
+                }
+
+
+class _CsvSchrijver:
+    def __init__(self, f, velden):
+        self._w = csv.DictWriter(f, fieldnames=velden)
+        self._w.writeheader()
+
+    def schrijf(self, regel):
+        self._w.writerow(regel)
+
+
+class _JsonlSchrijver:
+    def __init__(self, f, velden):
+        self._f = f
+
+    def schrijf(self, regel):
+        self._f.write(json.dumps(regel, ensure_ascii=False) + "\n")
+
+
+SCHRIJVERS = {"csv": _CsvSchrijver, "jsonl": _JsonlSchrijver}
+
+
+def exporteer(paden, uit_map, formaat="csv", maand=None):
+    """
+    Schrijft zaaglijst.<formaat> en beslaglijst.<formaat> in één doorloop
+    over alle projecten. Geeft de aantallen terug.
+    """
+    os.makedirs(uit_map, exist_ok=True)
+    schrijver = SCHRIJVERS[formaat]
+    tellers = {"projecten": 0, "panelen": 0, "beslag": 0}
+
+    with open(os.path.join(uit_map, f"zaaglijst.{formaat}"), "w", newline="") as f_zaag, \
+            open(os.path.join(uit_map, f"beslaglijst.{formaat}"), "w", newline="") as f_bom:
+        zaag = schrijver(f_zaag, ZAAGLIJST_VELDEN)
+        bom = schrijver(f_bom, BOM_VELDEN)
+
+        for bron, parse_state in parse_states(paden, maand):
+            tellers["projecten"] += 1
+            for regel in zaaglijst_regels(bron, parse_state):
+                zaag.schrijf(regel)
+                tellers["panelen"] += 1
+            for regel in bom_regels(bron, parse_state):
+                bom.schrijf(regel)
+                tellers["beslag"] += 1
+
+    return tellers
@@ -0,0 +1,215 @@
+import cProfile
+import hashlib
+import html
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import inmeetverwerker_hellofront as hf
+
+# ======================================================
+# 🔥 PROFILEERMODUS PER UPLOAD
+# cProfile (.prof) + sampling profiler (flame graph SVG) rond de
+# hele pipeline, opgeslagen per bestands-hash in PROFIEL_DIR.
+# ======================================================
+
+PROFIEL_DIR = os.getenv("PROFIEL_DIR", "/app/profielen")
+SAMPLE_INTERVAL_SEC = 0.001
+
+# functies waarvan de cumulatieve tijd apart in meta.json komt
+GEMETEN_STAPPEN = {
+    "valideer_werkboek": "valideer_werkboek",
+    "lees_excel": "lees_excel",
+    "_lees_maatwerk_kasten": "_lees_maatwerk_kasten",
+    "bereken_offerte": "bereken_offerte",
+    "bouw_grouped_lines_p_en_d": "grouped_lines",
+    "offerte_payload": "payload",
+}
+
+
+class _Sampler:
+    """Neemt elke SAMPLE_INTERVAL_SEC de stack van één thread op (collapsed stacks)."""
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="profiel-sampler", daemon=True)
+
+    def _loop(self):
+        eigen = threading.get_ident()
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and self.thread_id != eigen:
+                regels = []
+                while frame is not None:
+                    code = frame.f_code
+                    regels.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(regels))] += 1
+            time.sleep(SAMPLE_INTERVAL_SEC)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _flame_graph_svg(stacks, titel, breedte=1200, rij_hoogte=16):
+    """Rendert collapsed stacks als flame graph (SVG, root onderaan)."""
+    boom = {"naam": "alle", "n": 0, "kinderen": {}}
+    for stack, n in stacks.items():
+        boom["n"] += n
+        knoop = boom
+        for naam in stack.split(";"):
+            knoop = knoop["kinderen"].setdefault(naam, {"naam": naam, "n": 0, "kinderen": {}})
+            knoop["n"] += n
+
+    def diepte(k):
+        return 1 + max((diepte(c) for c in k["kinderen"].values()), default=0)
+
+    totaal = max(boom["n"], 1)
+    hoogte = (diepte(boom) + 1) * rij_hoogte + 30
+    rects = []
+
+    def teken(knoop, x, niveau):
+        w = knoop["n"] / totaal * breedte
+        if w < 0.5:
+            return
+        y = hoogte - (niveau + 1) * rij_hoogte
+        kleur = 200 + (hash(knoop["naam"]) % 55)
+        label = html.escape(knoop["naam"])
+        pct = 100.0 * knoop["n"] / totaal
+        rects.append(
+            f'<g><title>{label} ({knoop["n"]} samples, {pct:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{rij_hoogte - 1}" fill="rgb({kleur},{kleur // 2},40)"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + rij_hoogte - 4}" font-size="11" font-family="monospace">'
+               f'{label[:int(w / 7)]}</text>' if w > 30 else "")
+            + "</g>"
+        )
+        for kind in sorted(knoop["kinderen"].values(), key=lambda k: k["naam"]):
+            teken(kind, x, niveau + 1)
+            x += kind["n"] / totaal * breedte
+
+    teken(boom, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{breedte}" height="{hoogte}">'
+        f'<text x="5" y="18" font-size="14" font-family="sans-serif">{html.escape(titel)}</text>'
+        + "".join(rects) + "</svg>"
+    )
+
+
+def _stap_tijden(profiler):
+    tijden = {}
+    for (bestand, _, functie), (_, _, _, cumtime, _) in pstats.Stats(profiler).stats.items():
+        if functie in GEMETEN_STAPPEN and bestand.endswith("inmeetverwerker_hellofront.py"):
+            tijden[GEMETEN_STAPPEN[functie]] = tijden.get(GEMETEN_STAPPEN[functie], 0.0) + cumtime
+    return tijden
+
+
+@contextmanager
+def profileer(bestand_hash, naam):
+    """
+    Profileert het blok (cProfile + sampling) en slaat profiel, flame graph en
+    meta op in PROFIEL_DIR/<hash>/<tijdstip>/. Yield't een dict dat na afloop
+    de meta (incl. "map") bevat.
+    """
+    resultaat = {}
+    sampler = _Sampler(threading.get_ident())
+    profiler = cProfile.Profile()
+
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield resultaat
+    finally:
+        profiler.disable()
+        sampler.stop()
+        duur = time.perf_counter() - start
+
+        map_ = os.path.join(PROFIEL_DIR, bestand_hash, datetime.now().strftime("%Y%m%d-%H%M%S-%f"))
+        os.makedirs(map_, exist_ok=True)
+
+        profiler.dump_stats(os.path.join(map_, "profiel.prof"))
+        with open(os.path.join(map_, "stacks.txt"), "w") as f:
+            f.writelines(f"{stack} {n}\n" for stack, n in sampler.stacks.most_common())
+        with open(os.path.join(map_, "flamegraph.svg"), "w") as f:
+            f.write(_flame_graph_svg(sampler.stacks, f"{naam} — {duur * 1000:.0f} ms"))
+
+        top = io.StringIO()
+        pstats.Stats(profiler, stream=top).sort_stats("cumulative").print_stats(25)
+
+        meta = {
+            "naam": naam,
+            "hash": bestand_hash,
+            "tijdstip": datetime.now().isoformat(timespec="seconds"),
+            "duur_sec": duur,
+            "stappen_sec": _stap_tijden(profiler),
+            "samples": sum(sampler.stacks.values()),
+            "map": map_,
+        }
+        with open(os.path.join(map_, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        with open(os.path.join(map_, "top.txt"), "w") as f:
+            f.write(top.getvalue())
+
+        resultaat.update(meta)
+
+
+def profileer_pipeline(inhoud: bytes, bestandsnaam: str, mode="P"):
+    """
+    Draait valideren, lees_excel (incl. _lees_maatwerk_kasten), bereken_offerte
+    en het opbouwen van de payload onder de profiler. Verstuurt niets.
+    Geeft (meta, data) terug; data is None als het werkboek fouten bevat.
+    """
+    bestand_hash = hashlib.sha1(inhoud).hexdigest()
+
+    with tempfile.TemporaryDirectory() as map_:
+        pad = os.path.join(map_, os.path.basename(bestandsnaam) or "werkboek.xlsx")
+        with open(pad, "wb") as f:
+            f.write(inhoud)
+
+        data = None
+        with profileer(bestand_hash, bestandsnaam) as meta:
+            problemen = hf.valideer_werkboek(pad)
+            if not any(p["ernst"] == "fout" for p in problemen):
+                onderdelen, g2, h2, kleur, klantregels, scharnieren, lades, project = hf.lees_excel(pad)
+                model = hf.bepaal_model(g2, h2)
+                if model:
+                    data = hf.bereken_offerte(onderdelen, model, project, kleur, klantregels, scharnieren, lades)
+                    # zoals de app: voorbeeld P en D, dan de body (incl. serialiseren) zonder te versturen
+                    grouped_lines = hf.bouw_grouped_lines_p_en_d(data, "profiel")[mode]
+                    hf.offerte_payload(data, mode, deal_id="profiel", grouped_lines=grouped_lines)
+
+    return meta, data
+
+
+def recente_profielen(limiet=20):
+    """Meta van de meest recente profielen, nieuwste eerst."""
+    metas = []
+    if not os.path.isdir(PROFIEL_DIR):
+        return metas
+    for bestand_hash in os.listdir(PROFIEL_DIR):
+        hash_map = os.path.join(PROFIEL_DIR, bestand_hash)
+        if not os.path.isdir(hash_map):
+            continue
+        for run in os.listdir(hash_map):
+            pad = os.path.join(hash_map, run, "meta.json")
+            try:
+                with open(pad, "r") as f:
+                    metas.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    metas.sort(key=lambda m: m.get("tijdstip", ""), reverse=True)
+    return metas[:limiet]
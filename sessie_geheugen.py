@@ -0,0 +1,184 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# ======================================================
+# 🧠 GEHEUGENBUDGET PER STREAMLIT-SESSIE
+# Zware data per sessie (uitgelezen werkboeken, prefetch-resultaten) staat
+# hier en niet in st.session_state, zodat een andere sessie hem kan
+# opruimen. Boven SESSIE_GEHEUGEN_MAX_MB gaan de minst recent gebruikte
+# items van andere sessies eruit; wie ze weer nodig heeft rekent ze
+# opnieuw uit (de parse-cache in de state store maakt dat goedkoop).
+# Sessies die langer dan SESSIE_IDLE_SEC niets deden worden helemaal
+# vergeten (tabblad dicht).
+# ======================================================
+
+SESSIE_GEHEUGEN_MAX_MB = float(os.getenv("SESSIE_GEHEUGEN_MAX_MB", "512"))
+SESSIE_IDLE_SEC = int(os.getenv("SESSIE_IDLE_SEC", "1800"))
+
+
+def schat_grootte(obj, _gezien=None):
+    """Ruwe schatting in bytes van obj inclusief inhoud (dicts, lijsten, DataFrames)."""
+    if _gezien is None:
+        _gezien = set()
+    if id(obj) in _gezien:
+        return 0
+    _gezien.add(id(obj))
+
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        return int(obj.memory_usage(deep=True).sum())
+    grootte = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            grootte += schat_grootte(k, _gezien) + schat_grootte(v, _gezien)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            grootte += schat_grootte(v, _gezien)
+    return grootte
+
+
+def rss_bytes():
+    """Huidig RSS van dit proces (Linux), of None."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SessieGeheugen:
+    """
+    LRU over (sessie, sleutel). Items met vast=True (bv. de upload zelf, die
+    Streamlit vasthoudt) tellen mee maar worden nooit verwijderd.
+    """
+
+    def __init__(self, max_bytes=int(SESSIE_GEHEUGEN_MAX_MB * 1024 * 1024), idle_sec=SESSIE_IDLE_SEC):
+        self.max_bytes = max_bytes
+        self.idle_sec = idle_sec
+        self._lock = threading.Lock()
+        self._items = OrderedDict()    # (sessie, sleutel) → [waarde, grootte, vast]
+        self._actief = {}              # sessie → laatste activiteit
+        self._totaal = 0
+        self.verwijderd = 0
+
+    def raak_aan(self, sessie):
+        """Markeert de sessie als actief (aan het begin van elke rerun)."""
+        with self._lock:
+            self._actief[sessie] = time.time()
+            self._ruim_idle_op()
+
+    def haal(self, sessie, sleutel):
+        with self._lock:
+            item = self._items.get((sessie, sleutel))
+            if item is None:
+                return None
+            self._items.move_to_end((sessie, sleutel))
+            return item[0]
+
+    def zet(self, sessie, sleutel, waarde, grootte=None, vast=False):
+        """Bewaart waarde voor deze sessie; grootte=None → schat_grootte(waarde)."""
+        grootte = schat_grootte(waarde) if grootte is None else grootte
+        with self._lock:
+            self._verwijder((sessie, sleutel))
+            self._items[(sessie, sleutel)] = [waarde, grootte, vast]
+            self._totaal += grootte
+            self._actief[sessie] = time.time()
+            self._handhaaf(sessie)
+        return waarde
+
+    def werk_grootte_bij(self, sessie, sleutel, grootte):
+        """Voor items die pas later groeien (een future die klaar is)."""
+        with self._lock:
+            item = self._items.get((sessie, sleutel))
+            if item is None:
+                return
+            self._totaal += grootte - item[1]
+            item[1] = grootte
+            self._handhaaf(sessie)
+
+    def prefetch(self, sessie, sleutel, pool, fn, *args):
+        """
+        Future van fn(*args) in pool, één keer per sleutel (per sessie). Zijn
+        grootte telt mee zodra hij klaar is; is hij opgeruimd, dan start hij opnieuw.
+        """
+        future = self.haal(sessie, sleutel)
+        if future is None:
+            future = self.zet(sessie, sleutel, pool.submit(fn, *args), grootte=0)
+            future.add_done_callback(
+                lambda f: self.werk_grootte_bij(sessie, sleutel, 0 if f.exception() else schat_grootte(f.result()))
+            )
+        return future
+
+    def vergeet(self, sessie, houd=None):
+        """Verwijdert alles van de sessie, behalve sleutels waarvoor houd(sleutel) waar is."""
+        with self._lock:
+            for s, sleutel in [k for k in self._items if k[0] == sessie]:
+                if houd is None or not houd(sleutel):
+                    self._verwijder((s, sleutel))
+
+    def _verwijder(self, sleutel):
+        item = self._items.pop(sleutel, None)
+        if item is not None:
+            self._totaal -= item[1]
+
+    def _ruim_idle_op(self):
+        grens = time.time() - self.idle_sec
+        for sessie in [s for s, t in self._actief.items() if t < grens]:
+            for sleutel in [k for k in self._items if k[0] == sessie]:
+                self._verwijder(sleutel)
+                self.verwijderd += 1
+            del self._actief[sessie]
+
+    def _handhaaf(self, huidige_sessie):
+        if self._totaal <= self.max_bytes:
+            return
+        # eerst andere sessies (minst recent gebruikt eerst), dan pas de eigen oude items
+        for eigen in (False, True):
+            for sleutel in list(self._items):
+                if self._totaal <= self.max_bytes:
+                    return
+                waarde, _, vast = self._items[sleutel]
+                if vast or (sleutel[0] == huidige_sessie) != eigen:
+                    continue
+                if eigen and sleutel == next(reversed(self._items)):
+                    continue   # net gezet: niet meteen weer weggooien
+                if hasattr(waarde, "done") and not waarde.done():
+                    continue   # lopende prefetch
+                self._verwijder(sleutel)
+                self.verwijderd += 1
+
+    def overzicht(self):
+        """Gebruik per sessie, voor de beheer-weergave."""
+        with self._lock:
+            nu = time.time()
+            per_sessie = {}
+            for (sessie, _), (_, grootte, vast) in self._items.items():
+                s = per_sessie.setdefault(sessie, {"sessie": sessie, "items": 0, "bytes": 0, "vast_bytes": 0})
+                s["items"] += 1
+                s["bytes"] += grootte
+                if vast:
+                    s["vast_bytes"] += grootte
+            for sessie, s in per_sessie.items():
+                s["idle_sec"] = round(nu - self._actief.get(sessie, nu))
+            return {
+                "totaal_bytes": self._totaal,
+                "max_bytes": self.max_bytes,
+                "rss_bytes": rss_bytes(),
+                "verwijderd": self.verwijderd,
+                "sessies": sorted(per_sessie.values(), key=lambda s: -s["bytes"]),
+            }
+
+
+_GEHEUGEN = None
+_GEHEUGEN_LOCK = threading.Lock()
+
+
+def get_sessie_geheugen():
+    """Het geheugenbudget van dit proces (gedeeld door alle sessies)."""
+    global _GEHEUGEN
+    with _GEHEUGEN_LOCK:
+        if _GEHEUGEN is None:
+            _GEHEUGEN = SessieGeheugen()
+        return _GEHEUGEN
@@ -0,0 +1,376 @@
+import abc
+import fcntl
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# ======================================================
+# 🗄️ STATE STORE — TOKENS, TAX RATE, OFFERTE-STATE, CACHES
+# Eén interface, zodat meerdere processen/replica's dezelfde
+# state kunnen delen. Kies de backend met STATE_STORE.
+# ======================================================
+
+STATE_STORE = os.getenv("STATE_STORE", "bestand")   # bestand | sqlite | redis
+STATE_DIR = os.getenv("STATE_DIR", "/app/state")   # eigen map, niet tussen de broncode in /app
+# refresh_token.txt e.d. stonden vroeger in /app; zonder eigen STATE_DIR worden ze bij eerste gebruik overgenomen
+OUDE_STATE_DIR = None if "STATE_DIR" in os.environ else "/app"
+
+
+def state_pad(bestandsnaam):
+    """
+    Standaardpad voor een bestand met state: in STATE_DIR. Staat het zonder
+    eigen STATE_DIR alleen nog in /app (van voor STATE_DIR), dan dat bestand.
+    """
+    pad = os.path.join(STATE_DIR, bestandsnaam)
+    if OUDE_STATE_DIR and not os.path.exists(pad):
+        oud = os.path.join(OUDE_STATE_DIR, bestandsnaam)
+        if os.path.exists(oud):
+            return oud
+    return pad
+
+
+STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH") or state_pad("state.sqlite3")
+STATE_OPRUIMEN_SEC = int(os.getenv("STATE_OPRUIMEN_SEC", "3600"))   # hoe vaak verlopen sleutels opgeruimd worden
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = os.getenv("REDIS_PREFIX", "inmeet:")
+
+
+class StateStore(abc.ABC):
+    """Key/value store met optionele TTL. Waarden zijn strings."""
+
+    @abc.abstractmethod
+    def get(self, sleutel):
+        """Waarde, of None als de sleutel niet bestaat of verlopen is."""
+
+    @abc.abstractmethod
+    def set(self, sleutel, waarde, ttl_sec=None):
+        """Zet de waarde; met ttl_sec verloopt ze na zoveel seconden."""
+
+    @abc.abstractmethod
+    def delete(self, sleutel):
+        """Verwijdert de sleutel (geen fout als hij niet bestaat)."""
+
+    @abc.abstractmethod
+    def compare_and_set(self, sleutel, verwacht, nieuw, ttl_sec=None):
+        """
+        Zet sleutel op nieuw als de huidige waarde gelijk is aan verwacht
+        (None = bestaat niet / verlopen; nieuw=None = verwijderen).
+        Geeft True terug als de wissel gelukt is.
+        """
+
+    def get_json(self, sleutel):
+        waarde = self.get(sleutel)
+        if waarde is None:
+            return None
+        try:
+            return json.loads(waarde)
+        except ValueError:
+            return None
+
+    def set_json(self, sleutel, waarde, ttl_sec=None):
+        self.set(sleutel, json.dumps(waarde), ttl_sec)
+
+
+class BestandStore(StateStore):
+    """
+    Eén bestand per sleutel: <map>/<sleutel>.txt. Met een TTL begint het
+    bestand met een regel "verloopt=<unix-tijd>", zodat waarde en TTL in één
+    os.replace geschreven worden; zonder TTL staat alleen de waarde erin
+    (zoals de oude refresh_token.txt), tenzij die leeg is of met witruimte
+    begint of eindigt: bestanden zonder kop worden bij het lezen gestript.
+    Verlopen sleutels worden verwijderd zodra get() ze ziet, en minstens
+    elke STATE_OPRUIMEN_SEC in één ronde.
+    Alleen geschikt voor één container (of een gedeeld volume).
+    """
+
+    KOP = "verloopt="
+
+    def __init__(self, map_=STATE_DIR, oude_map=None):
+        self.map = map_
+        self.oude_map = oude_map   # bestanden zonder TTL hieruit overnemen als ze in map_ ontbreken
+        self._lock = threading.Lock()
+        self._opgeruimd_op = 0.0
+
+    def _pad(self, sleutel, map_=None):
+        veilig = re.sub(r"[^A-Za-z0-9_.-]", "_", sleutel)
+        return os.path.join(map_ or self.map, f"{veilig}.txt")
+
+    @contextmanager
+    def _schrijfslot(self):
+        """Thread-lock + flock op één lock-bestand: ook processen op hetzelfde volume schrijven om de beurt."""
+        os.makedirs(self.map, exist_ok=True)
+        with self._lock, open(os.path.join(self.map, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _lees(self, pad):
+        """(waarde of None, verloopt of None); waarde None als het bestand er niet is."""
+        try:
+            with open(pad, "r") as f:
+                inhoud = f.read()
+        except OSError:
+            return None, None
+        verloopt = None
+        if inhoud.startswith(self.KOP):
+            kop, _, inhoud = inhoud.partition("\n")
+            try:
+                verloopt = float(kop[len(self.KOP):]) if kop[len(self.KOP):] else None
+            except ValueError:
+                verloopt = None
+            return inhoud, verloopt   # met kop: de waarde precies zoals gezet
+        # zonder kop: met de hand of door oudere versies geschreven (strip, leeg = geen waarde)
+        try:
+            # aparte .ttl van vóór het gecombineerde formaat
+            with open(pad + ".ttl", "r") as f:
+                verloopt = float(f.read().strip())
+        except (OSError, ValueError):
+            pass
+        return inhoud.strip() or None, verloopt
+
+    def _verwijder(self, pad):
+        for p in (pad, pad + ".ttl"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+    def _geldig(self, sleutel):
+        """Waarde als die er is en niet verlopen is (zonder lock)."""
+        waarde, verloopt = self._lees(self._pad(sleutel))
+        if waarde is not None and verloopt is not None and time.time() > verloopt:
+            return None
+        return waarde
+
+    def get(self, sleutel):
+        pad = self._pad(sleutel)
+        waarde, verloopt = self._lees(pad)
+        if waarde is not None and verloopt is not None and time.time() > verloopt:
+            with self._schrijfslot():
+                # opnieuw kijken: een andere schrijver kan net een nieuwe waarde gezet hebben
+                _, verloopt = self._lees(pad)
+                if verloopt is not None and time.time() > verloopt:
+                    self._verwijder(pad)
+            return None
+        if waarde is None and self.oude_map:
+            waarde = self._neem_over(sleutel)
+        return waarde
+
+    def _neem_over(self, sleutel):
+        oud = self._pad(sleutel, self.oude_map)
+        if os.path.exists(oud + ".ttl"):
+            return None   # cache-bestanden uit de oude map niet overnemen
+        waarde, _ = self._lees(oud)
+        if waarde is not None:
+            with self._schrijfslot():
+                if self._geldig(sleutel) is None:
+                    self._schrijf(sleutel, waarde, None)
+        return waarde
+
+    def set(self, sleutel, waarde, ttl_sec=None):
+        with self._schrijfslot():
+            self._schrijf(sleutel, waarde, ttl_sec)
+        if time.time() - self._opgeruimd_op > STATE_OPRUIMEN_SEC:
+            self.ruim_op()
+
+    def _schrijf(self, sleutel, waarde, ttl_sec):
+        pad = self._pad(sleutel)
+        inhoud = waarde
+        if ttl_sec:
+            inhoud = f"{self.KOP}{time.time() + ttl_sec}\n{waarde}"
+        elif waarde != waarde.strip() or not waarde or waarde.startswith(self.KOP):
+            inhoud = f"{self.KOP}\n{waarde}"   # lege kop: geen TTL, waarde niet strippen
+        tmp = pad + ".tmp"   # onder het schrijfslot: één schrijver tegelijk
+        with open(tmp, "w") as f:
+            f.write(inhoud)
+        os.replace(tmp, pad)
+        if os.path.exists(pad + ".ttl"):
+            os.remove(pad + ".ttl")
+
+    def delete(self, sleutel):
+        with self._schrijfslot():
+            self._verwijder(self._pad(sleutel))
+
+    def compare_and_set(self, sleutel, verwacht, nieuw, ttl_sec=None):
+        with self._schrijfslot():
+            if self._geldig(sleutel) != verwacht:
+                return False
+            if nieuw is None:
+                self._verwijder(self._pad(sleutel))
+            else:
+                self._schrijf(sleutel, nieuw, ttl_sec)
+            return True
+
+    def ruim_op(self):
+        """Verwijdert alle verlopen sleutels (en oude .lock-bestanden); geeft het aantal terug."""
+        self._opgeruimd_op = time.time()
+        try:
+            namen = os.listdir(self.map)
+        except OSError:
+            return 0
+        aantal = 0
+        with self._schrijfslot():
+            nu = time.time()
+            for naam in namen:
+                pad = os.path.join(self.map, naam)
+                if naam.endswith(".txt.lock"):
+                    self._verwijder(pad)   # per-sleutel locks van vóór het ene lock-bestand
+                elif naam.endswith(".txt"):
+                    _, verloopt = self._lees(pad)
+                    if verloopt is not None and nu > verloopt:
+                        self._verwijder(pad)
+                        aantal += 1
+        return aantal
+
+
+class SqliteStore(StateStore):
+    """
+    Eén SQLite-bestand (WAL). Meerdere workers/processen op dezelfde host of
+    hetzelfde volume delen zo één warme state.
+    """
+
+    def __init__(self, pad=STATE_SQLITE_PATH):
+        self.pad = pad
+        self._lokaal = threading.local()
+        self._opgeruimd_op = 0.0
+        os.makedirs(os.path.dirname(pad) or ".", exist_ok=True)
+        con = self._con()
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS kv (sleutel TEXT PRIMARY KEY, waarde TEXT NOT NULL, verloopt REAL)"
+        )
+
+    def _con(self):
+        con = getattr(self._lokaal, "con", None)
+        if con is None:
+            # autocommit; transacties expliciet met BEGIN IMMEDIATE
+            con = sqlite3.connect(self.pad, timeout=30, isolation_level=None)
+            self._lokaal.con = con
+        return con
+
+    def _lees(self, con, sleutel):
+        rij = con.execute("SELECT waarde, verloopt FROM kv WHERE sleutel = ?", (sleutel,)).fetchone()
+        if rij is None or (rij[1] is not None and time.time() > rij[1]):
+            return None
+        return rij[0]
+
+    def get(self, sleutel):
+        return self._lees(self._con(), sleutel)
+
+    def set(self, sleutel, waarde, ttl_sec=None):
+        verloopt = time.time() + ttl_sec if ttl_sec else None
+        self._con().execute(
+            "INSERT OR REPLACE INTO kv (sleutel, waarde, verloopt) VALUES (?, ?, ?)",
+            (sleutel, waarde, verloopt),
+        )
+        if time.time() - self._opgeruimd_op > STATE_OPRUIMEN_SEC:
+            self.ruim_op()
+
+    def ruim_op(self):
+        """Verwijdert alle verlopen sleutels; geeft het aantal terug."""
+        self._opgeruimd_op = time.time()
+        return self._con().execute(
+            "DELETE FROM kv WHERE verloopt IS NOT NULL AND verloopt < ?", (time.time(),)
+        ).rowcount
+
+    def delete(self, sleutel):
+        self._con().execute("DELETE FROM kv WHERE sleutel = ?", (sleutel,))
+
+    def compare_and_set(self, sleutel, verwacht, nieuw, ttl_sec=None):
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if self._lees(con, sleutel) != verwacht:
+                con.execute("ROLLBACK")
+                return False
+            if nieuw is None:
+                con.execute("DELETE FROM kv WHERE sleutel = ?", (sleutel,))
+            else:
+                verloopt = time.time() + ttl_sec if ttl_sec else None
+                con.execute(
+                    "INSERT OR REPLACE INTO kv (sleutel, waarde, verloopt) VALUES (?, ?, ?)",
+                    (sleutel, nieuw, verloopt),
+                )
+            con.execute("COMMIT")
+            return True
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+
+class RedisStore(StateStore):
+    """
+    Redis (of compatibel: Valkey, KeyDB, ...) voor meerdere containers.
+    client: elk object met de redis-py interface, bv. fakeredis.FakeRedis()
+    als lokale stand-in; anders wordt er verbonden met REDIS_URL.
+    """
+
+    def __init__(self, client=None, url=REDIS_URL, prefix=REDIS_PREFIX):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise Exception("STATE_STORE=redis vereist het pakket 'redis' (pip install redis).")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    @staticmethod
+    def _str(waarde):
+        return waarde.decode() if isinstance(waarde, bytes) else waarde
+
+    def get(self, sleutel):
+        return self._str(self.client.get(self.prefix + sleutel))
+
+    def set(self, sleutel, waarde, ttl_sec=None):
+        self.client.set(self.prefix + sleutel, waarde, ex=max(1, int(ttl_sec)) if ttl_sec else None)
+
+    def delete(self, sleutel):
+        self.client.delete(self.prefix + sleutel)
+
+    def compare_and_set(self, sleutel, verwacht, nieuw, ttl_sec=None):
+        from redis.exceptions import WatchError
+
+        sleutel = self.prefix + sleutel
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(sleutel)
+                    if self._str(pipe.get(sleutel)) != verwacht:
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    if nieuw is None:
+                        pipe.delete(sleutel)
+                    else:
+                        pipe.set(sleutel, nieuw, ex=max(1, int(ttl_sec)) if ttl_sec else None)
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_state_store():
+    """De store van dit proces, gekozen via STATE_STORE (bestand, sqlite of redis)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            if STATE_STORE == "bestand":
+                _STORE = BestandStore(STATE_DIR, OUDE_STATE_DIR)
+            elif STATE_STORE == "sqlite":
+                _STORE = SqliteStore()
+            elif STATE_STORE == "redis":
+                _STORE = RedisStore()
+            else:
+                raise Exception(f"Onbekende STATE_STORE '{STATE_STORE}'.")
+        return _STORE
@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# ======================================================
+# 🚦 TEAMLEADER RATE LIMIT — TOKEN BUCKET + PRIORITEIT
+# Alle Teamleader-calls van dit proces lopen hierdoor: maximaal het
+# account-limiet per minuut, gelijkmatig verdeeld, interactief vóór batch.
+# Limit/remaining/reset uit de response headers sturen de bucket bij.
+# ======================================================
+
+TEAMLEADER_RATE_LIMIT = int(os.getenv("TEAMLEADER_RATE_LIMIT", "200"))   # requests per venster
+TEAMLEADER_RATE_VENSTER_SEC = 60
+BATCH_RESERVE_FRACTIE = 0.1   # dit deel van de bucket blijft vrij voor operators
+
+PRIORITEIT_INTERACTIEF = 0
+PRIORITEIT_BATCH = 10
+
+
+def _header_getal(headers, naam):
+    try:
+        return float(headers.get(naam))
+    except (TypeError, ValueError):
+        return None
+
+
+def _reset_over_sec(waarde):
+    """X-RateLimit-Reset als seconden-vanaf-nu (epoch, aantal seconden of ISO-datum)."""
+    if not waarde:
+        return None
+    try:
+        getal = float(waarde)
+        return getal - time.time() if getal > 1e9 else getal
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(str(waarde).replace("Z", "+00:00")).timestamp() - time.time()
+    except ValueError:
+        return None
+
+
+class RateLimitScheduler:
+
+    def __init__(self, limiet=TEAMLEADER_RATE_LIMIT, venster_sec=TEAMLEADER_RATE_VENSTER_SEC):
+        self._cond = threading.Condition()
+        self._teller = itertools.count()
+        self._wachtrij = []            # heap van (prioriteit, volgnummer)
+        self._zet_limiet(limiet, venster_sec)
+        self._tokens = float(limiet)
+        self._bijgevuld_op = time.monotonic()
+        self._pauze_tot = 0.0
+        self._wachttijden = {PRIORITEIT_INTERACTIEF: deque(maxlen=500), PRIORITEIT_BATCH: deque(maxlen=500)}
+        self._aantal = {}
+        self._aantal_429 = 0
+
+    def _zet_limiet(self, limiet, venster_sec):
+        self.limiet = max(1.0, float(limiet))
+        self.venster_sec = venster_sec
+        self._per_sec = self.limiet / venster_sec
+        self._reserve = self.limiet * BATCH_RESERVE_FRACTIE
+
+    def _vul_bij(self):
+        nu = time.monotonic()
+        self._tokens = min(self.limiet, self._tokens + (nu - self._bijgevuld_op) * self._per_sec)
+        self._bijgevuld_op = nu
+
+    def wacht_op_beurt(self, prioriteit=PRIORITEIT_INTERACTIEF):
+        """Blokkeert tot deze request mag; geeft de wachttijd (sec) terug."""
+        start = time.monotonic()
+        with self._cond:
+            ticket = (prioriteit, next(self._teller))
+            heapq.heappush(self._wachtrij, ticket)
+            try:
+                while True:
+                    self._vul_bij()
+                    nu = time.monotonic()
+                    nodig = 1 + (self._reserve if prioriteit > PRIORITEIT_INTERACTIEF else 0)
+
+                    if self._wachtrij[0] == ticket and nu >= self._pauze_tot and self._tokens >= nodig:
+                        self._tokens -= 1
+                        break
+
+                    if self._wachtrij[0] == ticket:
+                        timeout = max(self._pauze_tot - nu, (nodig - self._tokens) / self._per_sec, 0.001)
+                    else:
+                        timeout = None   # wacht tot de voorganger klaar is
+                    self._cond.wait(timeout)
+            finally:
+                self._wachtrij.remove(ticket)
+                heapq.heapify(self._wachtrij)
+                self._cond.notify_all()
+
+            wacht = time.monotonic() - start
+            self._wachttijden.setdefault(prioriteit, deque(maxlen=500)).append(wacht)
+            self._aantal[prioriteit] = self._aantal.get(prioriteit, 0) + 1
+            return wacht
+
+    def verwerk_antwoord(self, resp):
+        """Stuurt de bucket bij op basis van X-RateLimit-* headers en 429/Retry-After."""
+        headers = getattr(resp, "headers", None) or {}
+        limiet = _header_getal(headers, "X-RateLimit-Limit")
+        over = _header_getal(headers, "X-RateLimit-Remaining")
+        reset = _reset_over_sec(headers.get("X-RateLimit-Reset"))
+
+        with self._cond:
+            if limiet and limiet != self.limiet:
+                self._zet_limiet(limiet, self.venster_sec)
+            if over is not None:
+                self._vul_bij()
+                self._tokens = min(self._tokens, over)
+                if over <= 0 and reset:
+                    self._pauze_tot = max(self._pauze_tot, time.monotonic() + reset)
+
+            if resp.status_code == 429:
+                self._aantal_429 += 1
+                retry = _header_getal(headers, "Retry-After") or reset or self.venster_sec / 4
+                self._pauze_tot = max(self._pauze_tot, time.monotonic() + retry)
+                self._tokens = 0.0
+
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Wachtrij-statistieken per prioriteit (seconden)."""
+        with self._cond:
+            per_prioriteit = {}
+            for prioriteit, tijden in self._wachttijden.items():
+                gesorteerd = sorted(tijden)
+                per_prioriteit["interactief" if prioriteit == PRIORITEIT_INTERACTIEF else "batch"] = {
+                    "aantal": self._aantal.get(prioriteit, 0),
+                    "wacht_gem": sum(gesorteerd) / len(gesorteerd) if gesorteerd else 0.0,
+                    "wacht_p95": gesorteerd[int(len(gesorteerd) * 0.95)] if gesorteerd else 0.0,
+                    "wacht_max": gesorteerd[-1] if gesorteerd else 0.0,
+                }
+            return {
+                "limiet_per_minuut": self.limiet,
+                "tokens": round(self._tokens, 2),
+                "in_wachtrij": len(self._wachtrij),
+                "aantal_429": self._aantal_429,
+                "wachttijd": per_prioriteit,
+            }
+
+
+scheduler = RateLimitScheduler()
@@ -0,0 +1,173 @@
+import abc
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import inmeetverwerker_hellofront as hf
+from tenants import STANDAARD_TENANT, gebruik_tenant
+
+# ======================================================
+# 🔄 GESYNCTE TEAMLEADER-LIJST PER TENANT
+# Basis voor de deal-index en de productcatalogus: een lijst uit
+# Teamleader in geheugen + op disk, incrementeel gesynct (updated_since
+# + paging) met TTL, optioneel ververst door een achtergrondthread.
+# Een subklasse kiest het endpoint en het bestandsveld, zet een ruw
+# item om (_item) en bouwt haar eigen index (_herbouw).
+# ======================================================
+
+log = logging.getLogger(__name__)
+
+
+class SyncCache(abc.ABC):
+    """Items {id: item} van één Teamleader-lijst voor één tenant."""
+
+    ENDPOINT = None          # bv. "deals.list"
+    VELD = None              # sleutel van de items in het bestand, bv. "deals"
+    NAAM = None              # voor de log en de threadnaam
+    MIN_INTERVAL_SEC = 30    # achtergrondsync nooit vaker dan dit
+
+    def __init__(self, pad, ttl_sec, tenant=STANDAARD_TENANT):
+        self.pad = pad
+        self.ttl_sec = ttl_sec
+        self.tenant = tenant
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._items = {}
+        self._laatst_gewijzigd = None   # hoogste updated_at gezien in Teamleader
+        self._gesynct_op = 0.0
+        self._thread = None
+        self._laad()
+
+    # ---------- voor subklassen ----------
+
+    def _body(self, volledig):
+        """Body voor ENDPOINT; volledig = alles opnieuw, anders alleen gewijzigd sinds de vorige sync."""
+        return {} if volledig else {"filter": {"updated_since": self._laatst_gewijzigd}}
+
+    def _voorbereid(self, gewijzigd):
+        """Extra gegevens bij de gewijzigde items, opgehaald buiten de lock (bv. klantnamen)."""
+        return None
+
+    @abc.abstractmethod
+    def _item(self, ruw, extra):
+        """Item voor de cache, of None om het (weer) weg te laten."""
+
+    def _herbouw(self):
+        """Index opnieuw opbouwen na laden of sync (onder de lock)."""
+
+    def _bijgewerkt(self):
+        """Na laden of sync, buiten de lock."""
+
+    # ---------- opslag ----------
+
+    def _laad(self):
+        if not os.path.exists(self.pad):
+            return
+        try:
+            with open(self.pad, "r") as f:
+                opgeslagen = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._items = opgeslagen.get(self.VELD, {})
+        self._laatst_gewijzigd = opgeslagen.get("laatst_gewijzigd")
+        self._gesynct_op = opgeslagen.get("gesynct_op", 0.0)
+        self._herbouw()
+        self._bijgewerkt()
+
+    def _bewaar(self):
+        try:
+            os.makedirs(os.path.dirname(self.pad) or ".", exist_ok=True)
+            tmp = self.pad + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({
+                    self.VELD: self._items,
+                    "laatst_gewijzigd": self._laatst_gewijzigd,
+                    "gesynct_op": self._gesynct_op,
+                }, f)
+            os.replace(tmp, self.pad)
+        except OSError:
+            pass  # blijft in geheugen bruikbaar
+
+    # ---------- sync ----------
+
+    def is_verlopen(self):
+        return time.time() - self._gesynct_op > self.ttl_sec
+
+    def sync(self, forceer=False):
+        """Haalt items op die sinds de vorige sync gewijzigd zijn (de eerste keer of met forceer: alle)."""
+        if not forceer and not self.is_verlopen():
+            return False
+
+        with self._sync_lock, gebruik_tenant(self.tenant):
+            start = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            volledig = forceer or not self._laatst_gewijzigd
+
+            gewijzigd = list(hf.teamleader_lijst(self.ENDPOINT, self._body(volledig)))
+            extra = self._voorbereid(gewijzigd)
+
+            with self._lock:
+                items = {} if volledig else dict(self._items)
+                for ruw in gewijzigd:
+                    item_id = ruw.get("id")
+                    if not item_id:
+                        continue
+                    item = self._item(ruw, extra)
+                    if item is None:
+                        items.pop(item_id, None)
+                    else:
+                        items[item_id] = item
+
+                self._items = items
+                gezien = [r.get("updated_at") for r in gewijzigd if r.get("updated_at")]
+                if gezien:
+                    self._laatst_gewijzigd = max(gezien + [self._laatst_gewijzigd or ""])
+                elif not self._laatst_gewijzigd:
+                    self._laatst_gewijzigd = start
+                self._gesynct_op = time.time()
+                self._herbouw()
+                self._bewaar()
+            self._bijgewerkt()
+
+        return True
+
+    def start_achtergrond_sync(self):
+        """Start (één keer) een thread die de cache elke TTL ververst."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.sync()
+                except Exception:
+                    log.exception("%s sync mislukt", self.NAAM)
+                time.sleep(max(self.ttl_sec, self.MIN_INTERVAL_SEC))
+
+        self._thread = threading.Thread(target=loop, name=f"{self.NAAM.lower()}-sync", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class PerTenant:
+    """Eén cache per tenant; andere tenants dan de standaard krijgen pad_<tenant>.json."""
+
+    def __init__(self, cls, pad):
+        self.cls = cls
+        self.pad = pad
+        self._lock = threading.Lock()
+        self._caches = {}
+
+    def voor(self, tenant):
+        with self._lock:
+            if tenant not in self._caches:
+                pad = self.pad
+                if tenant != STANDAARD_TENANT:
+                    basis, ext = os.path.splitext(self.pad)
+                    pad = f"{basis}_{tenant}{ext}"
+                self._caches[tenant] = self.cls(pad=pad, tenant=tenant)
+            return self._caches[tenant]
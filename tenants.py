@@ -0,0 +1,147 @@
+import contextvars
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from teamleader_scheduler import RateLimitScheduler, scheduler
+
+# ======================================================
+# 🏷️ TENANTS — MEERDERE TEAMLEADER-ACCOUNTS IN ÉÉN PROCES
+# De standaard-tenant gebruikt de bekende variabelen (CLIENT_ID,
+# CLIENT_SECRET, REFRESH_TOKEN, TAX_RATE_21_ID) en dezelfde sleutels in
+# de state store als voorheen. Extra tenants via TENANTS=hellofront,hoken
+# met per tenant dezelfde variabelen met prefix, bv. HELLOFRONT_CLIENT_ID.
+# <PREFIX>PRIJZEN = pad naar JSON met prijswijzigingen t.o.v. de
+# standaard prijstabel (zelfde formaat als `cli.py herprijs --kandidaat`).
+# Per request kiezen met gebruik_tenant(naam) (API: header X-Tenant).
+# ======================================================
+
+STANDAARD_TENANT = "standaard"
+HTTP_POOL_GROOTTE = int(os.getenv("HTTP_POOL_GROOTTE", "10"))
+
+
+def _lees_prijzen(pad):
+    if not pad:
+        return None
+    with open(pad, "r") as f:
+        return json.load(f)
+
+
+class Tenant:
+    """Eén Teamleader-account: credentials, eigen HTTP-pool, rate limit en caches."""
+
+    def __init__(self, naam, client_id, client_secret, refresh_token=None, tax_rate_21_id=None,
+                 prijs_wijzigingen=None, sleutel_prefix="", env_prefix="", scheduler_=None):
+        self.naam = naam
+        self.env_prefix = env_prefix                # voor meldingen ("zet <prefix>REFRESH_TOKEN")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token_env = refresh_token      # fallback zolang de store nog leeg is
+        # Zet in Railway bij voorkeur TAX_RATE_21_ID=<uuid van 21% BTW in Teamleader>;
+        # zonder wordt de 21%-taxrate automatisch opgezocht (zie get_tax_rate_21_id).
+        self.tax_rate_21_id_env = tax_rate_21_id
+        self.prijs_wijzigingen = prijs_wijzigingen
+        self.sleutel_prefix = sleutel_prefix
+
+        # warme verbindingen per account
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_GROOTTE, pool_maxsize=HTTP_POOL_GROOTTE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # het rate limit van Teamleader geldt per account
+        self.scheduler = scheduler_ or RateLimitScheduler()
+
+        # caches, gevuld door inmeetverwerker_hellofront
+        self.token_lock = threading.Lock()
+        self.access_token = None
+        self.access_token_geldig_tot = 0.0
+        self.tax_rate_21_id = None
+        self.prijstabel = None
+        # gevuld door product_catalogus na elke sync
+        self.product_ids = {}              # artikelsleutel → Teamleader product_id
+        self.catalogus_prijzen = None      # prijswijzigingen uit de catalogus (PRODUCT_PRIJZEN=1)
+
+    def sleutel(self, naam):
+        """Sleutel in de state store voor deze tenant."""
+        return self.sleutel_prefix + naam
+
+    def __repr__(self):
+        return f"Tenant({self.naam!r})"
+
+
+def _laad_tenants():
+    tenants = {
+        STANDAARD_TENANT: Tenant(
+            STANDAARD_TENANT,
+            os.getenv("CLIENT_ID"),
+            os.getenv("CLIENT_SECRET"),
+            os.getenv("REFRESH_TOKEN"),
+            os.getenv("TAX_RATE_21_ID") or os.getenv("TAX_RATE_ID"),
+            _lees_prijzen(os.getenv("PRIJZEN")),
+            scheduler_=scheduler,
+        )
+    }
+    for naam in os.getenv("TENANTS", "").split(","):
+        naam = naam.strip().lower()
+        if not naam or naam == STANDAARD_TENANT:
+            continue
+        prefix = naam.upper().replace("-", "_") + "_"
+        tenants[naam] = Tenant(
+            naam,
+            os.getenv(prefix + "CLIENT_ID"),
+            os.getenv(prefix + "CLIENT_SECRET"),
+            os.getenv(prefix + "REFRESH_TOKEN"),
+            os.getenv(prefix + "TAX_RATE_21_ID"),
+            _lees_prijzen(os.getenv(prefix + "PRIJZEN")),
+            sleutel_prefix=f"tenant:{naam}:",
+            env_prefix=prefix,
+        )
+    return tenants
+
+
+TENANTS = _laad_tenants()
+_HUIDIGE_TENANT = contextvars.ContextVar("tenant", default=STANDAARD_TENANT)
+
+
+def tenant_namen():
+    return list(TENANTS)
+
+
+def get_tenant(naam=None):
+    """Tenant met deze naam, of zonder naam de tenant van het huidige request."""
+    naam = (naam or _HUIDIGE_TENANT.get()).strip().lower()
+    if naam not in TENANTS:
+        raise ValueError(f"Onbekende tenant '{naam}' (bekend: {', '.join(TENANTS)}).")
+    return TENANTS[naam]
+
+
+def huidige_tenant():
+    return get_tenant()
+
+
+def zet_tenant(naam):
+    """Kiest de tenant voor de rest van deze context (bv. één Streamlit-run)."""
+    _HUIDIGE_TENANT.set(get_tenant(naam).naam)
+
+
+@contextmanager
+def gebruik_tenant(naam=None):
+    """Voert het blok uit voor deze tenant; zonder naam blijft de huidige staan."""
+    tenant = get_tenant(naam)
+    vorige = _HUIDIGE_TENANT.set(tenant.naam)
+    try:
+        yield tenant
+    finally:
+        _HUIDIGE_TENANT.reset(vorige)
+
+
+def in_context(fn):
+    """fn gebonden aan de huidige tenant, voor een thread pool (die kopieert geen context)."""
+    context = contextvars.copy_context()
+    # per aanroep een kopie: één Context kan niet in twee threads tegelijk actief zijn
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# de modules staan plat in de root van de repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# tests schrijven nooit naar /app: state in een tijdelijke map, archief uit
+os.environ.setdefault("STATE_DIR", tempfile.mkdtemp(prefix="inmeet-state-"))
+os.environ.setdefault("OFFERTE_ARCHIEF", "")
+os.environ.setdefault("OPWARMEN", "0")
@@ -0,0 +1,95 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+import inmeet_service as service
+
+TOKEN = "test-token"
+KOP = {"Authorization": f"Bearer {TOKEN}"}
+PARSE = {"onderdelen": [], "maatwerk_kasten": [], "scharnieren": 0, "lades": 0}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(service, "API_TOKEN", TOKEN)
+    return TestClient(api.app)
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """prijs/verstuur vervangen: onthoudt de aanroepen in plaats van te rekenen en te versturen."""
+    aanroepen = {"prijs": [], "verstuur": []}
+
+    def prijs(parse_state, model=None, deal_id=None, **kwargs):
+        aanroepen["prijs"].append((parse_state, model, deal_id))
+        return {"data": {"model": model or "Classic", "totaal_excl": 1234.5}}
+
+    def verstuur(deal_id, data, mode, parse_state, dry_run=False, forceer=False):
+        aanroepen["verstuur"].append({"deal_id": deal_id, "data": data, "dry_run": dry_run, "forceer": forceer})
+        if dry_run:
+            # "leeg": niets gewijzigd, dus niets te versturen
+            return {"payload": None if deal_id == "leeg" else b'{"deal_id": "%s"}' % deal_id.encode()}
+        return {"status": "aangemaakt"}
+
+    monkeypatch.setattr(service, "prijs", prijs)
+    monkeypatch.setattr(service, "verstuur", verstuur)
+    return aanroepen
+
+
+def test_zonder_api_token_staan_routes_uit(monkeypatch, pipeline):
+    monkeypatch.setattr(service, "API_TOKEN", "")
+    resp = TestClient(api.app).post("/quotations", json={"deal_id": "d1", "mode": "P", "parse": PARSE})
+    assert resp.status_code == 503
+    assert pipeline["verstuur"] == []
+
+
+@pytest.mark.parametrize("kop", [{}, {"Authorization": "Bearer fout"}, {"Authorization": f"Basic {TOKEN}"}])
+def test_ongeldig_token_geeft_401(client, pipeline, kop):
+    resp = client.post("/quotations", json={"deal_id": "d1", "mode": "P", "parse": PARSE}, headers=kop)
+    assert resp.status_code == 401
+    assert resp.headers["WWW-Authenticate"] == "Bearer"
+    assert pipeline["verstuur"] == []
+
+
+def test_quotations_prijst_opnieuw_uit_parse(client, pipeline):
+    resp = client.post("/quotations", headers=KOP, json={
+        "deal_id": "d1", "mode": "P", "parse": PARSE, "model": "Shaker",
+        # bedragen van de client worden genegeerd
+        "data": {"model": "Shaker", "totaal_excl": 1.0},
+    })
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "aangemaakt"}
+    assert pipeline["prijs"] == [(PARSE, "Shaker", "d1")]
+    assert pipeline["verstuur"][0]["data"] == {"model": "Shaker", "totaal_excl": 1234.5}
+
+
+def test_quotations_ongeldige_parse_geeft_422(client, monkeypatch):
+    def prijs(parse_state, model=None, deal_id=None, **kwargs):
+        raise KeyError("onderdelen")
+
+    monkeypatch.setattr(service, "prijs", prijs)
+    resp = client.post("/quotations", headers=KOP, json={"deal_id": "d1", "mode": "P", "parse": {}})
+    assert resp.status_code == 422
+
+
+def test_http_service_dry_run(client, pipeline):
+    http = service.HttpService(url="http://testserver")
+    http.session = client
+    data = {"model": "Classic", "totaal_excl": 1.0}
+
+    assert http.verstuur("d1", data, "P", PARSE, dry_run=True) == {"payload": b'{"deal_id": "d1"}'}
+    assert http.verstuur("leeg", data, "P", PARSE, dry_run=True) == {"payload": None}
+    assert http.verstuur("d1", data, "P", PARSE) == {"status": "aangemaakt"}
+    assert [v["dry_run"] for v in pipeline["verstuur"]] == [True, True, False]
+
+
+def test_deals_via_api(client, monkeypatch):
+    monkeypatch.setattr(service, "zoek_deals", lambda q, limiet=10: {"deals": [{"id": "d1", "titel": q}]})
+    monkeypatch.setattr(service, "deal", lambda deal_id: {"deal": None if deal_id == "weg" else {"id": deal_id}})
+    http = service.HttpService(url="http://testserver")
+    http.session = client
+
+    assert http.zoek_deals("keuken") == {"deals": [{"id": "d1", "titel": "keuken"}]}
+    assert http.deal(" d1 ") == {"deal": {"id": "d1"}}
+    assert http.deal("weg") == {"deal": None}
+    assert client.get("/deals", params={"q": "keuken"}).status_code == 401
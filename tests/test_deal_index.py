@@ -0,0 +1,88 @@
+import pytest
+
+import inmeetverwerker_hellofront as hf
+import inmeet_service
+from deal_index import DealIndex
+
+DEALS = [
+    {"id": "d-1", "title": "Keuken Jansen", "status": "open", "updated_at": "2026-10-01T10:00:00+00:00",
+     "lead": {"customer": {"type": "contact", "id": "c-1"}}},
+    {"id": "d-2", "title": "Badkamer en keuken", "status": "open", "updated_at": "2026-10-02T10:00:00+00:00",
+     "lead": {"customer": {"type": "company", "id": "b-1"}}},
+    {"id": "d-3", "title": "Kasten zolder", "status": "open", "updated_at": "2026-10-03T10:00:00+00:00",
+     "lead": {"customer": {"type": "contact", "id": "c-2"}}},
+]
+KLANTEN = {
+    "contacts.list": [{"id": "c-1", "first_name": "Jan", "last_name": "Jansen"},
+                      {"id": "c-2", "first_name": "Piet", "last_name": "de Vries"}],
+    "companies.list": [{"id": "b-1", "name": "Hoken Interieurbouw"}],
+}
+
+
+@pytest.fixture
+def teamleader(monkeypatch):
+    """teamleader_lijst vervangen: deals.list geeft wat in deals staat, aanroepen worden onthouden."""
+    staat = {"deals": list(DEALS), "aanroepen": []}
+
+    def lijst(endpoint, body):
+        staat["aanroepen"].append((endpoint, body))
+        return iter(staat["deals"] if endpoint == "deals.list" else KLANTEN[endpoint])
+
+    monkeypatch.setattr(hf, "teamleader_lijst", lijst)
+    return staat
+
+
+@pytest.fixture
+def index(teamleader, tmp_path):
+    index = DealIndex(str(tmp_path / "deals.json"))
+    index.sync(forceer=True)
+    return index
+
+
+def _ids(deals):
+    return [d["id"] for d in deals]
+
+
+def test_zoek_op_prefix_van_titel_klant_en_id(index):
+    assert _ids(index.zoek("keuk")) == ["d-2", "d-1"]          # gesorteerd op titel
+    assert _ids(index.zoek("keuken jan")) == ["d-1"]            # elk woord moet passen
+    assert _ids(index.zoek("hoken")) == ["d-2"]                 # klantnaam (bedrijf)
+    assert _ids(index.zoek("vries")) == ["d-3"]                 # klantnaam (contact)
+    assert _ids(index.zoek(" d-3 ")) == ["d-3"]                 # volledig deal-ID
+    assert index.zoek("keuken", limiet=1) == [index.get("d-2")]
+    assert index.zoek("") == [] and index.zoek("garage") == []
+
+
+def test_zoek_fuzzy_bij_tikfout(index):
+    assert _ids(index.zoek("jnasen")) == ["d-1"]
+    assert _ids(index.zoek("zolder kasten")) == ["d-3"]
+
+
+def test_incrementele_sync(index, teamleader):
+    teamleader["deals"] = [
+        dict(DEALS[0], status="won", updated_at="2026-10-05T10:00:00+00:00"),
+        {"id": "d-4", "title": "Garage", "status": "open", "updated_at": "2026-10-06T10:00:00+00:00",
+         "lead": {"customer": {"type": "contact", "id": "c-1"}}},
+    ]
+    teamleader["aanroepen"].clear()
+    assert not index.sync()                                      # binnen de TTL: niets
+    index._gesynct_op = 0
+    assert index.sync()
+
+    # alleen wat sinds de vorige sync gewijzigd is; klant c-1 is al bekend
+    assert teamleader["aanroepen"] == [("deals.list", {
+        "filter": {"updated_since": "2026-10-03T10:00:00+00:00"},
+        "sort": [{"field": "created_at", "order": "asc"}],
+    })]
+    assert not index.bevat("d-1")                                # gewonnen: eruit
+    assert index.get("d-4")["klant"] == "Jan Jansen"
+    assert _ids(index.zoek("garage")) == ["d-4"]
+
+
+def test_deal_via_service(index, monkeypatch):
+    monkeypatch.setattr(inmeet_service, "deal_index_voor", lambda tenant: index)
+    monkeypatch.setattr(hf, "controleer_deal", lambda deal_id: {"id": deal_id, "title": "Uit Teamleader"})
+
+    assert inmeet_service.zoek_deals("keuken jan") == {"deals": [index.get("d-1")]}
+    assert inmeet_service.deal(" d-1 ")["deal"]["titel"] == "Keuken Jansen"   # uit de index
+    assert inmeet_service.deal("d-9")["deal"]["title"] == "Uit Teamleader"    # niet in de index
@@ -0,0 +1,107 @@
+import csv
+import json
+
+import pytest
+
+import herprijs_archief
+import inmeetverwerker_hellofront as hf
+
+
+def _kast(kolom_index, breedte):
+    kast = {
+        "kolom_index": kolom_index, "type": "C", "hoogte": 720, "breedte": breedte, "diepte": 350,
+        "zichtbare_zijde": "links", "inrichting_raw": "2x plank", "scharnieren": 2,
+        "frontmodel": "NOAH", "aantal_fronten": 1,
+    }
+    kast["inrichting"] = hf._parse_inrichting(kast["inrichting_raw"])
+    return kast
+
+
+def _parse(project, g2, h2, fronten, kasten=()):
+    return hf.maak_parse_state(
+        ["DEUR"] * fronten, g2, h2, "Wit", ["Jan Jansen"], 2, 0,
+        {"name": project, "maatwerk_kasten": list(kasten)},
+    )
+
+
+@pytest.fixture
+def archief(tmp_path):
+    map_ = tmp_path / "archief"
+    (map_ / "2026").mkdir(parents=True)
+    projecten = {
+        "noah.json": {"parse": _parse("Noah", "K01 - vlak", "MDF gespoten", 6, [_kast(2, 600), _kast(3, 900)])},
+        "2026/jack.json": _parse("Jack", "K01 - vlak", "Eikenfineer", 10),
+        "onbekend.json": {"parse": _parse("Onbekend", "K99", "Karton", 2)},
+    }
+    for naam, inhoud in projecten.items():
+        (map_ / naam).write_text(json.dumps(inhoud))
+    (map_ / "kapot.json").write_text("{geen json")
+    return map_
+
+
+def _totaal(parse_state, prijstabel):
+    model = hf.bepaal_model(parse_state["g2"], parse_state["h2"])
+    return herprijs_archief._prijs(parse_state, model, prijstabel)
+
+
+def test_herprijs_archief_diff_en_totalen(archief, tmp_path):
+    huidig = hf.huidige_prijstabel()
+    kandidaat = {
+        "M2_FRONT_PRIJZEN": {"NOAH": huidig["M2_FRONT_PRIJZEN"]["NOAH"] * 1.1},
+        "MONTAGE_PER_FRONT": huidig["MONTAGE_PER_FRONT"] + 5,
+    }
+    nieuw_pt = hf.prijstabel_met_wijzigingen(kandidaat, huidig)
+    uit = tmp_path / "uit"
+
+    samenvatting = herprijs_archief.herprijs_archief(str(archief), kandidaat, str(uit), workers=1)
+
+    noah = json.loads((archief / "noah.json").read_text())["parse"]
+    jack = json.loads((archief / "2026" / "jack.json").read_text())
+    verwacht = {
+        "Noah": (_totaal(noah, huidig), _totaal(noah, nieuw_pt)),
+        "Jack": (_totaal(jack, huidig), _totaal(jack, nieuw_pt)),
+    }
+
+    with open(uit / "diff_per_project.csv", newline="") as f:
+        per_project = {r["project"] or r["bestand"]: r for r in csv.DictReader(f)}
+    for project, (oud, nieuw) in verwacht.items():
+        rij = per_project[project]
+        assert rij["status"] == "ok"
+        assert float(rij["totaal_excl_oud"]) == round(oud["totaal_excl"], 2)
+        assert float(rij["verschil"]) == round(nieuw["totaal_excl"] - oud["totaal_excl"], 2)
+    # alleen de montage verandert voor JACK: 10 fronten × 5
+    assert float(per_project["Jack"]["verschil"]) == pytest.approx(50.0, abs=0.01)
+
+    with open(uit / "diff_per_kast.csv", newline="") as f:
+        kasten = list(csv.DictReader(f))
+    assert [(k["project"], k["kolom_index"]) for k in kasten] == [("Noah", "2"), ("Noah", "3")]
+    for kast, oud, nieuw in zip(kasten, verwacht["Noah"][0]["maatwerk_kasten"], verwacht["Noah"][1]["maatwerk_kasten"]):
+        assert float(kast["verkoop_oud"]) == oud["verkoop_excl"]
+        assert float(kast["verkoop_nieuw"]) == nieuw["verkoop_excl"]
+        assert float(kast["verkoop_nieuw"]) > float(kast["verkoop_oud"])
+
+    totaal = samenvatting["totaal"]
+    assert (totaal["projecten"], totaal["kasten"], totaal["gewijzigd"]) == (2, 2, 2)
+    assert totaal["totaal_excl_oud"] == round(sum(o["totaal_excl"] for o, _ in verwacht.values()), 2)
+    assert totaal["verschil_excl"] == round(totaal["totaal_excl_nieuw"] - totaal["totaal_excl_oud"], 2)
+    assert set(samenvatting["per_model"]) == {"NOAH", "JACK"}
+    assert samenvatting["per_model"]["JACK"]["kasten"] == 0
+
+    # grootste verschil eerst; kapotte en onbekende bestanden apart gemeld
+    verschillen = [g["verschil"] for g in samenvatting["grootste_verschillen"]]
+    assert verschillen == sorted(verschillen, key=abs, reverse=True)
+    overgeslagen = {o["bestand"]: o["status"] for o in samenvatting["overgeslagen"]}
+    assert overgeslagen["kapot.json"].startswith("fout:")
+    assert overgeslagen["onbekend.json"].startswith("onbekend model")
+    assert samenvatting["bestanden"] == 4
+
+
+def test_uitvoer_en_cache_niet_als_archief(archief):
+    (archief / herprijs_archief.PARSE_CACHE_MAP).mkdir()
+    (archief / herprijs_archief.PARSE_CACHE_MAP / "x.json").write_text("[]")
+    (archief / "herprijs-20261001-120000").mkdir()
+    (archief / "herprijs-20261001-120000" / "samenvatting.json").write_text("{}")
+    (archief / "~$noah.xlsx").write_text("")
+
+    paden = [p.replace(str(archief) + "/", "") for p in herprijs_archief.verzamel_archief(str(archief))]
+    assert paden == ["kapot.json", "noah.json", "onbekend.json", "2026/jack.json"]
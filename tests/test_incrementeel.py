@@ -0,0 +1,156 @@
+import copy
+import threading
+import time
+import uuid
+
+import pytest
+
+import inmeetverwerker_hellofront as hf
+import prijsregels
+
+
+def _parse(n_kasten=4):
+    model = next(iter(hf.huidige_prijstabel()["MODEL_INFO"]))
+    kasten = []
+    for i in range(n_kasten):
+        kast = {
+            "kolom_index": i + 1, "type": "ABC"[i % 3], "hoogte": 700 + 10 * i, "breedte": 400 + 50 * i,
+            "diepte": 350, "zichtbare_zijde": "links", "inrichting_raw": "2x plank", "scharnieren": 2,
+            "frontmodel": model, "aantal_fronten": 1,
+        }
+        kast["inrichting"] = hf._parse_inrichting(kast["inrichting_raw"])
+        kasten.append(kast)
+    g2, h2 = next((g, h) for (g, h), m in hf.MODEL_MAPPING.items() if m == model)
+    parse = hf.maak_parse_state(
+        ["DEUR", "DEUR", "LADE"], g2, h2, "RAL 9010", ["Jan Jansen"], 4, 1,
+        {"name": "Test", "maatwerk_kasten": kasten},
+    )
+    return parse, model
+
+
+@pytest.fixture
+def geprijsd(monkeypatch):
+    """Telt de kasten die opnieuw geprijsd worden; Teamleader wordt niet aangeroepen."""
+    geteld = []
+    kast = prijsregels.PrijsPlan.kast
+
+    def tel(self, k, stap=None):
+        geteld.append(k["kolom_index"])
+        return kast(self, k, stap)
+
+    monkeypatch.setattr(prijsregels.PrijsPlan, "kast", tel)
+    monkeypatch.setattr(hf, "KASTEN_BATCH_VANAF", 10**6)   # altijd per kast
+    monkeypatch.setattr(hf, "_maak_quotation", lambda deal_id, data, mode, dry_run=False: "q-1")
+    monkeypatch.setattr(hf, "_werk_quotation_bij", lambda quotation_id, data, mode: True)
+    monkeypatch.setattr(hf, "_quotation_bestaat", lambda quotation_id: True)
+    return geteld
+
+
+def _volledig(parse, model):
+    data, _ = hf.bereken_offerte_incrementeel(parse, model)
+    return data
+
+
+def test_ongewijzigde_kasten_worden_hergebruikt(geprijsd):
+    deal_id = f"deal-{uuid.uuid4()}"
+    parse, model = _parse()
+
+    data, _ = hf.bereken_offerte_incrementeel(parse, model, hf.laad_offerte_state(deal_id))
+    assert sorted(geprijsd) == [1, 2, 3, 4]
+    assert hf.verstuur_offerte(deal_id, data, "P", parse) == "aangemaakt"
+
+    # zelfde werkboek: niets opnieuw prijzen, niets versturen
+    geprijsd.clear()
+    data, verschil = hf.bereken_offerte_incrementeel(parse, model, hf.laad_offerte_state(deal_id))
+    assert geprijsd == []
+    assert not verschil["gewijzigd"]
+    assert hf.verstuur_offerte(deal_id, data, "P", parse) == "ongewijzigd"
+
+    # één kast anders: alleen die opnieuw, zelfde uitkomst als volledig prijzen
+    nieuw = copy.deepcopy(parse)
+    nieuw["maatwerk_kasten"][2]["hoogte"] = 2100
+    geprijsd.clear()
+    data, verschil = hf.bereken_offerte_incrementeel(nieuw, model, hf.laad_offerte_state(deal_id))
+    assert geprijsd == [3]
+    assert verschil["kasten_gewijzigd"] == [3]
+    assert data == {**_volledig(nieuw, model), "duur_prijzen_ms": data["duur_prijzen_ms"]}
+    assert hf.verstuur_offerte(deal_id, data, "P", nieuw) == "bijgewerkt"
+
+
+def test_verschil_per_kolom(geprijsd):
+    parse, model = _parse()
+    nieuw = copy.deepcopy(parse)
+    nieuw["maatwerk_kasten"][0]["breedte"] = 900
+    del nieuw["maatwerk_kasten"][3]
+    extra = dict(nieuw["maatwerk_kasten"][1], kolom_index=9)
+    nieuw["maatwerk_kasten"].append(extra)
+    nieuw["scharnieren"] = 6
+
+    verschil = hf.vergelijk_parse(parse, nieuw)
+    assert verschil["kasten_gewijzigd"] == [1]
+    assert verschil["kasten_verwijderd"] == [4]
+    assert verschil["kasten_nieuw"] == [9]
+    assert verschil["kop"] == ["scharnieren"]
+    assert not verschil["onderdelen"]
+    assert verschil["gewijzigd"]
+
+
+def test_andere_prijzen_alles_opnieuw(geprijsd, monkeypatch):
+    deal_id = f"deal-{uuid.uuid4()}"
+    parse, model = _parse()
+    data, _ = hf.bereken_offerte_incrementeel(parse, model)
+    hf.verstuur_offerte(deal_id, data, "P", parse)
+
+    andere = hf.prijstabel_met_wijzigingen({"VRACHT": hf.huidige_prijstabel()["VRACHT"] + 10})
+    geprijsd.clear()
+    hf.bereken_offerte_incrementeel(parse, model, hf.laad_offerte_state(deal_id), prijstabel=andere)
+    assert sorted(geprijsd) == [1, 2, 3, 4]
+
+    # zelfde parse, maar de prijzen zijn veranderd: de offerte wordt bijgewerkt
+    monkeypatch.setattr(hf, "prijzen_vingerafdruk", lambda prijstabel=None: "andere prijzen")
+    assert hf.verstuur_offerte(deal_id, data, "P", parse) == "bijgewerkt"
+
+
+def test_verwijderde_offerte_wordt_opnieuw_aangemaakt(geprijsd, monkeypatch):
+    deal_id = f"deal-{uuid.uuid4()}"
+    parse, model = _parse()
+    data, _ = hf.bereken_offerte_incrementeel(parse, model)
+    assert hf.verstuur_offerte(deal_id, data, "P", parse) == "aangemaakt"
+
+    monkeypatch.setattr(hf, "_quotation_bestaat", lambda quotation_id: False)
+    assert hf.verstuur_offerte(deal_id, data, "P", parse) == "aangemaakt"
+
+
+def test_forceer_verstuurt_ook_zonder_wijzigingen(geprijsd):
+    deal_id = f"deal-{uuid.uuid4()}"
+    parse, model = _parse()
+    data, _ = hf.bereken_offerte_incrementeel(parse, model)
+    hf.verstuur_offerte(deal_id, data, "P", parse)
+    assert hf.verstuur_offerte(deal_id, data, "P", parse) == "ongewijzigd"
+    assert hf.verstuur_offerte(deal_id, data, "P", parse, forceer=True) == "bijgewerkt"
+
+
+def test_gelijktijdig_versturen_maakt_een_offerte(geprijsd, monkeypatch):
+    deal_id = f"deal-{uuid.uuid4()}"
+    parse, model = _parse()
+    data, _ = hf.bereken_offerte_incrementeel(parse, model)
+
+    aangemaakt = []
+
+    def maak(deal_id, data, mode, dry_run=False):
+        time.sleep(0.2)   # Teamleader is traag: de tweede verzender komt ertussen
+        aangemaakt.append(deal_id)
+        return f"q-{len(aangemaakt)}"
+
+    monkeypatch.setattr(hf, "_maak_quotation", maak)
+    statussen = []
+    verzenders = [
+        threading.Thread(target=hf.in_context(lambda: statussen.append(hf.verstuur_offerte(deal_id, data, "P", parse))))
+        for _ in range(2)
+    ]
+    for t in verzenders:
+        t.start()
+    for t in verzenders:
+        t.join(10)
+    assert aangemaakt == [deal_id]
+    assert sorted(statussen) == ["aangemaakt", "ongewijzigd"]
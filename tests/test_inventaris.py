@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+import inmeetverwerker_hellofront as hf
+from werkboek_sjablonen import get_sjablonen
+
+# kolommen in het standaardsjabloon: onderdeel in F, maten links daarvan (buiten de kopcellen)
+HOOGTE, BREEDTE, AANTAL = 2, 3, 4
+
+
+def _tabblad(regels, koppen=True):
+    """Inmeet-tabblad met een onderdelentabel: regels = [(onderdeel, hoogte, breedte, aantal)]."""
+    plan = get_sjablonen().standaard
+    rijen = [[None] * (plan.kop_max_kolom + 1) for _ in range(len(regels) + 1)]
+    if koppen:
+        rijen[0][HOOGTE], rijen[0][BREEDTE], rijen[0][AANTAL] = "Hoogte (mm)", "Breedte (mm)", "Aantal"
+    rijen[0][plan.onderdeel_kolom] = "Onderdeel"
+    for rij, (onderdeel, hoogte, breedte, aantal) in zip(rijen[1:], regels):
+        rij[plan.onderdeel_kolom], rij[HOOGTE], rij[BREEDTE], rij[AANTAL] = onderdeel, hoogte, breedte, aantal
+    return pd.DataFrame(rijen), plan
+
+
+def _per_type(inventaris):
+    return {r["type"]: r for r in inventaris}
+
+
+def test_inventaris_per_type_met_m2():
+    df, plan = _tabblad([
+        ("deur", 700, 500, 2),
+        ("DEUR ", 700, 500, None),      # geen aantal = 1
+        ("LADE", 200, 500, 3),
+        ("PLINT", 100, 3000, 1),
+        ("ANDERS 1", None, None, 1),     # zonder maten: wel geteld, geen m²
+        ("GREEP", "?", 128, 4),
+    ])
+    per_type = _per_type(hf._lees_onderdelen_inventaris(df, plan))
+
+    assert per_type["DEUR"] == {"categorie": "front", "type": "DEUR", "regels": 2, "aantal": 3.0, "m2": 1.05}
+    assert per_type["LADE"]["m2"] == 0.3
+    assert (per_type["PLINT"]["categorie"], per_type["PLINT"]["m2"]) == ("passtuk", 0.3)
+    assert (per_type["ANDERS 1"]["categorie"], per_type["ANDERS 1"]["m2"]) == ("anders", 0.0)
+    assert (per_type["GREEP"]["categorie"], per_type["GREEP"]["aantal"], per_type["GREEP"]["m2"]) == ("overig", 4.0, 0.0)
+    assert "ONDERDEEL" not in per_type   # de kopregel telt niet mee
+
+    assert hf._m2_per_categorie(per_type.values()) == {"front": 1.35, "passtuk": 0.3, "anders": 0.0, "overig": 0.0}
+
+
+def test_inventaris_zonder_koppen_telt_regels():
+    df, plan = _tabblad([("DEUR", 700, 500, 2), ("DEUR", 700, 500, 2)], koppen=False)
+    per_type = _per_type(hf._lees_onderdelen_inventaris(df, plan))
+    # zonder kopnamen geen maten: elke regel telt als één stuk
+    assert per_type["DEUR"]["aantal"] == 2.0
+    assert per_type["DEUR"]["m2"] == 0.0
+
+
+@pytest.mark.parametrize("m2, op_maat", [(10.0, True), (0.01, False)])
+def test_toeslag_op_maat(monkeypatch, m2, op_maat):
+    pt = hf.huidige_prijstabel()
+    plan = hf.plan_voor(pt)
+    vast = pt["MODEL_INFO"]["NOAH"]["passtuk"]
+    project = {"name": "Test", "maatwerk_kasten": [], "inventaris": [
+        {"categorie": "passtuk", "type": "PLINT", "regels": 1, "aantal": 1.0, "m2": m2},
+    ]}
+
+    def toeslag(aan):
+        monkeypatch.setattr(hf, "TOESLAG_OP_MAAT", aan)
+        return hf.bereken_offerte(["DEUR", "PLINT"], "NOAH", project, "", [], 0, 0)["toeslag_passtuk"]
+
+    assert toeslag(False) == vast
+    verwacht = round(m2 * plan.vlak_prijs_model("NOAH") * plan.opslag / plan.marge, 2)
+    # op maat, maar de vaste toeslag blijft het minimum
+    assert toeslag(True) == (verwacht if op_maat else vast)
+    assert (verwacht > vast) == op_maat
@@ -0,0 +1,91 @@
+import copy
+import uuid
+
+import pytest
+
+import inmeetverwerker_hellofront as hf
+
+
+def _keuken(naam, hoogte):
+    model = next(iter(hf.huidige_prijstabel()["MODEL_INFO"]))
+    g2, h2 = next((g, h) for (g, h), m in hf.MODEL_MAPPING.items() if m == model)
+    kast = {
+        "kolom_index": 1, "type": "A", "hoogte": hoogte, "breedte": 600, "diepte": 560,
+        "zichtbare_zijde": "links", "inrichting_raw": "2x plank", "scharnieren": 2,
+        "frontmodel": model, "aantal_fronten": 1,
+    }
+    kast["inrichting"] = hf._parse_inrichting(kast["inrichting_raw"])
+    parse = hf.maak_parse_state(
+        ["DEUR"] * 4 + ["LADE"], g2, h2, "RAL 9010", ["Jan Jansen"], 4, 1,
+        {"name": f"Project - {naam}", "maatwerk_kasten": [kast]},
+    )
+    return {"keuken": naam, "parse": parse}
+
+
+def _zonder_duur(uitkomst):
+    return [dict(e, data={k: v for k, v in e["data"].items() if k != "duur_prijzen_ms"}) for e in uitkomst]
+
+
+def test_parallel_gelijk_aan_serieel(monkeypatch):
+    monkeypatch.setattr(hf, "KEUKENS_PARALLEL_VANAF", 2)
+    monkeypatch.setattr(hf, "KEUKENS_WORKERS", 2)
+    keukens = [_keuken(f"Unit {i}", 600 + 100 * i) for i in range(4)]
+
+    serieel = hf.bereken_offertes_keukens(keukens, workers=1)
+    parallel = hf.bereken_offertes_keukens(keukens)
+    assert _zonder_duur(parallel) == _zonder_duur(serieel)
+    # tweede keer dezelfde pool (zelfde prijstabel)
+    assert _zonder_duur(hf.bereken_offertes_keukens(keukens)) == _zonder_duur(serieel)
+    assert len(hf._KEUKENS_POOLS) == 1
+
+
+@pytest.fixture
+def teamleader(monkeypatch):
+    """Teamleader-calls vervangen; onthoudt wat er aangemaakt en bijgewerkt is."""
+    calls = []
+
+    def maak(deal_id, data, mode, dry_run=False, grouped_lines=None):
+        calls.append(("create", deal_id))
+        return f"q-{len(calls)}"
+
+    def werk_bij(quotation_id, data, mode, grouped_lines=None):
+        calls.append(("update", quotation_id))
+        return True
+
+    monkeypatch.setattr(hf, "_maak_quotation", maak)
+    monkeypatch.setattr(hf, "_werk_quotation_bij", werk_bij)
+    monkeypatch.setattr(hf, "_quotation_bestaat", lambda quotation_id: True)
+    monkeypatch.setattr(hf, "get_tax_rate_21_id", lambda: "tax-21")
+    return calls
+
+
+def _eenheden(keukens):
+    return [
+        {"keuken": e["keuken"], "data": e["data"], "parse": k["parse"]}
+        for e, k in zip(hf.bereken_offertes_keukens(keukens, workers=1), keukens)
+    ]
+
+
+def test_een_offerte_voor_alle_keukens_wordt_bijgewerkt(teamleader):
+    deal_id = f"deal-{uuid.uuid4()}"
+    keukens = [_keuken("Unit 1", 700), _keuken("Unit 2", 800)]
+
+    assert hf.maak_teamleader_offerte_keukens(deal_id, _eenheden(keukens), "P") == "aangemaakt"
+    assert hf.maak_teamleader_offerte_keukens(deal_id, _eenheden(keukens), "P") == "ongewijzigd"
+    assert hf.maak_teamleader_offerte_keukens(deal_id, _eenheden(keukens), "P", dry_run=True) is None
+
+    gewijzigd = copy.deepcopy(keukens)
+    gewijzigd[1]["parse"]["maatwerk_kasten"][0]["hoogte"] = 2100
+    assert hf.maak_teamleader_offerte_keukens(deal_id, _eenheden(gewijzigd), "P") == "bijgewerkt"
+    assert teamleader == [("create", deal_id), ("update", "q-1")]
+    assert hf.laad_offerte_state(deal_id)["quotation_id"] == "q-1"
+
+
+def test_verwijderde_offerte_keukens_opnieuw_aangemaakt(teamleader, monkeypatch):
+    deal_id = f"deal-{uuid.uuid4()}"
+    keukens = [_keuken("Unit 1", 700), _keuken("Unit 2", 800)]
+    hf.maak_teamleader_offerte_keukens(deal_id, _eenheden(keukens), "P")
+
+    monkeypatch.setattr(hf, "_quotation_bestaat", lambda quotation_id: False)
+    assert hf.maak_teamleader_offerte_keukens(deal_id, _eenheden(keukens), "P") == "aangemaakt"
+    assert [c[0] for c in teamleader] == ["create", "create"]
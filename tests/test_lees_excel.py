@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+import inmeetverwerker_hellofront as hf
+from werkboek_sjablonen import get_sjablonen
+
+
+def _keuken_tabblad(**waarden):
+    """Leeg inmeet-tabblad volgens het standaardsjabloon, met waarden per cel-veld."""
+    plan = get_sjablonen().standaard
+    df = pd.DataFrame([[None] * (plan.kop_max_kolom + 1) for _ in range(plan.kop_rijen)])
+    for veld, waarde in waarden.items():
+        df.iat[plan.cellen[veld]] = waarde
+    return df, plan
+
+
+@pytest.mark.parametrize("waarde, verwacht", [
+    (None, 0), ("", 0), (float("nan"), 0), (12, 12), (12.0, 12), ("12", 12), ("12,0", 12),
+])
+def test_aantallen_zoals_de_validatie(waarde, verwacht):
+    df, plan = _keuken_tabblad(scharnieren=waarde, lades=waarde)
+    uitkomst = hf._lees_keuken(df, None, None, "project", plan)
+    assert uitkomst[5] == verwacht
+    assert uitkomst[6] == verwacht
+
+
+def test_geen_getal_geeft_werkboekfout():
+    df, plan = _keuken_tabblad(scharnieren="twaalf")
+    with pytest.raises(hf.WerkboekFout) as fout:
+        hf._lees_keuken(df, None, None, "project", plan)
+    assert fout.value.problemen == [{
+        "cel": plan.celnamen["scharnieren"], "verwacht": "getal (aantal)", "gevonden": "'twaalf'", "ernst": "fout",
+    }]
+    assert isinstance(fout.value, ValueError)   # bestaande except ValueError blijft werken
+
+
+def test_keukens_een_tabblad_tegelijk(tmp_path, monkeypatch):
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    wb.active.title = "Keuken 1"
+    wb.create_sheet("Keuken 2")
+    wb.create_sheet("Notities")
+    for naam in ("Keuken 1", "Keuken 2"):
+        wb[naam]["G2"], wb[naam]["H2"] = "K01 - vlak", "MDF gespoten"
+    pad = tmp_path / "project.xlsx"
+    wb.save(pad)
+
+    volgorde = []
+    lees, keuken = hf.pd.read_excel, hf._lees_keuken
+    monkeypatch.setattr(hf.pd, "read_excel", lambda *a, **kw: volgorde.append(("lees", kw.get("sheet_name"))) or lees(*a, **kw))
+    monkeypatch.setattr(hf, "_lees_keuken", lambda df, *a: volgorde.append(("keuken", a[2])) or keuken(df, *a))
+
+    uitkomst = hf.lees_excel_keukens(str(pad))
+    assert [naam for naam, _ in uitkomst] == ["Keuken 1", "Keuken 2"]
+    assert [u[7]["name"] for _, u in uitkomst] == ["project - Keuken 1", "project - Keuken 2"]
+    # elk tabblad is uitgelezen voordat het volgende wordt ingelezen
+    assert volgorde[:4] == [("lees", "Keuken 1"), ("keuken", "project"), ("lees", "Keuken 2"), ("keuken", "project")]
@@ -0,0 +1,84 @@
+import types
+from datetime import datetime
+
+import pytest
+
+import offerte_archief
+from offerte_archief import OfferteArchief
+
+
+def _data(model, totaal_excl, fronts=6, kasten=0, materiaal="MDF gespoten"):
+    return {
+        "model": model, "materiaal": materiaal, "project": "Test", "fronts": fronts,
+        "totaal_excl": totaal_excl, "maatwerk_totaal_verkoop": 100.0 * kasten,
+        "maatwerk_kasten": [
+            {"kolom_index": i, "titel": f"Kast {i}", "totaal_inkoop": 50.0, "verkoop_excl": 100.0}
+            for i in range(kasten)
+        ],
+    }
+
+
+@pytest.fixture
+def archief(tmp_path, monkeypatch):
+    archief = OfferteArchief(str(tmp_path / "archief.sqlite3"))
+    nu = {"t": 0.0}
+    monkeypatch.setattr(offerte_archief, "time", types.SimpleNamespace(time=lambda: nu["t"]))
+
+    def bewaar(datum, tenant, data, mode="P", status="aangemaakt", deal_id=None):
+        nu["t"] = datetime.fromisoformat(datum).timestamp()
+        return archief.bewaar(tenant, data, mode, status, deal_id=deal_id)
+
+    bewaar("2026-01-15", "standaard", _data("NOAH", 1000.0, kasten=2), deal_id="d1")
+    bewaar("2026-02-10", "standaard", _data("NOAH", 2000.0, fronts=10), mode="D")
+    bewaar("2026-04-01", "standaard", _data("JACK", 3000.0, materiaal="Eikenfineer"), deal_id="d1")
+    bewaar("2026-04-02", "hoken", _data("NOAH", 9999.0))
+    return archief
+
+
+def test_aggregeer_per_model(archief):
+    rijen = archief.aggregeer("standaard")
+    assert [(r["model"], r["aantal"], r["som_totaal_excl"], r["gem_totaal_excl"]) for r in rijen] == [
+        ("JACK", 1, 3000.0, 3000.0),
+        ("NOAH", 2, 3000.0, 1500.0),
+    ]
+    noah = rijen[1]
+    assert (noah["gem_fronten"], noah["gem_kasten"], noah["gem_maatwerk"]) == (8.0, 1.0, 100.0)
+
+
+def test_aggregeer_op_kwartaal_en_model(archief):
+    rijen = archief.aggregeer("standaard", ("kwartaal", "model"))
+    assert [(r["kwartaal"], r["model"], r["aantal"]) for r in rijen] == [
+        ("2026-Q1", "NOAH", 2),
+        ("2026-Q2", "JACK", 1),
+    ]
+    assert [(r["jaar"], r["aantal"]) for r in archief.aggregeer("standaard", ("jaar",))] == [("2026", 3)]
+
+
+def test_aggregeer_zonder_groep_en_met_filters(archief):
+    assert archief.aggregeer("standaard", ())[0]["aantal"] == 3
+    # van/tot inclusief
+    assert archief.aggregeer("standaard", (), van="2026-02-10", tot="2026-04-01")[0]["aantal"] == 2
+    assert archief.aggregeer("standaard", ("maand",), mode="D") == [
+        {"maand": "2026-02", "aantal": 1, "som_totaal_excl": 2000.0, "gem_totaal_excl": 2000.0,
+         "gem_maatwerk": 0.0, "gem_fronten": 10.0, "gem_kasten": 0.0},
+    ]
+    assert [r["materiaal"] for r in archief.aggregeer("standaard", ("materiaal",), model="JACK")] == ["Eikenfineer"]
+
+
+def test_aggregeer_per_tenant(archief):
+    assert [(r["model"], r["som_totaal_excl"]) for r in archief.aggregeer("hoken")] == [("NOAH", 9999.0)]
+    assert archief.aggregeer("onbekend") == []
+
+
+def test_aggregeer_onbekende_groep(archief):
+    with pytest.raises(ValueError, match="Onbekende groepering"):
+        archief.aggregeer("standaard", ("model; DROP TABLE offertes",))
+
+
+def test_offertes_en_kasten(archief):
+    per_deal = archief.offertes("standaard", deal_id="d1")
+    assert [o["model"] for o in per_deal] == ["JACK", "NOAH"]   # nieuwste eerst
+    kasten = archief.kasten("standaard", per_deal[1]["id"])
+    assert [k["titel"] for k in kasten] == ["Kast 0", "Kast 1"]
+    # kasten van een offerte van een andere tenant blijven onzichtbaar
+    assert archief.kasten("hoken", per_deal[1]["id"]) == []
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+import inmeetverwerker_hellofront as hf
+
+TAX_RATE = "tax-21"
+
+
+# vastgelegde bodies (van vóór de gecompileerde payload), per geval "<mode>:<model>";
+# opnieuw vastleggen na een bewuste wijziging: GOLDEN_BIJWERKEN=1 pytest tests/test_offerte_payload.py
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "offerte_payload")
+GOLDEN_BIJWERKEN = os.getenv("GOLDEN_BIJWERKEN") == "1"
+
+GEVALLEN = {
+    "kasten_en_lades": (["DEUR"] * 6 + ["LADE"] * 3, 12, 3, True),
+    "passtuk_en_anders": (["DEUR", "PLINT", "ANDERS 1"], 0, 0, False),
+    "twee_fronten": (["DEUR"] * 2, 4, 0, True),
+}
+
+
+def _data(model, onderdelen, scharnieren, lades, kasten):
+    return hf.bereken_offerte(
+        onderdelen, model, {"name": "Test", "maatwerk_kasten": kasten},
+        "Zijdeglans wit", ["Jan Jansen", "Dorpsstraat 1", "1234 AB Één", "0612345678", "jan@example.nl"],
+        scharnieren, lades,
+    )
+
+
+def _kast(kolom_index, model):
+    kast = {
+        "kolom_index": kolom_index, "type": "C", "hoogte": 720, "breedte": 600, "diepte": 350,
+        "zichtbare_zijde": "links", "inrichting_raw": "2x plank", "scharnieren": 2,
+        "frontmodel": model, "aantal_fronten": 1,
+    }
+    kast["inrichting"] = hf._parse_inrichting(kast["inrichting_raw"])
+    return kast
+
+
+@pytest.fixture(autouse=True)
+def _geen_teamleader(monkeypatch):
+    monkeypatch.setattr(hf, "get_tax_rate_21_id", lambda: TAX_RATE)
+    hf._PAYLOAD_SJABLONEN.clear()
+
+
+@pytest.mark.parametrize("geval", GEVALLEN)
+def test_payload_gelijk_aan_vastgelegde_body(geval):
+    onderdelen, scharnieren, lades, met_kasten = GEVALLEN[geval]
+    pad = os.path.join(GOLDEN_DIR, f"{geval}.json")
+    bodies = {}
+    if not GOLDEN_BIJWERKEN:
+        with open(pad, "r", encoding="utf-8") as f:
+            bodies = json.load(f)
+
+    for mode in ("P", "D"):
+        for model in hf.huidige_prijstabel()["MODEL_INFO"]:
+            kasten = [_kast(i, model) for i in range(3)] if met_kasten else []
+            data = _data(model, onderdelen, scharnieren, lades, kasten)
+            sleutel = f"{mode}:{model}"
+            if GOLDEN_BIJWERKEN:
+                bodies[sleutel] = json.loads(hf.offerte_payload(data, mode, deal_id="deal-1"))
+                continue
+            verwacht = json.dumps(bodies[sleutel], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            # twee keer: de tweede offerte gebruikt de gecachete vaste regels
+            assert hf.offerte_payload(data, mode, deal_id="deal-1") == verwacht, sleutel
+            assert hf.offerte_payload(data, mode, deal_id="deal-1") == verwacht, sleutel
+
+    if GOLDEN_BIJWERKEN:
+        with open(pad, "w", encoding="utf-8") as f:
+            json.dump(bodies, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+    else:
+        assert len(bodies) == 2 * len(hf.huidige_prijstabel()["MODEL_INFO"])
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+import opwarmen
+import tenants
+
+
+@pytest.fixture
+def opwarmer(monkeypatch):
+    """Verse opwarmer die echt opwarmt, zonder Teamleader (standaard-tenant zonder credentials)."""
+    opwarmer = opwarmen.Opwarmer()
+    monkeypatch.setattr(opwarmen, "opwarmer", opwarmer)
+    monkeypatch.setattr(opwarmen, "OPWARMEN", True)
+    monkeypatch.setattr(opwarmen, "OPWARMEN_STRIKT", False)
+    monkeypatch.setattr(tenants.get_tenant(tenants.STANDAARD_TENANT), "client_id", None)
+    yield opwarmer
+    if opwarmer._thread:
+        opwarmer._thread.join(10)
+
+
+def test_ready_503_tot_opwarmen_klaar(opwarmer):
+    client = TestClient(api.app)
+    los = threading.Event()
+    opwarmer.start({"traag": lambda: los.wait(10)})
+
+    resp = client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["klaar"] is False
+
+    los.set()
+    assert opwarmer.klaar.wait(10)
+    resp = client.get("/ready")
+    assert resp.status_code == 200
+    stappen = resp.json()["stappen"]
+    assert stappen["excel"]["status"] == "ok"
+    assert stappen["traag"]["status"] == "ok"
+    assert stappen["standaard:prijstabel"]["status"] == "ok"
+    assert stappen["standaard:token"]["status"] == "overgeslagen"
+    assert client.get("/health").status_code == 200
+
+
+def _mislukt():
+    raise RuntimeError("geen refresh token")
+
+
+@pytest.mark.parametrize("strikt, verwacht", [(False, 200), (True, 503)])
+def test_mislukte_stap_alleen_fataal_met_strikt(opwarmer, monkeypatch, strikt, verwacht):
+    monkeypatch.setattr(opwarmen, "OPWARMEN_STRIKT", strikt)
+    opwarmer.start({"kapot": _mislukt})
+    assert opwarmer.klaar.wait(10)
+
+    resp = TestClient(api.app).get("/ready")
+    assert resp.status_code == verwacht
+    kapot = resp.json()["stappen"]["kapot"]
+    assert (kapot["status"], kapot["fout"]) == ("mislukt", "geen refresh token")
+
+
+def test_zonder_opwarmen_meteen_klaar(opwarmer, monkeypatch):
+    monkeypatch.setattr(opwarmen, "OPWARMEN", False)
+    opwarmer.start({"nooit": _mislukt})
+    assert opwarmer.is_klaar()
+    assert opwarmer.status()["stappen"] == {}
+    # tweede start doet niets
+    opwarmer.start()
+    assert opwarmer._thread is False
@@ -0,0 +1,131 @@
+import copy
+import random
+
+import pytest
+
+import benchmark_prijsregels
+import inmeetverwerker_hellofront as hf
+import prijsregels
+from prijsregels import plan_voor
+
+
+def _kast(**velden):
+    kast = {
+        "kolom_index": 1,
+        "type": "C",
+        "hoogte": 600,
+        "breedte": 600,
+        "diepte": 350,
+        "zichtbare_zijde": "",
+        "inrichting_raw": "",
+        "inrichting": {},
+        "scharnieren": 2,
+        "frontmodel": "",
+        "aantal_fronten": 1,
+    }
+    kast.update(velden)
+    kast["inrichting"] = hf._parse_inrichting(kast["inrichting_raw"])
+    return kast
+
+
+RANDGEVALLEN = [
+    _kast(type="C", hoogte=390),
+    _kast(type="C", hoogte=390.5),
+    _kast(type="C", hoogte=391, inrichting_raw="3x plank"),
+    _kast(type="C", hoogte=520.5, inrichting_raw="2 planken"),
+    _kast(type="B", hoogte=2079.5),
+    _kast(type="B", hoogte=2080, breedte=1201),
+    _kast(type="B", hoogte=900),
+    _kast(type="A", inrichting_raw="1x lade, plank"),
+    _kast(type="A", inrichting_raw="2x plank", zichtbare_zijde="links en rechts", frontmodel="ONBEKEND"),
+    _kast(type="A", inrichting_raw="ovenkast", zichtbare_zijde="ja"),
+    _kast(type="D", inrichting_raw="carrousel"),
+    _kast(type="", hoogte=None, breedte=None, diepte=None, scharnieren=0),
+    _kast(type="a", breedte=300.5, scharnieren=-1),
+]
+
+
+@pytest.fixture
+def pt():
+    return hf.huidige_prijstabel()
+
+
+@pytest.fixture
+def randgevallen(pt):
+    modellen = list(pt["MODEL_INFO"])
+    # elk randgeval met en zonder (bekend) frontmodel
+    kasten = [dict(k, kolom_index=i) for i, k in enumerate(RANDGEVALLEN)]
+    kasten += [dict(k, kolom_index=100 + i, frontmodel=modellen[i % len(modellen)]) for i, k in enumerate(RANDGEVALLEN)]
+    return kasten
+
+
+def _referentie(kast, pt):
+    res = hf._bereken_maatwerk_kast(kast, pt)
+    return res["totaal_inkoop"], res["verkoop_excl"]
+
+
+def _totalen_uit_uitleg(stappen):
+    per_post = {s["post"]: s["bedrag"] for s in stappen}
+    return per_post["totaal_inkoop"], per_post["verkoop_excl"]
+
+
+def test_kast_gelijk_aan_referentie_op_randgevallen(pt, randgevallen):
+    plan = plan_voor(pt)
+    for kast in randgevallen:
+        assert plan.kast(kast) == _referentie(kast, pt), kast
+
+
+def test_kasten_gelijk_aan_referentie_op_randgevallen(pt, randgevallen):
+    totaal, verkoop = plan_voor(pt).kasten(randgevallen)
+    assert list(zip(totaal, verkoop)) == [_referentie(k, pt) for k in randgevallen]
+
+
+def test_verklaar_kast_gelijk_aan_referentie_op_randgevallen(pt, randgevallen):
+    plan = plan_voor(pt)
+    for kast in randgevallen:
+        assert _totalen_uit_uitleg(plan.verklaar_kast(kast)) == _referentie(kast, pt), kast
+
+
+def test_verklaar_kast_posten_tellen_op_tot_inkoop(pt, randgevallen):
+    plan = plan_voor(pt)
+    for kast in randgevallen:
+        stappen = plan.verklaar_kast(kast)
+        posten = sum(s["bedrag"] for s in stappen if s["post"] not in ("totaal_inkoop", "verkoop_excl"))
+        assert posten == pytest.approx(_totalen_uit_uitleg(stappen)[0], abs=0.01)
+
+
+def test_willekeurige_kasten_gelijk_aan_referentie(pt):
+    uitkomst = benchmark_prijsregels.vergelijk_en_meet(aantal=3000, seed=7, prijstabel=pt)
+    assert uitkomst["aantal_afwijkingen"] == 0, uitkomst["afwijkingen"][:3]
+
+
+def test_onbekend_type_en_model(pt):
+    plan = plan_voor(pt)
+    kast = _kast(type="Z", frontmodel="ONBEKEND", scharnieren=0)
+    assert plan.kast(kast) == (0.0, 0.0)
+    assert plan.verklaar_kast(kast)[0]["uitleg"] == "geen corpusregel voor type 'Z'"
+
+
+def test_vergelijking_volgt_eigen_prijsregels(pt, monkeypatch):
+    """Met eigen regels geven vergelijk_modellen en bereken_offerte hetzelfde totaal per model."""
+    regels = copy.deepcopy(prijsregels.STANDAARD_REGELS)
+    regels["marge"] = 0.5
+    regels["opslag_front_zijden"] = 1.25
+    regels["vaste_kosten"] = [p for p in regels["vaste_kosten"] if p["post"] != "vracht"]
+    regels["corpus"]["C"][0]["hoogte"] = [None, 450]
+    monkeypatch.setattr(prijsregels, "REGELS", regels)
+
+    rnd = random.Random(3)
+    onderdelen = ["DEUR", "DEUR", "LADE", "PLINT", "ANDERS 1"]
+    # kasten met een frontmodel krijgen in de vergelijking het vergeleken model
+    kasten = [
+        _kast(kolom_index=i, type=rnd.choice("ABC"), hoogte=rnd.choice([400, 700, 2100]),
+              zichtbare_zijde="links", frontmodel=next(iter(pt["MODEL_INFO"])))
+        for i in range(5)
+    ]
+
+    vergelijking = hf.vergelijk_modellen(onderdelen, {"maatwerk_kasten": kasten}, 4, 2, prijstabel=pt)
+    for rij in vergelijking:
+        met_model = [dict(k, frontmodel=rij["model"]) for k in kasten]
+        data = hf.bereken_offerte(onderdelen, rij["model"], {"maatwerk_kasten": met_model}, "", [], 4, 2, prijstabel=pt)
+        assert rij["totaal_excl"] == pytest.approx(data["totaal_excl"], abs=0.005), rij["model"]
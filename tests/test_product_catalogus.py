@@ -0,0 +1,76 @@
+import pytest
+
+import inmeetverwerker_hellofront as hf
+import product_catalogus
+import tenants
+from product_catalogus import ProductCatalogus
+
+PRODUCTEN = [
+    {"id": "p1", "code": " inmeten ", "name": "Inmeten", "selling_price": {"amount": "120.00"}},
+    {"id": "p2", "code": "MODEL_NOAH", "name": "Front NOAH", "selling_price": {"amount": 110}},
+    {"id": "p3", "code": "X-VRACHT", "name": "Vracht", "selling_price": None},
+    {"id": "p4", "code": "", "name": "Maatwerk kast"},
+]
+
+
+@pytest.fixture
+def winkel(monkeypatch):
+    """Eigen tenant, zodat product_ids en prijzen van de standaard-tenant blijven staan."""
+    tenant = tenants.Tenant("winkel", "id", "geheim", prijs_wijzigingen={"INMETEN": 99.0, "VRACHT": 75.0},
+                            sleutel_prefix="tenant:winkel:")
+    monkeypatch.setitem(tenants.TENANTS, "winkel", tenant)
+    producten = list(PRODUCTEN)
+    monkeypatch.setattr(hf, "teamleader_lijst", lambda endpoint, body: iter(producten))
+    return tenant, producten
+
+
+def _catalogus(tmp_path):
+    # VRACHT op code, MAATWERK_KAST op product-id; de rest op code = artikelsleutel
+    return ProductCatalogus(str(tmp_path / "catalogus.json"), tenant="winkel",
+                            koppeling={"VRACHT": "X-VRACHT", "MAATWERK_KAST": "p4"})
+
+
+def test_koppeling_op_code_en_via_koppeling(winkel, tmp_path, monkeypatch):
+    monkeypatch.setattr(product_catalogus, "PRODUCT_PRIJZEN", False)
+    tenant, _ = winkel
+    catalogus = _catalogus(tmp_path)
+    assert catalogus.sync(forceer=True)
+
+    assert tenant.product_ids == {"INMETEN": "p1", "VRACHT": "p3", "MAATWERK_KAST": "p4", "MODEL_NOAH": "p2"}
+    assert catalogus.zoek_code("Model_Noah")["naam"] == "Front NOAH"
+    with tenants.gebruik_tenant("winkel"):
+        assert hf._product_id("VRACHT") == "p3"
+    # zonder PRODUCT_PRIJZEN blijven de prijzen uit de prijstabel
+    assert tenant.catalogus_prijzen is None
+
+    # van disk geladen: zelfde koppeling zonder sync
+    tenant.product_ids = {}
+    _catalogus(tmp_path)
+    assert tenant.product_ids["MODEL_NOAH"] == "p2"
+
+
+def test_catalogusprijzen_over_de_prijstabel(winkel, tmp_path, monkeypatch):
+    monkeypatch.setattr(product_catalogus, "PRODUCT_PRIJZEN", True)
+    tenant, producten = winkel
+    catalogus = _catalogus(tmp_path)
+    catalogus.sync(forceer=True)
+
+    # zonder verkoopprijs (VRACHT) geen wijziging
+    assert tenant.catalogus_prijzen == {"INMETEN": 120.0, "MODEL_INFO": {"NOAH": {"prijs_per_front": 110.0}}}
+    with tenants.gebruik_tenant("winkel"):
+        tabel = hf.huidige_prijstabel()
+        assert tabel["INMETEN"] == 120.0              # catalogus gaat vóór <PREFIX>PRIJZEN
+        assert tabel["VRACHT"] == 75.0                # <PREFIX>PRIJZEN blijft gelden
+        assert tabel["MODEL_INFO"]["NOAH"] == dict(hf.MODEL_INFO["NOAH"], prijs_per_front=110.0)
+        assert tabel["MODEL_INFO"]["FEDDE"] == hf.MODEL_INFO["FEDDE"]
+        assert hf.huidige_prijstabel() is tabel
+
+        # ongewijzigde prijzen: tabel blijft; gewijzigde: opnieuw samengesteld
+        catalogus.sync(forceer=True)
+        assert hf.huidige_prijstabel() is tabel
+        producten[0] = dict(producten[0], selling_price={"amount": 130})
+        catalogus.sync(forceer=True)
+        assert hf.huidige_prijstabel()["INMETEN"] == 130.0
+
+    # de standaard-tenant merkt er niets van
+    assert hf.huidige_prijstabel()["INMETEN"] == hf.INMETEN
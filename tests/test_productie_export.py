@@ -0,0 +1,71 @@
+import csv
+import json
+
+import productie_export
+
+KAST = {
+    "kolom_index": 3, "type": "Hoge kast", "hoogte": 2000, "breedte": 600, "diepte": 560,
+    "kleur_corpus": "Wit", "frontmodel": "noah", "aantal_fronten": 2, "zichtbare_zijde": "links",
+    "scharnieren": 4, "inrichting": {"planken": 3, "lades": 0, "bestek_bakken": 1},
+}
+PARSE = {"project": "Keuken Jansen", "kleur": "Groen", "scharnieren": 6, "lades": 0, "maatwerk_kasten": [KAST]}
+
+
+def test_zaaglijst_bruto_maten_per_paneel():
+    regels = {r["onderdeel"]: r for r in productie_export.zaaglijst_regels("a.xlsx", PARSE)}
+    assert list(regels) == ["Corpuszijde", "Plank", "Front NOAH", "Zichtbare zijde NOAH"]
+
+    assert regels["Corpuszijde"]["aantal"] == 2
+    assert (regels["Corpuszijde"]["bruto_lengte_mm"], regels["Corpuszijde"]["bruto_breedte_mm"]) == (2000, 560)
+    # planken op de buitenbreedte van de kast
+    assert (regels["Plank"]["aantal"], regels["Plank"]["bruto_lengte_mm"]) == (3, 600)
+    assert regels["Plank"]["kleur"] == "Wit"
+    # fronten alleen over de breedte verdeeld
+    front = regels["Front NOAH"]
+    assert (front["aantal"], front["bruto_lengte_mm"], front["bruto_breedte_mm"]) == (2, 2000, 300)
+    assert front["bruto_m2"] == 1.2
+    assert (front["materiaal"], front["kleur"]) == ("MDF gespoten", "Groen")
+    assert regels["Zichtbare zijde NOAH"]["aantal"] == 1
+
+
+def test_zaaglijst_slaat_panelen_zonder_maat_over():
+    kast = dict(KAST, frontmodel="", breedte=None, zichtbare_zijde="", inrichting={})
+    regels = list(productie_export.zaaglijst_regels("a.xlsx", dict(PARSE, maatwerk_kasten=[kast])))
+    assert [r["onderdeel"] for r in regels] == ["Corpuszijde"]
+
+
+def test_bom_keuken_en_kasten():
+    regels = [(r["kolom_index"], r["artikel"], r["aantal"]) for r in productie_export.bom_regels("a.xlsx", PARSE)]
+    assert regels == [("", "Scharnier softclose", 6), (3, "Scharnier softclose", 4), (3, "Bestekbak", 1)]
+
+
+def _bewaarde_parse(tmp_path):
+    pad = tmp_path / "jansen.json"
+    pad.write_text(json.dumps({"parse": PARSE}))
+    return str(pad)
+
+
+def test_exporteer_csv(tmp_path):
+    uit = tmp_path / "uit"
+    tellers = productie_export.exporteer([_bewaarde_parse(tmp_path)], str(uit), "csv")
+    assert tellers == {"projecten": 1, "panelen": 4, "beslag": 3}
+
+    with open(uit / "zaaglijst.csv", newline="") as f:
+        rijen = list(csv.DictReader(f))
+    assert list(rijen[0]) == productie_export.ZAAGLIJST_VELDEN
+    assert [r["onderdeel"] for r in rijen] == ["Corpuszijde", "Plank", "Front NOAH", "Zichtbare zijde NOAH"]
+    with open(uit / "beslaglijst.csv", newline="") as f:
+        assert len(list(csv.DictReader(f))) == 3
+
+
+def test_exporteer_jsonl_en_overgeslagen_bestand(tmp_path):
+    kapot = tmp_path / "kapot.json"
+    kapot.write_text("{geen json")
+    uit = tmp_path / "uit"
+    tellers = productie_export.exporteer([str(kapot), _bewaarde_parse(tmp_path)], str(uit), "jsonl")
+    assert tellers == {"projecten": 1, "panelen": 4, "beslag": 3}
+
+    regels = [json.loads(r) for r in (uit / "zaaglijst.jsonl").read_text().splitlines()]
+    assert regels[2]["onderdeel"] == "Front NOAH"
+    assert regels[2]["bruto_breedte_mm"] == 300
+    assert all(r["project"] == "Keuken Jansen" for r in regels)
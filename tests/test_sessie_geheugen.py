@@ -0,0 +1,101 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import sessie_geheugen
+from sessie_geheugen import SessieGeheugen
+
+
+def test_andere_sessie_eerst_weg_minst_recent_gebruikt_eerst():
+    g = SessieGeheugen(max_bytes=300)
+    g.zet("a", "oud", 1, grootte=100)
+    g.zet("a", "nieuw", 2, grootte=100)
+    g.haal("a", "oud")                      # nu is "nieuw" de minst recente van a
+    g.zet("b", "x", 3, grootte=150)         # 350 > 300: één item van a moet weg
+
+    assert g.haal("a", "nieuw") is None
+    assert g.haal("a", "oud") == 1
+    assert g.haal("b", "x") == 3
+    assert g.verwijderd == 1
+    assert g.overzicht()["totaal_bytes"] == 250
+
+
+def test_vast_en_lopende_prefetch_blijven():
+    g = SessieGeheugen(max_bytes=100)
+    lopend = Future()
+    g.zet("a", "upload", None, grootte=80, vast=True)
+    g.zet("a", "prefetch", lopend, grootte=50)
+    g.zet("b", "x", 1, grootte=50)
+
+    assert g.haal("a", "prefetch") is lopend
+    assert g.overzicht()["totaal_bytes"] == 180   # niets dat weg mag
+
+    # de prefetch van a is klaar en groeit: eerst gaat het item van b eruit
+    lopend.set_result("klaar")
+    g.werk_grootte_bij("a", "prefetch", 60)
+    assert g.haal("b", "x") is None
+    assert g.haal("a", "prefetch") is lopend     # net gebruikt door de eigen sessie
+
+
+def test_eigen_oude_items_pas_als_laatste():
+    g = SessieGeheugen(max_bytes=100)
+    g.zet("a", 1, "een", grootte=60)
+    g.zet("a", 2, "twee", grootte=60)
+    assert g.haal("a", 1) is None
+    assert g.haal("a", 2) == "twee"
+
+
+def test_idle_sessie_wordt_vergeten(monkeypatch):
+    nu = [1000.0]
+    monkeypatch.setattr(sessie_geheugen.time, "time", lambda: nu[0])
+    g = SessieGeheugen(max_bytes=10**6, idle_sec=60)
+    g.zet("weg", "x", 1, grootte=10, vast=True)
+    g.zet("blijft", "y", 2, grootte=10)
+
+    nu[0] += 30
+    g.raak_aan("blijft")
+    nu[0] += 40                                  # "weg" 70 s stil, "blijft" 40 s
+    g.raak_aan("blijft")
+
+    assert g.haal("weg", "x") is None
+    assert g.haal("blijft", "y") == 2
+    assert [s["sessie"] for s in g.overzicht()["sessies"]] == ["blijft"]
+
+
+def test_vergeet_met_houd():
+    g = SessieGeheugen()
+    g.zet("a", ("deal", 1), "d", grootte=1)
+    g.zet("a", ("parse", 1), "p", grootte=1)
+    g.vergeet("a", houd=lambda k: k[0] == "deal")
+    assert g.haal("a", ("deal", 1)) == "d"
+    assert g.haal("a", ("parse", 1)) is None
+
+
+def test_prefetch_een_keer_per_sleutel_en_opnieuw_na_opruimen():
+    g = SessieGeheugen(max_bytes=10_000)
+    aanroepen = []
+
+    def werk(n):
+        aanroepen.append(n)
+        return "x" * n
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        eerste = g.prefetch("a", "parse", pool, werk, 500)
+        assert g.prefetch("a", "parse", pool, werk, 500) is eerste   # volgende rerun: zelfde future
+        assert eerste.result() == "x" * 500
+        pool.submit(lambda: None).result()                            # callback is gedraaid
+        assert g.overzicht()["totaal_bytes"] >= 500                   # grootte telt na afloop
+
+        assert g.prefetch("b", "parse", pool, werk, 10) is not eerste  # andere sessie: eigen future
+        g.vergeet("a")
+        opnieuw = g.prefetch("a", "parse", pool, werk, 500)
+        assert opnieuw is not eerste
+        opnieuw.result()
+    assert aanroepen == [500, 10, 500]
+
+
+def test_prefetch_met_fout_telt_niet_mee():
+    g = SessieGeheugen(max_bytes=10_000)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = g.prefetch("a", "deal", pool, lambda: 1 / 0)
+        assert isinstance(future.exception(), ZeroDivisionError)
+    assert g.haal("a", "deal") is future
+    assert g.overzicht()["totaal_bytes"] == 0
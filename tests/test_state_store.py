@@ -0,0 +1,107 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from state_store import BestandStore, RedisStore, SqliteStore
+
+
+@pytest.fixture(params=["bestand", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "bestand":
+        return BestandStore(str(tmp_path / "state"))
+    if request.param == "sqlite":
+        return SqliteStore(str(tmp_path / "state.db"))
+    return RedisStore(client=fakeredis.FakeRedis(), prefix="test:")
+
+
+def test_cas_op_ontbrekende_sleutel(store):
+    assert store.compare_and_set("token", None, "a")
+    assert store.get("token") == "a"
+    # tweede 'maak aan als hij niet bestaat' verliest
+    assert not store.compare_and_set("token", None, "b")
+    assert store.get("token") == "a"
+
+
+def test_cas_met_verwachte_waarde(store):
+    store.set("token", "a")
+    assert not store.compare_and_set("token", "x", "b")
+    assert store.get("token") == "a"
+    assert store.compare_and_set("token", "a", "b")
+    assert store.get("token") == "b"
+
+
+def test_cas_verwijdert_met_nieuw_none(store):
+    store.set("token", "a")
+    assert not store.compare_and_set("token", "b", None)
+    assert store.compare_and_set("token", "a", None)
+    assert store.get("token") is None
+
+
+def test_cas_verlopen_telt_als_ontbrekend(store):
+    store.set("token", "a", ttl_sec=1)
+    assert store.get("token") == "a"
+    time.sleep(1.05)
+    assert not store.compare_and_set("token", "a", "b")
+    assert store.compare_and_set("token", None, "b", ttl_sec=60)
+    assert store.get("token") == "b"
+
+
+def test_waarde_komt_ongewijzigd_terug(store):
+    waarde = "verloopt=123\nregel 2\n"
+    store.set("k", waarde, ttl_sec=60)
+    assert store.compare_and_set("k", waarde, waarde + "x")
+    assert store.get("k") == waarde + "x"
+
+
+def test_cas_gelijktijdig_verliest_geen_ophoging(store):
+    store.set("teller", "0")
+
+    def hoog_op():
+        for _ in range(25):
+            while True:
+                oud = store.get("teller")
+                if store.compare_and_set("teller", oud, str(int(oud) + 1)):
+                    break
+
+    threads = [threading.Thread(target=hoog_op) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    assert store.get("teller") == "200"
+
+
+def test_lege_waarde_en_witruimte(store):
+    store.set("k", "")
+    assert store.get("k") == ""
+    store.set("k", "  a \n")
+    assert store.get("k") == "  a \n"
+    assert store.compare_and_set("k", "  a \n", "b")
+
+
+def test_bestand_zonder_kop_wordt_gestript(tmp_path):
+    # zoals refresh_token.txt van vóór de state store
+    (tmp_path / "refresh_token.txt").write_text("abc\n")
+    store = BestandStore(str(tmp_path))
+    assert store.get("refresh_token") == "abc"
+    assert store.compare_and_set("refresh_token", "abc", "def")
+    assert (tmp_path / "refresh_token.txt").read_text() == "def"
+
+
+def test_state_pad_in_state_dir_met_oud_bestand_als_fallback(tmp_path, monkeypatch):
+    import state_store
+
+    nieuw, oud = tmp_path / "state", tmp_path / "app"
+    oud.mkdir()
+    monkeypatch.setattr(state_store, "STATE_DIR", str(nieuw))
+    monkeypatch.setattr(state_store, "OUDE_STATE_DIR", str(oud))
+    assert state_store.state_pad("archief.sqlite3") == str(nieuw / "archief.sqlite3")
+
+    (oud / "archief.sqlite3").write_text("")
+    assert state_store.state_pad("archief.sqlite3") == str(oud / "archief.sqlite3")
+
+    # met eigen STATE_DIR: nooit uit /app
+    monkeypatch.setattr(state_store, "OUDE_STATE_DIR", None)
+    assert state_store.state_pad("archief.sqlite3") == str(nieuw / "archief.sqlite3")
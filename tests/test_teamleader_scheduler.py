@@ -0,0 +1,74 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from teamleader_scheduler import PRIORITEIT_BATCH, PRIORITEIT_INTERACTIEF, RateLimitScheduler
+
+
+def _antwoord(status=200, **headers):
+    return SimpleNamespace(status_code=status, headers={k.replace("_", "-"): str(v) for k, v in headers.items()})
+
+
+def _in_thread(fn, *args):
+    t = threading.Thread(target=fn, args=args, daemon=True)
+    t.start()
+    return t
+
+
+def test_batch_laat_reserve_vrij_voor_interactief():
+    s = RateLimitScheduler(limiet=10, venster_sec=2)    # 5 tokens per seconde
+    for _ in range(9):
+        s.wacht_op_beurt()
+    # 1 token over: genoeg voor een operator, niet voor batch (1 + 10% reserve)
+    batch = _in_thread(s.wacht_op_beurt, PRIORITEIT_BATCH)
+    time.sleep(0.1)
+    assert batch.is_alive()
+
+    assert s.wacht_op_beurt(PRIORITEIT_INTERACTIEF) < 0.05
+    batch.join(5)
+    assert not batch.is_alive()
+    assert s.metrics()["wachttijd"]["batch"]["wacht_max"] >= 0.2
+
+
+def test_interactief_gaat_voor_wachtende_batch():
+    s = RateLimitScheduler(limiet=10, venster_sec=1)    # 10 tokens per seconde
+    for _ in range(10):
+        s.wacht_op_beurt()
+
+    volgorde = []
+
+    def vraag(naam, prioriteit):
+        s.wacht_op_beurt(prioriteit)
+        volgorde.append(naam)
+
+    batch = _in_thread(vraag, "batch", PRIORITEIT_BATCH)
+    time.sleep(0.02)   # batch staat al in de wachtrij
+    interactief = _in_thread(vraag, "interactief", PRIORITEIT_INTERACTIEF)
+    batch.join(5)
+    interactief.join(5)
+    assert volgorde == ["interactief", "batch"]
+
+
+def test_429_pauzeert_tot_retry_after():
+    s = RateLimitScheduler(limiet=1000, venster_sec=1)
+    s.verwerk_antwoord(_antwoord(429, Retry_After=0.3))
+    assert s.metrics()["aantal_429"] == 1
+    assert s.metrics()["tokens"] == 0.0
+
+    start = time.monotonic()
+    s.wacht_op_beurt()
+    assert time.monotonic() - start >= 0.29
+
+
+def test_headers_sturen_de_bucket_bij():
+    s = RateLimitScheduler(limiet=100, venster_sec=60)
+    s.verwerk_antwoord(_antwoord(X_RateLimit_Limit=50, X_RateLimit_Remaining=3))
+    assert s.limiet == 50
+    assert s.metrics()["tokens"] <= 3
+
+    # niets meer over tot de reset: pauze, ook met tokens in de bucket
+    s = RateLimitScheduler(limiet=1000, venster_sec=1)
+    s.verwerk_antwoord(_antwoord(X_RateLimit_Remaining=0, X_RateLimit_Reset=0.2))
+    start = time.monotonic()
+    s.wacht_op_beurt()
+    assert time.monotonic() - start >= 0.19
@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import inmeetverwerker_hellofront as hf
+import tenants
+
+
+@pytest.fixture
+def tweede_tenant(monkeypatch):
+    tenant = tenants.Tenant("hoken", "id", "geheim", sleutel_prefix="tenant:hoken:", env_prefix="HOKEN_")
+    monkeypatch.setitem(tenants.TENANTS, "hoken", tenant)
+    return tenant
+
+
+def test_sleutels_per_tenant(tweede_tenant):
+    assert tenants.get_tenant(tenants.STANDAARD_TENANT).sleutel("tax_rate_21_id") == "tax_rate_21_id"
+    assert tweede_tenant.sleutel("tax_rate_21_id") == "tenant:hoken:tax_rate_21_id"
+
+
+def test_state_gescheiden_per_tenant(tweede_tenant):
+    with tenants.gebruik_tenant("hoken"):
+        hf._bewaar_offerte_state("deal-t1", {"quotation_id": "q-hoken"})
+        hf._save_cached_tax_rate_id("tax-hoken")
+    assert hf.laad_offerte_state("deal-t1") is None
+    assert hf._load_cached_tax_rate_id() != "tax-hoken"
+    with tenants.gebruik_tenant(" HOKEN "):
+        assert hf.laad_offerte_state("deal-t1") == {"quotation_id": "q-hoken"}
+        assert hf._load_cached_tax_rate_id() == "tax-hoken"
+
+
+def test_gebruik_tenant_herstelt_vorige(tweede_tenant):
+    assert tenants.huidige_tenant().naam == tenants.STANDAARD_TENANT
+    with tenants.gebruik_tenant("hoken") as tenant:
+        assert tenant is tweede_tenant
+        with tenants.gebruik_tenant(tenants.STANDAARD_TENANT):
+            assert tenants.huidige_tenant().naam == tenants.STANDAARD_TENANT
+        assert tenants.huidige_tenant() is tweede_tenant
+        with pytest.raises(ValueError):
+            with tenants.gebruik_tenant("onbekend"):
+                pass
+        assert tenants.huidige_tenant() is tweede_tenant
+    assert tenants.huidige_tenant().naam == tenants.STANDAARD_TENANT
+
+
+def test_in_context_neemt_tenant_mee_naar_thread_pool(tweede_tenant):
+    def naam():
+        return tenants.huidige_tenant().naam
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with tenants.gebruik_tenant("hoken"):
+            zonder = pool.submit(naam)
+            gebonden = tenants.in_context(naam)
+        # ook na het blok en in twee threads tegelijk: de tenant van het moment van binden
+        samen = threading.Barrier(2)
+
+        def tegelijk():
+            samen.wait(5)
+            return gebonden()
+
+        resultaten = [pool.submit(tegelijk) for _ in range(2)]
+        assert zonder.result() == tenants.STANDAARD_TENANT
+        assert [f.result() for f in resultaten] == ["hoken", "hoken"]
+    assert naam() == tenants.STANDAARD_TENANT
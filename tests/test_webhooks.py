@@ -0,0 +1,135 @@
+import threading
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+import webhooks
+
+
+def _event(deal_id=None, **velden):
+    return {"id": str(uuid.uuid4()), "type": "deal.updated",
+            "subject": {"type": "deal", "id": deal_id or f"deal-{uuid.uuid4()}"}, **velden}
+
+
+def _op_review(deal_id):
+    return next((r for r in webhooks.review_lijst() if r["deal_id"] == deal_id), None)
+
+
+@pytest.fixture
+def verwerkt(monkeypatch):
+    """verwerk_event vervangen: onthoudt de events in plaats van Teamleader aan te roepen."""
+    events = []
+    monkeypatch.setattr(webhooks, "verwerk_event", lambda event: events.append(event) or "review")
+    return events
+
+
+def test_zelfde_event_een_keer_verwerkt(verwerkt):
+    verwerker = webhooks.WebhookVerwerker(workers=1)
+    event = _event()
+    assert verwerker.ontvang(event, b"{}") == "in wachtrij"
+    assert verwerker.ontvang(event, b"{}") == "dubbel"
+    verwerker._pool.shutdown(wait=True)
+    assert verwerkt == [event]
+    assert verwerker.tellers["verwerkt"] == 1
+    assert verwerker.tellers["dubbel"] == 1
+
+
+def test_event_zonder_id_dedup_op_body(verwerkt):
+    verwerker = webhooks.WebhookVerwerker(workers=1)
+    ruw = uuid.uuid4().bytes
+    assert verwerker.ontvang({"type": "deal.updated"}, ruw) == "in wachtrij"
+    assert verwerker.ontvang({"type": "deal.updated"}, ruw) == "dubbel"
+    verwerker._pool.shutdown(wait=True)
+
+
+def test_volle_wachtrij_weigert_en_laat_herhaling_door(monkeypatch):
+    los = threading.Event()
+    monkeypatch.setattr(webhooks, "verwerk_event", lambda event: los.wait(5) and "review")
+    verwerker = webhooks.WebhookVerwerker(workers=1, max_wachtrij=1)
+
+    eerste, tweede = _event(), _event()
+    assert verwerker.ontvang(eerste, b"{}") == "in wachtrij"
+    assert verwerker.ontvang(tweede, b"{}") == "vol"
+    assert verwerker.tellers["geweigerd"] == 1
+
+    los.set()
+    verwerker._pool.shutdown(wait=True)
+    verwerker = webhooks.WebhookVerwerker(workers=1, max_wachtrij=1)
+    assert verwerker.ontvang(tweede, b"{}") == "in wachtrij"   # niet als dubbel gezien
+    verwerker._pool.shutdown(wait=True)
+
+
+def test_mislukt_event_komt_op_de_reviewlijst(monkeypatch):
+    def faalt(event):
+        raise RuntimeError("Teamleader onbereikbaar")
+
+    monkeypatch.setattr(webhooks, "verwerk_event", faalt)
+    verwerker = webhooks.WebhookVerwerker(workers=1)
+    event = _event()
+    verwerker.ontvang(event, b"{}")
+    verwerker._pool.shutdown(wait=True)
+
+    deal_id = event["subject"]["id"]
+    item = _op_review(deal_id)
+    assert item["reden"] == "verwerking mislukt: Teamleader onbereikbaar"
+    assert item["event_type"] == "deal.updated"
+    assert verwerker.tellers["mislukt"] == 1
+
+    # een replay van hetzelfde event wordt opnieuw verwerkt
+    monkeypatch.setattr(webhooks, "verwerk_event", lambda event: "review")
+    verwerker = webhooks.WebhookVerwerker(workers=1)
+    assert verwerker.ontvang(event, b"{}") == "in wachtrij"
+    verwerker._pool.shutdown(wait=True)
+    webhooks.haal_van_review(deal_id)
+
+
+def test_bestaande_offerte_niet_automatisch_overschreven(monkeypatch):
+    deal_id = f"deal-{uuid.uuid4()}"
+    monkeypatch.setattr(webhooks, "WEBHOOK_AUTO_OFFERTE", True)
+    monkeypatch.setattr(webhooks.hf, "deal_bestanden", lambda d: [{"id": "f1", "name": "keuken.xlsx"}])
+    monkeypatch.setattr(webhooks.hf, "download_bestand", lambda f: uuid.uuid4().bytes)
+    monkeypatch.setattr(webhooks.service, "lees_werkboek", lambda inhoud, naam: {"problemen": [], "parse": {"p": 1}})
+    verstuurd = []
+    monkeypatch.setattr(webhooks.service, "verstuur", lambda *a: verstuurd.append(a) or {"status": "aangemaakt"})
+
+    def prijs(bestaand):
+        return lambda parse, deal_id=None: {"model": "NOAH", "data": {"totaal_excl": 1.0},
+                                             "bestaande_offerte": bestaand}
+
+    monkeypatch.setattr(webhooks.service, "prijs", prijs(True))
+    assert webhooks.verwerk_event(_event(deal_id)) == "review"
+    assert verstuurd == []
+    assert _op_review(deal_id)["reden"] == "deal heeft al een offerte; bijwerken?"
+    webhooks.haal_van_review(deal_id)
+
+    monkeypatch.setattr(webhooks.service, "prijs", prijs(False))
+    assert webhooks.verwerk_event(_event(deal_id)) == "aangemaakt"
+    assert len(verstuurd) == 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    verwerker = webhooks.WebhookVerwerker(workers=1)
+    api.app.state.webhooks = verwerker
+    yield TestClient(api.app)
+    verwerker.sluit()
+
+
+def test_api_zonder_geheim_staat_uit(client, monkeypatch):
+    monkeypatch.setattr(webhooks, "WEBHOOK_GEHEIM", "")
+    assert client.post("/webhooks/teamleader", json=_event()).status_code == 503
+
+
+def test_api_geheim_en_volle_wachtrij(client, monkeypatch, verwerkt):
+    monkeypatch.setattr(webhooks, "WEBHOOK_GEHEIM", "s3cret")
+    assert client.post("/webhooks/teamleader", json=_event()).status_code == 401
+    assert client.post("/webhooks/teamleader", json=_event(), headers={"X-Webhook-Geheim": "fout"}).status_code == 401
+
+    event = _event()
+    assert client.post("/webhooks/teamleader", json=event, headers={"X-Webhook-Geheim": "s3cret"}).status_code == 202
+    assert client.post("/webhooks/teamleader?geheim=s3cret", json=event).json() == {"status": "dubbel"}
+
+    monkeypatch.setattr(api.app.state.webhooks, "ontvang", lambda event, ruw: "vol")
+    assert client.post("/webhooks/teamleader?geheim=s3cret", json=_event()).status_code == 503
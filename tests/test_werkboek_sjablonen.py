@@ -0,0 +1,118 @@
+import json
+
+import openpyxl
+import pytest
+
+import inmeetverwerker_hellofront as hf
+import werkboek_sjablonen
+from werkboek_sjablonen import INGEBOUWDE_SJABLONEN, Sjablonen
+
+# zelfde inhoud als het oorspronkelijke formulier, andere cellen + herkenning in A1
+INMEET_V2 = {
+    "naam": "inmeet-v2",
+    "versie": 2,
+    "herkenning": {"cel": "A1", "tekst": "HOKEN INMEET V2"},
+    "inmeet": {
+        "onderdeel_kolom": "B", "frontmodel": "D2", "materiaal": "E2", "kleur": "F2",
+        "scharnieren": "G2", "lades": "H2", "klantgegevens": "I2:I6",
+    },
+    "maatwerk": {
+        "sheet": "KASTEN",
+        "kolommen": "C:F",
+        "rijen": {"type": 3, "hoogte": 4, "breedte": 5, "diepte": 6, "inrichting_raw": 7},
+    },
+}
+
+KLANT = ["Jan Jansen", "Dorpsstraat 1", "1234 AB Plaats", "0612345678", "jan@example.nl"]
+ONDERDELEN = ["DEUR", "DEUR", "LADE", "PLINT"]
+KASTEN = [
+    {"type": "A", "hoogte": 720, "breedte": 600, "diepte": 560, "inrichting_raw": "2x plank"},
+    {"type": "C", "hoogte": 700, "breedte": 400, "diepte": 350, "inrichting_raw": "1x lade, 3x plank"},
+]
+
+
+def _werkboek(pad, beschrijving, markering=None):
+    """Werkboek met ONDERDELEN/KLANT/KASTEN in de cellen van de beschrijving."""
+    plan = werkboek_sjablonen.SjabloonPlan(beschrijving)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Inmeet"
+    if markering:
+        ws["A1"] = markering
+
+    def zet(blad, r, c, waarde):
+        blad.cell(row=r + 1, column=c + 1, value=waarde)
+
+    for veld, waarde in (("frontmodel", "K01 - vlak"), ("materiaal", "MDF gespoten"), ("kleur", "RAL 9010"),
+                         ("scharnieren", 12), ("lades", 2)):
+        zet(ws, *plan.cellen[veld], waarde)
+    for (r, c), waarde in zip(plan.klantgegevens, KLANT):
+        zet(ws, r, c, waarde)
+    for i, onderdeel in enumerate(ONDERDELEN):
+        zet(ws, plan.kop_rijen + i, plan.onderdeel_kolom, onderdeel)
+
+    mk = wb.create_sheet(plan.maatwerk_sheet)
+    for kolom, kast in zip(plan.kast_kolommen, KASTEN):
+        for veld, r, _ in plan.kast_velden:
+            if r is not None and veld in kast:
+                zet(mk, r, kolom, kast[veld])
+    wb.save(pad)
+    return str(pad)
+
+
+@pytest.fixture
+def met_v2(tmp_path, monkeypatch):
+    extra = tmp_path / "sjablonen"
+    extra.mkdir()
+    (extra / "inmeet_v2.json").write_text(json.dumps(INMEET_V2))
+    monkeypatch.setattr(werkboek_sjablonen, "_SJABLONEN", Sjablonen([INGEBOUWDE_SJABLONEN, str(extra)]))
+
+
+def _zonder_kolom(parse):
+    parse = dict(parse, project="", sjabloon=None)
+    parse["maatwerk_kasten"] = [{k: v for k, v in kast.items() if k != "kolom_index"}
+                                for kast in parse["maatwerk_kasten"]]
+    return parse
+
+
+def test_oorspronkelijk_formulier_blijft_v1(tmp_path, met_v2):
+    pad = _werkboek(tmp_path / "v1.xlsx", json.load(open(f"{INGEBOUWDE_SJABLONEN}/inmeet_v1.json")))
+    onderdelen, g2, h2, kleur, klantregels, scharnieren, lades, project = hf.lees_excel(pad)
+
+    assert project["sjabloon"] == "inmeet-v1"
+    assert (g2, h2, kleur, scharnieren, lades) == ("K01 - vlak", "MDF gespoten", "RAL 9010", 12, 2)
+    assert klantregels == KLANT
+    assert [o for o in onderdelen if o in ONDERDELEN] == ONDERDELEN
+    assert [(k["type"], k["hoogte"], k["breedte"], k["diepte"]) for k in project["maatwerk_kasten"]] == [
+        (k["type"], k["hoogte"], k["breedte"], k["diepte"]) for k in KASTEN
+    ]
+    assert hf.valideer_werkboek(pad) == []
+
+
+def test_v2_herkend_en_gelijk_aan_v1(tmp_path, met_v2):
+    v1 = json.load(open(f"{INGEBOUWDE_SJABLONEN}/inmeet_v1.json"))
+    pad_v1 = _werkboek(tmp_path / "v1.xlsx", v1)
+    pad_v2 = _werkboek(tmp_path / "v2.xlsx", INMEET_V2, markering="Hoken inmeet v2 (2026)")
+
+    parse_v1 = hf.maak_parse_state(*hf.lees_excel(pad_v1))
+    parse_v2 = hf.maak_parse_state(*hf.lees_excel(pad_v2))
+    assert parse_v2["sjabloon"] == "inmeet-v2"
+    assert _zonder_kolom(parse_v2) == _zonder_kolom(parse_v1)
+    assert hf.valideer_werkboek(pad_v2) == []
+
+
+def test_markering_elders_telt_niet(tmp_path, met_v2):
+    v1 = json.load(open(f"{INGEBOUWDE_SJABLONEN}/inmeet_v1.json"))
+    pad = _werkboek(tmp_path / "v1.xlsx", v1)
+    wb = openpyxl.load_workbook(pad)
+    wb["Inmeet"]["A2"] = "HOKEN INMEET V2"
+    wb.save(pad)
+    assert hf.lees_excel(pad)[7]["sjabloon"] == "inmeet-v1"
+
+
+def test_precies_een_standaardsjabloon(tmp_path):
+    extra = tmp_path / "sjablonen"
+    extra.mkdir()
+    (extra / "ander.json").write_text(json.dumps(dict(INMEET_V2, naam="ander", herkenning=None)))
+    with pytest.raises(ValueError):
+        Sjablonen([INGEBOUWDE_SJABLONEN, str(extra)])
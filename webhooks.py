@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import inmeet_service as service
+import inmeetverwerker_hellofront as hf
+import tenants
+from state_store import get_state_store
+
+# ======================================================
+# 🪝 TEAMLEADER WEBHOOKS → AUTOMATISCHE OFFERTE
+# Registreer in Teamleader (webhooks.register) als URL:
+#   https://<api>/webhooks/teamleader?geheim=<WEBHOOK_GEHEIM>[&tenant=<naam>]
+# (kan de afzender headers meegeven, stuur het geheim dan als X-Webhook-Geheim)
+# met types deal.created / deal.updated (en bestand-events, indien beschikbaar).
+# Per event: nieuwste .xlsx van de deal → lees_werkboek → prijs → concept-
+# offerte (WEBHOOK_AUTO_OFFERTE=1, alleen als de deal er nog geen heeft)
+# of op de reviewlijst voor een operator.
+# Testen zonder Teamleader: python cli.py webhook-replay events.jsonl --url ...
+# ======================================================
+
+WEBHOOK_GEHEIM = os.getenv("WEBHOOK_GEHEIM", "")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2"))
+WEBHOOK_MAX_WACHTRIJ = int(os.getenv("WEBHOOK_MAX_WACHTRIJ", "100"))
+WEBHOOK_AUTO_OFFERTE = os.getenv("WEBHOOK_AUTO_OFFERTE", "0") == "1"
+WEBHOOK_MODE = os.getenv("WEBHOOK_MODE", "P")
+
+EVENT_PREFIX = "webhook_event:"          # dedup op event-ID
+EVENT_TTL_SEC = 7 * 24 * 3600
+BESTAND_PREFIX = "webhook_bestand:"      # hash van het laatst verwerkte werkboek per deal
+REVIEW_PREFIX = "review:"
+REVIEW_INDEX_KEY = "review_index"
+
+GENEGEERDE_TYPES = {"deal.deleted", "deal.lost"}
+
+log = logging.getLogger(__name__)
+
+
+def event_id(event, ruw: bytes):
+    """ID van het event; zonder id-veld de hash van de body (zelfde event = zelfde ID)."""
+    return str(event.get("id") or hashlib.sha1(ruw).hexdigest())
+
+
+def _deal_en_bestand(event):
+    """(deal_id, file_id) uit een deal- of bestand-event."""
+    subject = event.get("subject") or {}
+    if subject.get("type") == "deal":
+        return subject.get("id"), None
+    if subject.get("type") == "file":
+        info = hf.bestand_info(subject.get("id")) or {}
+        gekoppeld = info.get("subject") or {}
+        if gekoppeld.get("type") == "deal":
+            return gekoppeld.get("id"), subject.get("id")
+    return None, None
+
+
+def _review_id(event, sleutel):
+    """Deal-ID van het event, of (bestand-event dat niet te koppelen was) het event zelf."""
+    subject = event.get("subject") or {}
+    if subject.get("type") == "deal" and subject.get("id"):
+        return str(subject["id"])
+    return "event:" + sleutel.rpartition(EVENT_PREFIX)[2]
+
+
+# ======================================================
+# 📋 REVIEWLIJST (state store, per tenant)
+# ======================================================
+
+def _werk_review_index_bij(fn):
+    store = get_state_store()
+    sleutel = tenants.huidige_tenant().sleutel(REVIEW_INDEX_KEY)
+    while True:
+        oud = store.get(sleutel)
+        nieuw = fn(json.loads(oud) if oud else [])
+        if store.compare_and_set(sleutel, oud, json.dumps(nieuw)):
+            return nieuw
+
+
+def zet_op_review(deal_id, item):
+    item = dict(item, deal_id=deal_id, ontvangen_op=datetime.now().isoformat(timespec="seconds"))
+    get_state_store().set_json(tenants.huidige_tenant().sleutel(REVIEW_PREFIX + deal_id), item)
+    _werk_review_index_bij(lambda ids: ids if deal_id in ids else ids + [deal_id])
+
+
+def review_lijst():
+    """Samenvatting van alle deals op de reviewlijst (oudste eerst)."""
+    store = get_state_store()
+    tenant = tenants.huidige_tenant()
+    oud = store.get(tenant.sleutel(REVIEW_INDEX_KEY))
+    lijst = []
+    for deal_id in json.loads(oud) if oud else []:
+        item = store.get_json(tenant.sleutel(REVIEW_PREFIX + deal_id))
+        if item:
+            lijst.append({
+                "deal_id": deal_id,
+                "bestand": item.get("bestand"),
+                "reden": item.get("reden"),
+                "model": item.get("model"),
+                "totaal_excl": (item.get("data") or {}).get("totaal_excl"),
+                "problemen": item.get("problemen") or [],
+                "event_type": (item.get("event") or {}).get("type"),
+                "ontvangen_op": item.get("ontvangen_op"),
+            })
+    return lijst
+
+
+def haal_van_review(deal_id):
+    get_state_store().delete(tenants.huidige_tenant().sleutel(REVIEW_PREFIX + deal_id))
+    _werk_review_index_bij(lambda ids: [i for i in ids if i != deal_id])
+
+
+def keur_goed(deal_id, mode=None):
+    """Verstuurt de geprijsde offerte van de reviewlijst en haalt hem eraf."""
+    item = get_state_store().get_json(tenants.huidige_tenant().sleutel(REVIEW_PREFIX + deal_id))
+    if not item:
+        raise ValueError(f"Deal '{deal_id}' staat niet op de reviewlijst.")
+    if not item.get("data"):
+        raise ValueError(f"Deal '{deal_id}' heeft geen geprijsde offerte ({item.get('reden')}).")
+    resultaat = service.verstuur(deal_id, item["data"], mode or WEBHOOK_MODE, item["parse"])
+    haal_van_review(deal_id)
+    return resultaat
+
+
+# ======================================================
+# ⚙️ VERWERKEN
+# ======================================================
+
+def verwerk_event(event):
+    """Loopt de hele pipeline voor één event; geeft een status terug."""
+    if event.get("type") in GENEGEERDE_TYPES:
+        return "genegeerd"
+
+    deal_id, file_id = _deal_en_bestand(event)
+    if not deal_id:
+        return "genegeerd"
+
+    if file_id:
+        bestanden = [dict(hf.bestand_info(file_id) or {}, id=file_id)]
+    else:
+        bestanden = hf.deal_bestanden(deal_id)
+    werkboeken = [b for b in bestanden if str(b.get("name") or "").lower().endswith(".xlsx")]
+    if not werkboeken:
+        return "geen werkboek"
+
+    bestand = werkboeken[0]
+    inhoud = hf.download_bestand(bestand["id"])
+
+    # deal.updated komt vaak: hetzelfde werkboek maar één keer verwerken
+    store = get_state_store()
+    hash_sleutel = tenants.huidige_tenant().sleutel(BESTAND_PREFIX + deal_id)
+    bestand_hash = hashlib.sha1(inhoud).hexdigest()
+    if store.get(hash_sleutel) == bestand_hash:
+        return "ongewijzigd"
+
+    uitgelezen = service.lees_werkboek(inhoud, bestand["name"])
+    item = {"bestand": bestand["name"], "problemen": uitgelezen["problemen"]}
+
+    if uitgelezen["parse"] is None:
+        zet_op_review(deal_id, dict(item, reden="fouten in werkboek"))
+        status = "review"
+    elif uitgelezen.get("keukens"):
+        zet_op_review(deal_id, dict(item, reden=f"{len(uitgelezen['keukens'])} keukens; kies één of meerdere offertes"))
+        status = "review"
+    else:
+        parse_state = uitgelezen["parse"]
+        try:
+            prijzen = service.prijs(parse_state, deal_id=deal_id)
+        except ValueError as e:
+            zet_op_review(deal_id, dict(item, reden=str(e)))
+            status = "review"
+        else:
+            if WEBHOOK_AUTO_OFFERTE and not prijzen["bestaande_offerte"]:
+                status = service.verstuur(deal_id, prijzen["data"], WEBHOOK_MODE, parse_state)["status"]
+            else:
+                # een bestaande offerte is misschien al naar de klant: niet automatisch overschrijven
+                reden = "deal heeft al een offerte; bijwerken?" if prijzen["bestaande_offerte"] else "ter controle"
+                zet_op_review(deal_id, dict(
+                    item, reden=reden, model=prijzen["model"], data=prijzen["data"], parse=parse_state,
+                ))
+                status = "review"
+
+    store.set(hash_sleutel, bestand_hash, EVENT_TTL_SEC)
+    return status
+
+
+class WebhookVerwerker:
+    """
+    Dedupliceert events (state store, dus ook over replica's) en verwerkt ze
+    op een begrensde thread pool. Is de wachtrij vol, dan weigeren we het
+    event zodat Teamleader het later opnieuw aanbiedt.
+    """
+
+    def __init__(self, workers=WEBHOOK_WORKERS, max_wachtrij=WEBHOOK_MAX_WACHTRIJ):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="webhook")
+        self._plekken = threading.BoundedSemaphore(max_wachtrij)
+        self._lock = threading.Lock()
+        self.tellers = {"ontvangen": 0, "dubbel": 0, "geweigerd": 0, "verwerkt": 0, "mislukt": 0}
+
+    def _tel(self, naam):
+        with self._lock:
+            self.tellers[naam] += 1
+
+    def ontvang(self, event, ruw: bytes):
+        """Geeft "in wachtrij", "dubbel" of "vol" terug."""
+        self._tel("ontvangen")
+        store = get_state_store()
+        sleutel = tenants.huidige_tenant().sleutel(EVENT_PREFIX + event_id(event, ruw))
+
+        if not store.compare_and_set(sleutel, None, "in wachtrij", EVENT_TTL_SEC):
+            self._tel("dubbel")
+            return "dubbel"
+
+        if not self._plekken.acquire(blocking=False):
+            store.delete(sleutel)   # niet verwerkt: een herhaling moet wel door
+            self._tel("geweigerd")
+            return "vol"
+
+        future = self._pool.submit(tenants.in_context(self._verwerk), event, sleutel)
+        future.add_done_callback(lambda _: self._plekken.release())
+        return "in wachtrij"
+
+    def _verwerk(self, event, sleutel):
+        try:
+            status = verwerk_event(event)
+        except Exception as e:
+            # Teamleader kreeg al 202 en probeert het niet opnieuw: zichtbaar op de
+            # reviewlijst, en de dedup-sleutel weg zodat een replay wel door mag
+            self._tel("mislukt")
+            log.exception("Webhook mislukt (%s)", event.get("type"))
+            get_state_store().delete(sleutel)
+            try:
+                zet_op_review(_review_id(event, sleutel), {"reden": f"verwerking mislukt: {e}", "event": event})
+            except Exception:
+                log.exception("Mislukte webhook niet op de reviewlijst gezet")
+            return
+        self._tel("verwerkt")
+        get_state_store().set(sleutel, status, EVENT_TTL_SEC)
+
+    def sluit(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
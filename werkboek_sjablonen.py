@@ -0,0 +1,214 @@
+import glob
+import json
+import os
+import re
+import threading
+
+# ======================================================
+# 📐 WERKBOEK-SJABLONEN — CELINDELING ALS CONFIG
+# Elke versie van het inmeetformulier is een JSON-beschrijving (zie
+# sjablonen/inmeet_v1.json): welke cel frontmodel/materiaal/kleur bevat,
+# waar de klantgegevens staan, welke rij van MAATWERK KASTEN welk veld is.
+# Bij het laden wordt elke beschrijving één keer gecompileerd tot een
+# SjabloonPlan met 0-based (rij, kolom)-indexen en het aantal rijen dat
+# van het kasten-tabblad gelezen moet worden.
+# Herkenning: een sjabloon met "herkenning": {"cel": "A1", "tekst": "..."}
+# wordt gekozen als die cel met die tekst begint (hoogste versie eerst);
+# anders het sjabloon zonder herkenning (het oorspronkelijke formulier).
+# Een nieuwe indeling = een extra JSON-bestand in WERKBOEK_SJABLONEN
+# (standaard /app/werkboek_sjablonen), geen nieuwe code.
+# ======================================================
+
+INGEBOUWDE_SJABLONEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sjablonen")
+WERKBOEK_SJABLONEN = os.getenv("WERKBOEK_SJABLONEN", "/app/werkboek_sjablonen")
+
+# velden van het inmeet-tabblad die één cel zijn
+INMEET_CELLEN = ("frontmodel", "materiaal", "kleur", "scharnieren", "lades")
+
+# velden per maatwerk kast, in de volgorde van de kast-dict, met hun soort:
+# tekst (gestript), hoofdletters, getal (float of None), geheel (int, 0 als leeg)
+KAST_VELDEN = {
+    "type": "hoofdletters",
+    "hoogte": "getal",
+    "breedte": "getal",
+    "diepte": "getal",
+    "poothoogte": "getal",
+    "kleur_corpus": "tekst",
+    "zichtbare_zijde": "tekst",
+    "inrichting_raw": "tekst",
+    "scharnieren": "geheel",
+    "frontmodel": "hoofdletters",
+    "aantal_fronten": "geheel",
+    "dubbelzijdig": "tekst",
+    "handgreep": "tekst",
+    "afwerking": "tekst",
+}
+VERPLICHTE_KAST_VELDEN = ("type", "hoogte", "breedte", "diepte")
+
+_CEL = re.compile(r"^([A-Z]+)([1-9][0-9]*)$")
+
+
+def kolom_index(letters):
+    """'A' → 0, 'K' → 10, 'AA' → 26."""
+    if not re.fullmatch(r"[A-Z]+", str(letters).strip().upper()):
+        raise ValueError(f"Ongeldige kolom: {letters!r}")
+    index = 0
+    for letter in str(letters).strip().upper():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def kolom_letters(index):
+    """0 → 'A', 26 → 'AA'."""
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+    return letters
+
+
+def cel_index(cel):
+    """'G2' → (1, 6): 0-based (rij, kolom)."""
+    m = _CEL.match(str(cel).strip().upper())
+    if not m:
+        raise ValueError(f"Ongeldige cel: {cel!r}")
+    return int(m.group(2)) - 1, kolom_index(m.group(1))
+
+
+def _bereik(bereik):
+    """'K2:K6' → [(1, 10), ..., (5, 10)] (één kolom of één rij)."""
+    begin, _, eind = str(bereik).partition(":")
+    (r1, c1), (r2, c2) = cel_index(begin), cel_index(eind or begin)
+    if r1 != r2 and c1 != c2:
+        raise ValueError(f"Bereik {bereik!r} moet één kolom of één rij zijn.")
+    return [(r, c) for r in range(r1, r2 + 1) for c in range(c1, c2 + 1)]
+
+
+class SjabloonPlan:
+    """Gecompileerde beschrijving: alleen indexen, geen celnamen meer uitrekenen bij het lezen."""
+
+    def __init__(self, beschrijving, bron=None):
+        self.bron = bron
+        try:
+            self.naam = str(beschrijving["naam"])
+            self.versie = int(beschrijving.get("versie", 0))
+            self.omschrijving = beschrijving.get("omschrijving", "")
+            inmeet = beschrijving["inmeet"]
+            maatwerk = beschrijving["maatwerk"]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Sjabloon {bron or '?'}: ongeldige beschrijving ({e}).")
+
+        # herkenning
+        herkenning = beschrijving.get("herkenning")
+        self.herkenning = None
+        if herkenning:
+            self.herkenning = (cel_index(herkenning["cel"]), str(herkenning["tekst"]).strip().upper())
+            self.herkenning_cel = herkenning["cel"].upper()
+
+        # inmeet-tabblad
+        ontbrekend = [v for v in INMEET_CELLEN + ("onderdeel_kolom", "klantgegevens") if v not in inmeet]
+        if ontbrekend:
+            raise ValueError(f"Sjabloon {self.naam}: inmeet mist {', '.join(ontbrekend)}.")
+        self.celnamen = {v: str(inmeet[v]).upper() for v in INMEET_CELLEN}
+        self.cellen = {v: cel_index(c) for v, c in self.celnamen.items()}
+        self.onderdeel_kolom = kolom_index(inmeet["onderdeel_kolom"])
+        self.klantgegevens_bereik = str(inmeet["klantgegevens"]).upper()
+        self.klantgegevens = _bereik(self.klantgegevens_bereik)
+        # kolommen met kopgegevens: geen onderdelentabel (zie _inventaris_kolommen)
+        self.kop_kolommen = frozenset(c for _, c in list(self.cellen.values()) + self.klantgegevens)
+        alle = list(self.cellen.values()) + self.klantgegevens
+        self.kop_rijen = max(r for r, _ in alle) + 1
+        self.kop_max_kolom = max(c for _, c in alle)
+
+        # MAATWERK KASTEN
+        self.maatwerk_sheet = str(maatwerk.get("sheet", "MAATWERK KASTEN"))
+        begin, _, eind = str(maatwerk.get("kolommen", "B:K")).partition(":")
+        self.kast_kolommen = range(kolom_index(begin), kolom_index(eind or begin) + 1)
+        rijen = maatwerk.get("rijen") or {}
+        onbekend = [v for v in rijen if v not in KAST_VELDEN]
+        if onbekend:
+            raise ValueError(f"Sjabloon {self.naam}: onbekende kastvelden {', '.join(onbekend)}.")
+        ontbrekend = [v for v in VERPLICHTE_KAST_VELDEN if v not in rijen]
+        if ontbrekend:
+            raise ValueError(f"Sjabloon {self.naam}: maatwerk mist de rij voor {', '.join(ontbrekend)}.")
+        # (veld, 0-based rij of None, soort) in de volgorde van KAST_VELDEN
+        self.kast_velden = [
+            (veld, int(rijen[veld]) - 1 if veld in rijen else None, soort)
+            for veld, soort in KAST_VELDEN.items()
+        ]
+        self.kast_rijen = sorted({r for _, r, _ in self.kast_velden if r is not None})
+        self.kast_nrows = self.kast_rijen[-1] + 1   # meer rijen hoeft pd.read_excel niet te lezen
+
+    def herkent(self, cel):
+        """cel(rij, kolom) → waarde; True als de markering van dit sjabloon erin staat."""
+        if self.herkenning is None:
+            return False
+        (r, c), tekst = self.herkenning
+        waarde = cel(r, c)
+        return isinstance(waarde, str) and waarde.strip().upper().startswith(tekst)
+
+    def __repr__(self):
+        return f"SjabloonPlan({self.naam!r}, versie={self.versie})"
+
+
+def _laad_map(map_):
+    plannen = []
+    for pad in sorted(glob.glob(os.path.join(map_, "*.json"))):
+        with open(pad, "r") as f:
+            plannen.append(SjabloonPlan(json.load(f), bron=pad))
+    return plannen
+
+
+class Sjablonen:
+    """Alle bekende sjablonen; herken() kiest er één per tabblad."""
+
+    def __init__(self, mappen):
+        per_naam = {}
+        for map_ in mappen:
+            if map_ and os.path.isdir(map_):
+                for plan in _laad_map(map_):
+                    per_naam[plan.naam] = plan   # latere map overschrijft (zelfde naam)
+        standaard = [p for p in per_naam.values() if p.herkenning is None]
+        if len(standaard) != 1:
+            raise ValueError(
+                f"Precies één sjabloon zonder herkenning verwacht, gevonden: {len(standaard)}."
+            )
+        self.standaard = standaard[0]
+        self.met_herkenning = sorted(
+            (p for p in per_naam.values() if p.herkenning is not None), key=lambda p: -p.versie
+        )
+        self.alle = [self.standaard] + self.met_herkenning
+        # naam@versie van alle sjablonen: voor de sleutel van parse-caches
+        self.vingerafdruk = ",".join(sorted(f"{p.naam}@{p.versie}" for p in self.alle))
+        self.maatwerk_sheets = frozenset(p.maatwerk_sheet.upper() for p in self.alle)
+        # alle herkenningscellen samen: het kleinste blok dat valideer_werkboek moet lezen
+        cellen = [p.herkenning[0] for p in self.met_herkenning]
+        self.herkenning_rijen = max((r for r, _ in cellen), default=-1) + 1
+        self.herkenning_max_kolom = max((c for _, c in cellen), default=-1)
+
+    def herken(self, cel):
+        """Het sjabloon voor een tabblad; cel(rij, kolom) geeft de waarde (0-based)."""
+        for plan in self.met_herkenning:
+            if plan.herkent(cel):
+                return plan
+        return self.standaard
+
+    def get(self, naam):
+        for plan in self.alle:
+            if plan.naam == naam:
+                return plan
+        raise ValueError(f"Onbekend sjabloon: {naam}")
+
+
+_SJABLONEN = None
+_SJABLONEN_LOCK = threading.Lock()
+
+
+def get_sjablonen():
+    """De sjablonen van dit proces (ingebouwd + WERKBOEK_SJABLONEN), één keer gecompileerd."""
+    global _SJABLONEN
+    with _SJABLONEN_LOCK:
+        if _SJABLONEN is None:
+            _SJABLONEN = Sjablonen([INGEBOUWDE_SJABLONEN, WERKBOEK_SJABLONEN])
+        return _SJABLONEN